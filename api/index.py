@@ -1,5 +1,7 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, Response, stream_with_context
 import os
+import codecs
+import json
 import tempfile
 import uuid
 from werkzeug.utils import secure_filename
@@ -11,7 +13,7 @@ import io
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.converters.font_detector import FontDetector
-from app.converters.font_mapper import FontMapper
+from app.converters.font_mapper import ConversionStats, FontMapper
 
 app = Flask(__name__, template_folder='templates')
 app.config['SECRET_KEY'] = 'vercel-deployment-key'
@@ -21,6 +23,104 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 font_detector = FontDetector()
 font_mapper = FontMapper()
 
+# Characters converted per NDJSON chunk line
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def wants_stream():
+    """Check whether the client asked for a streaming NDJSON response"""
+    return (request.args.get('stream', '').lower() in ('1', 'true', 'ndjson') or
+            request.accept_mimetypes.best == 'application/x-ndjson')
+
+def ndjson_response(lines):
+    """Stream JSON objects as newline-delimited JSON"""
+    body = (json.dumps(line, ensure_ascii=False) + '\n' for line in lines)
+    return Response(stream_with_context(body), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+def read_text_chunks(stream):
+    """
+    Decode a UTF-8 upload from its start in STREAM_CHUNK_SIZE chunks
+    
+    Args:
+        stream (file): Seekable binary upload stream
+        
+    Yields:
+        str: Decoded text chunks
+    """
+    stream.seek(0)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        data = stream.read(STREAM_CHUNK_SIZE)
+        text = decoder.decode(data, final=not data)
+        if text:
+            yield text
+        if not data:
+            break
+
+def detect_chunks(chunks, max_matches=10):
+    """
+    Detect fonts over a whole document given as text chunks
+    
+    Chunks are rejoined at line breaks (where a chunk has one) before they
+    are scanned, so counts and the selected source font are those of
+    detect_font_counts on the joined text, as used for in-memory
+    documents. Sample matches are taken from every chunk rather than only
+    the start of the text.
+    
+    Args:
+        chunks (iterable): Input text chunks
+        max_matches (int): Sample matches kept per classification
+        
+    Returns:
+        dict: Detection results in the detect_font_counts format
+    """
+    detection = font_detector.empty_font_counts(max_matches)
+    
+    def add(text):
+        font_detector.merge_font_counts(detection, font_detector.detect_font_counts(text, max_matches), max_matches)
+    
+    rest = ''
+    for chunk in chunks:
+        chunk = rest + chunk
+        end = chunk.rfind('\n') + 1 or len(chunk)
+        rest = chunk[end:]
+        add(chunk[:end])
+    if rest:
+        add(rest)
+    return detection
+
+def stream_conversion(chunks, header, detection):
+    """
+    Convert text chunks lazily, yielding the NDJSON lines of a streaming response
+    
+    The first line is a header with the detection summary, then one line
+    per converted chunk, and finally the statistics, accumulated chunk by
+    chunk. The whole document is converted with the one source font
+    selected from detection, as the non-streaming responses do.
+    
+    Args:
+        chunks (iterable): Input text chunks
+        header (dict): Extra fields for the header line
+        detection (dict): Font detection result for the whole document
+        
+    Yields:
+        dict: 'header', 'chunk', 'stats' or 'error' lines
+    """
+    try:
+        source_font = font_detector.select_source_font(detection)
+        yield {'type': 'header', **header, 'source_font': source_font, 'detected_fonts': detection}
+        
+        conversion_stats = ConversionStats()
+        pieces = font_mapper.convert_chunks(chunks, source_font, stats=conversion_stats)
+        for original, converted in pieces:
+            yield {'type': 'chunk', 'converted': converted}
+        
+        stats = conversion_stats.report(font_mapper)
+        yield {'type': 'stats', 'success': True, 'stats': stats}
+        
+    except Exception as e:
+        yield {'type': 'error', 'success': False, 'message': f'Error converting text: {str(e)}'}
+
 @app.route('/')
 def index():
     """Main page with file upload form"""
@@ -28,7 +128,7 @@ def index():
 
 @app.route('/api/convert', methods=['POST'])
 def convert_text_api():
-    """API endpoint for text conversion"""
+    """API endpoint for text conversion (NDJSON with ?stream=1)"""
     try:
         data = request.get_json()
         text = data.get('text', '')
@@ -36,14 +136,19 @@ def convert_text_api():
         if not text:
             return jsonify({'success': False, 'message': 'No text provided'})
         
-        # Detect fonts
-        detection = font_detector.detect_fonts(text)
+        # Detect fonts and pick the source font once for the whole text
+        detection = font_detector.detect_font_counts(text, max_matches=10)
         
-        # Convert text
-        converted_text = font_mapper.convert_with_preservation(text)
+        if wants_stream():
+            chunks = (text[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(text), STREAM_CHUNK_SIZE))
+            return ndjson_response(stream_conversion(chunks, {'length': len(text)}, detection))
         
-        # Generate statistics
-        stats = font_mapper.get_conversion_stats(text, converted_text)
+        # Convert text, collecting statistics as it goes
+        conversion_stats = ConversionStats()
+        converted_text = font_mapper.convert_with_preservation(
+            text, source_font=font_detector.select_source_font(detection), stats=conversion_stats
+        )
+        stats = conversion_stats.report(font_mapper)
         stats['detected_fonts'] = detection
         
         return jsonify({
@@ -62,7 +167,7 @@ def convert_text_api():
 
 @app.route('/api/convert-file', methods=['POST'])
 def convert_file_api():
-    """API endpoint for file conversion - simplified for Vercel"""
+    """API endpoint for file conversion - simplified for Vercel (NDJSON with ?stream=1)"""
     try:
         if 'file' not in request.files:
             return jsonify({'success': False, 'message': 'No file provided'})
@@ -71,6 +176,28 @@ def convert_file_api():
         if file.filename == '':
             return jsonify({'success': False, 'message': 'No file selected'})
         
+        # Stream the upload through the converter without holding it in memory
+        if wants_stream():
+            if not file.filename.endswith('.txt'):
+                return jsonify({
+                    'success': False,
+                    'message': 'Only TXT files supported in Vercel deployment. For full document support, use the Docker deployment.'
+                })
+            # Detect fonts over the whole upload first, then convert it from
+            # the start with the selected font
+            try:
+                detection = detect_chunks(read_text_chunks(file.stream))
+            except UnicodeDecodeError:
+                return jsonify({'success': False, 'message': 'Unable to decode file. Please ensure it\'s a valid text file.'})
+            
+            # Take the upload stream over, as Flask closes request files as
+            # soon as this view returns, before the body has been streamed
+            stream, file.stream = file.stream, io.BytesIO()
+            chunks = read_text_chunks(stream)
+            response = ndjson_response(stream_conversion(chunks, {'filename': f"converted_{file.filename}"}, detection))
+            response.call_on_close(stream.close)
+            return response
+        
         # Read file content as text (simplified for Vercel)
         try:
             if file.filename and file.filename.endswith('.txt'):
@@ -83,12 +210,15 @@ def convert_file_api():
         except UnicodeDecodeError:
             return jsonify({'success': False, 'message': 'Unable to decode file. Please ensure it\'s a valid text file.'})
         
-        # Detect and convert
-        detection = font_detector.detect_fonts(content)
-        converted_content = font_mapper.convert_with_preservation(content)
+        # Detect, then convert with the source font selected for the whole file
+        detection = font_detector.detect_font_counts(content, max_matches=10)
+        conversion_stats = ConversionStats()
+        converted_content = font_mapper.convert_with_preservation(
+            content, source_font=font_detector.select_source_font(detection), stats=conversion_stats
+        )
         
         # Generate statistics
-        stats = font_mapper.get_conversion_stats(content, converted_content)
+        stats = conversion_stats.report(font_mapper)
         stats['detected_fonts'] = detection
         
         return jsonify({
@@ -111,10 +241,7 @@ def convert_file_api():
 def font_info():
     """Get information about supported fonts"""
     return jsonify({
-        'supported_fonts': [
-            'DVTT Yogesh',
-            'DTT Dhruv'
-        ],
+        'supported_fonts': list(font_mapper.display_names.values()),
         'target_font': 'Lohit Marathi (Unicode)',
         'formats': ['txt'],  # Limited in Vercel
         'deployment': 'vercel',
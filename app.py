@@ -1,16 +1,38 @@
-from flask import Flask, render_template, request, send_file, jsonify, flash, redirect, url_for
+from flask import Flask, Request, render_template, request, send_file, jsonify, flash, redirect, url_for, g, Response
+import io
 import os
 import tempfile
-import shutil
+import time
+import zipfile
 from werkzeug.utils import secure_filename
+from app.batch import BatchLimitError, DocumentBatch
 from app.converters.font_detector import FontDetector
-from app.converters.document_converter import DocumentConverter
+from app.converters.document_converter import DocumentConverter, SeekableSpooledFile
 from app.converters.font_mapper import FontMapper
+from app.converters.parallel import ParallelConverter
+from app.converters.result_cache import ResultCache
+from app.jobs import JobManager
+from app.metrics import MetricsRegistry
+from app.storage import OutputStorage
+
+class UploadRequest(Request):
+    """
+    Request whose uploaded files can be handed to zipfile on any Python version
+    
+    Uploads stay in memory up to the document converter's spool threshold,
+    so medium-size documents are never written to disk and read back.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SeekableSpooledFile(max_size=document_converter.spool_threshold, mode='rb+')
 
 app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
+app.request_class = UploadRequest
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['UPLOAD_FOLDER'] = 'app/uploads'
 app.config['DOWNLOAD_FOLDER'] = 'app/downloads'
+app.config['JOBS_FOLDER'] = 'app/jobs'
+app.config['RESULT_CACHE_FOLDER'] = 'app/cache'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # Allowed file extensions
@@ -20,10 +42,93 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def file_format(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'unknown'
+
+# Request, job and per-stage conversion metrics served at /metrics; with
+# METRICS_DIR set (gunicorn.conf.py does), the values of every server
+# process are shared through that directory and served together
+metrics = MetricsRegistry(multiprocess_dir=os.environ.get('METRICS_DIR'))
+
 # Initialize converters
 font_detector = FontDetector()
 font_mapper = FontMapper()
-document_converter = DocumentConverter(font_detector, font_mapper)
+
+# Accepted values for the optional source_font form field
+SOURCE_FONTS = {'auto', *font_mapper.font_names}
+
+# Process pool for large documents (CONVERTER_PROCESSES=0 keeps everything in-process);
+# gunicorn.conf.py sizes it from the number of server workers
+converter_processes = int(os.environ.get('CONVERTER_PROCESSES', os.cpu_count() or 1))
+parallel_converter = ParallelConverter(workers=converter_processes) if converter_processes > 0 else None
+
+# Conversion results keyed by upload content (RESULT_CACHE_MAX_MB=0 disables the cache)
+result_cache_max_mb = int(os.environ.get('RESULT_CACHE_MAX_MB', 512))
+result_cache = ResultCache(app.config['RESULT_CACHE_FOLDER'],
+                           max_bytes=result_cache_max_mb * 1024 * 1024) if result_cache_max_mb > 0 else None
+
+# Converted files expire after OUTPUT_TTL_HOURS and are capped at OUTPUT_MAX_MB in total
+output_storage = OutputStorage(app.config['DOWNLOAD_FOLDER'],
+                               ttl=int(float(os.environ.get('OUTPUT_TTL_HOURS', 24)) * 60 * 60),
+                               max_bytes=int(os.environ.get('OUTPUT_MAX_MB', 1024)) * 1024 * 1024)
+
+# Conversion pool processes re-import the main module as __mp_main__ when it
+# is this file (python app.py); only the serving process sweeps
+if __name__ != '__mp_main__':
+    output_storage.start_sweeper()
+
+document_converter = DocumentConverter(font_detector, font_mapper, parallel_converter=parallel_converter,
+                                       result_cache=result_cache, output_storage=output_storage)
+
+def record_job_result(result, filename):
+    """Record a finished background job, or each document of a batch job, in the metrics"""
+    metrics.jobs_in_flight.dec()
+    for document_filename, document_result in result.get('documents', [(filename, result)]):
+        metrics.observe_conversion(document_result, file_format(document_filename))
+
+# Background conversion jobs for /upload (CONVERTER_JOBS concurrent jobs per server process);
+# status files expire with the converted files they point to
+job_manager = JobManager(document_converter, jobs_dir=app.config['JOBS_FOLDER'],
+                         workers=int(os.environ.get('CONVERTER_JOBS', 2)),
+                         on_result=record_job_result, ttl=output_storage.ttl)
+
+# Batch uploads hold at most BATCH_MAX_FILES documents and BATCH_MAX_MB uncompressed
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 500))
+BATCH_MAX_BYTES = int(os.environ.get('BATCH_MAX_MB', 256)) * 1024 * 1024
+
+# Legacy-font sample for warm_up: DVTT Yogesh and DTT Dhruv text, English and digits
+WARMUP_TEXT = 'dk;Zky; Hkkjr Office 2024\nxzke iapk;r\n'
+
+def warm_up():
+    """
+    Run a tiny conversion so the first real request does not pay for
+    lazy imports, regex compilation and first-use allocations
+    
+    Returns:
+        bool: True if the warmup conversion succeeded
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = DocumentConverter(font_detector, font_mapper, output_dir=output_dir)
+        result = converter.convert_document(WARMUP_TEXT.encode('utf-8'), filename='warmup.txt')
+    font_mapper.convert_text(WARMUP_TEXT)
+    return bool(result.get('success'))
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    metrics.http_requests_in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    metrics.http_request_duration.observe(time.perf_counter() - g.request_started,
+                                          endpoint=request.endpoint or 'unknown',
+                                          status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'request_started' in g:
+        metrics.http_requests_in_flight.dec()
 
 @app.route('/')
 def index():
@@ -32,7 +137,7 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload and conversion"""
+    """Handle file upload and queue its conversion"""
     if 'file' not in request.files:
         flash('No file selected')
         return redirect(request.url)
@@ -42,55 +147,121 @@ def upload_file():
         flash('No file selected')
         return redirect(request.url)
     
+    source_font = request.form.get('source_font', 'auto')
+    if source_font not in SOURCE_FONTS:
+        return jsonify({
+            'success': False,
+            'message': f'Unsupported source font: {source_font}'
+        })
+    
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         
-        # Create unique filename to avoid conflicts
-        import uuid
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        
-        # Save uploaded file
-        file.save(file_path)
-        
-        try:
-            # Process the document
-            result = document_converter.convert_document(file_path)
-            
-            if result['success']:
-                return jsonify({
-                    'success': True,
-                    'message': 'Document converted successfully',
-                    'preview': result['preview'],
-                    'download_url': url_for('download_file', filename=result['output_filename']),
-                    'stats': result['stats']
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': result['error']
-                })
-                
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Error processing document: {str(e)}'
-            })
+        # Hand the spooled upload stream itself to the background job, taking
+        # it over as Flask closes request files as soon as this view returns
+        upload, file.stream = file.stream, io.BytesIO()
         
-        finally:
-            # Clean up uploaded file
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        # Convert in the background; the client polls the status URL
+        metrics.jobs_in_flight.inc()
+        job_id = job_manager.submit(upload, filename, source_font=source_font)
+        return jsonify({
+            'success': True,
+            'message': 'Document queued for conversion',
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id)
+        }), 202
     
     else:
         flash('Invalid file type. Please upload DOC, DOCX, PDF, or TXT files.')
         return redirect(request.url)
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status and progress of a conversion job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    response = {
+        'success': job['status'] != 'failed',
+        'job_id': job_id,
+        'status': job['status'],
+        'filename': job['filename'],
+        'progress': job['progress']
+    }
+    if job['status'] == 'done':
+        response['message'] = 'Document converted successfully'
+        response['preview'] = job['result']['preview']
+        response['stats'] = job['result']['stats']
+        response['download_url'] = url_for('download_file', filename=job['result']['output_filename'])
+        response['cache_hit'] = job['result']['cache_hit']
+    elif job['status'] == 'failed':
+        response['message'] = job['error']
+    return jsonify(response)
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    """
+    Queue many documents for conversion in one request
+    
+    Accepts either a ZIP archive in the 'archive' field or several files in
+    the 'files' field, up to BATCH_MAX_FILES documents and BATCH_MAX_MB
+    uncompressed. A background job converts them into a ZIP of converted
+    files, in the folders of the archive, plus a manifest.json with
+    per-file stats and errors; a failing member never aborts the batch.
+    The client polls the status URL for the download URL of the ZIP.
+    """
+    source_font = request.form.get('source_font', 'auto')
+    if source_font not in SOURCE_FONTS:
+        return jsonify({
+            'success': False,
+            'message': f'Unsupported source font: {source_font}'
+        })
+    
+    batch = DocumentBatch(allowed_file, max_files=BATCH_MAX_FILES, max_bytes=BATCH_MAX_BYTES,
+                          max_file_size=document_converter.max_file_size)
+    batch_name = 'batch.zip'
+    try:
+        # Take the upload streams over, as Flask closes request files as
+        # soon as this view returns, before the job has read them
+        archive = request.files.get('archive')
+        if archive and archive.filename:
+            batch_name = secure_filename(archive.filename) or batch_name
+            stream, archive.stream = archive.stream, io.BytesIO()
+            try:
+                batch.add_archive(stream)
+            except zipfile.BadZipFile:
+                batch.close()
+                return jsonify({'success': False, 'message': 'Invalid ZIP archive'})
+        
+        for file in request.files.getlist('files'):
+            if file.filename:
+                stream, file.stream = file.stream, io.BytesIO()
+                batch.add_file(file.filename, stream)
+    except BatchLimitError as e:
+        batch.close()
+        return jsonify({'success': False, 'message': str(e)})
+    
+    if not len(batch):
+        batch.close()
+        return jsonify({'success': False, 'message': 'No files provided'})
+    
+    # Convert in the background; the client polls the status URL
+    metrics.jobs_in_flight.inc()
+    job_id = job_manager.submit(batch, batch_name, source_font=source_font,
+                                convert=document_converter.convert_batch)
+    return jsonify({
+        'success': True,
+        'message': 'Batch queued for conversion',
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id)
+    }), 202
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download converted file"""
-    file_path = os.path.join(app.config['DOWNLOAD_FOLDER'], filename)
-    if os.path.exists(file_path):
+    file_path = output_storage.resolve(filename)
+    if file_path is not None:
         return send_file(file_path, as_attachment=True)
     else:
         flash('File not found')
@@ -107,7 +278,7 @@ def preview_conversion():
     
     try:
         # Detect fonts in the text
-        detected_fonts = font_detector.detect_fonts(text)
+        detected_fonts = font_detector.detect_font_counts(text, max_matches=10)
         
         # Convert text
         converted_text = font_mapper.convert_text(text)
@@ -129,17 +300,37 @@ def preview_conversion():
 def font_info():
     """Get information about supported fonts"""
     return jsonify({
-        'supported_fonts': [
-            'DVTT Yogesh',
-            'DTT Dhruv'
-        ],
+        'supported_fonts': list(font_mapper.display_names.values()),
         'target_font': 'Lohit Marathi (Unicode)',
         'formats': list(ALLOWED_EXTENSIONS)
     })
 
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Get result cache counters for this server process"""
+    if result_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **result_cache.stats()})
+
+@app.route('/api/storage-stats')
+def storage_stats():
+    """Get converted file storage usage and eviction counters"""
+    return jsonify(output_storage.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for the server (every worker process under gunicorn)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # Ensure upload and download directories exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['DOWNLOAD_FOLDER'], exist_ok=True)
     
+    # Start the conversion workers before the first large upload arrives
+    if parallel_converter is not None:
+        parallel_converter.warm_up()
+    warm_up()
+    
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
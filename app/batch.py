@@ -0,0 +1,129 @@
+"""
+Documents uploaded together for one batch conversion
+
+A batch is collected from a ZIP archive and/or separate uploads while the
+request is handled, looking only at names and declared sizes. Member
+bytes are read one document at a time when the batch is converted, so
+members are never saved as files of their own.
+"""
+import os
+import posixpath
+import zipfile
+from collections import namedtuple
+
+from werkzeug.utils import secure_filename
+
+# One document of a batch: name as uploaded, safe file name to convert it
+# under, safe relative folder for its output, and read() -> bytes
+BatchMember = namedtuple('BatchMember', 'name filename folder read')
+
+
+class BatchLimitError(ValueError):
+    """Raised when a batch holds more files or bytes than allowed"""
+
+
+class DocumentBatch:
+    def __init__(self, allowed_file, max_files=500, max_bytes=256 * 1024 * 1024,
+                 max_file_size=16 * 1024 * 1024):
+        """
+        Args:
+            allowed_file (callable): allowed_file(filename) -> bool, for the
+                file types that can be converted
+            max_files (int): Most documents accepted in one batch
+            max_bytes (int): Most uncompressed bytes accepted in one batch
+            max_file_size (int): Larger documents are rejected on their own
+        """
+        self.allowed_file = allowed_file
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.total_bytes = 0
+
+        # Manifest entries of documents rejected before conversion
+        self.rejected = []
+        self._members = []
+        self._owned = []
+
+    def __len__(self):
+        """Number of documents in the batch, rejected ones included"""
+        return len(self._members) + len(self.rejected)
+
+    def add_archive(self, file):
+        """
+        Add every file of a ZIP archive, keeping its folders
+
+        The batch owns file from now on and closes it in close().
+
+        Args:
+            file (file): Seekable binary file object holding the archive
+
+        Raises:
+            zipfile.BadZipFile: If file is not a ZIP archive
+            BatchLimitError: If the batch gets too many files or bytes
+        """
+        self._owned.append(file)
+        zin = zipfile.ZipFile(file)
+        self._owned.append(zin)
+        for info in zin.infolist():
+            if info.is_dir():
+                continue
+            # Reading a member never yields more than its declared size,
+            # so the declared sizes bound the batch
+            self._add(info.filename, info.file_size, lambda info=info: zin.read(info))
+
+    def add_file(self, name, file):
+        """
+        Add one uploaded file
+
+        The batch owns file from now on and closes it in close().
+
+        Args:
+            name (str): File name as uploaded
+            file (file): Seekable binary file object holding the document
+
+        Raises:
+            BatchLimitError: If the batch gets too many files or bytes
+        """
+        self._owned.append(file)
+        size = file.seek(0, os.SEEK_END)
+
+        def read():
+            file.seek(0)
+            return file.read()
+
+        self._add(name, size, read)
+
+    def _add(self, name, size, read):
+        path = name.replace('\\', '/')
+        filename = secure_filename(posixpath.basename(path))
+        if not filename or not self.allowed_file(filename):
+            self.rejected.append({'name': name, 'success': False, 'error': 'Unsupported file type'})
+            return
+        if size > self.max_file_size:
+            self.rejected.append({'name': name, 'success': False, 'error': 'File too large'})
+            return
+
+        if len(self._members) >= self.max_files:
+            raise BatchLimitError(f'Too many files in one batch (at most {self.max_files})')
+        self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            raise BatchLimitError(f'Batch too large (at most {self.max_bytes // (1024 * 1024)} MB uncompressed)')
+
+        folders = (secure_filename(part) for part in posixpath.dirname(path).split('/'))
+        folder = '/'.join(part for part in folders if part)
+        self._members.append(BatchMember(name, filename, folder, read))
+
+    def members(self):
+        """
+        Documents accepted for conversion, in upload order
+
+        Returns:
+            list: BatchMember tuples
+        """
+        return list(self._members)
+
+    def close(self):
+        """Close the archives and files the batch owns"""
+        for owned in reversed(self._owned):
+            owned.close()
+        self._owned = []
@@ -0,0 +1,320 @@
+"""
+Bulk conversion of a directory tree from the command line
+
+Usage:
+    python -m app.cli SOURCE_DIR OUTPUT_DIR [--workers 4] [--source-font auto]
+
+Every supported document under SOURCE_DIR is converted into the same
+relative location under OUTPUT_DIR. When conversion changes the format
+(PDF and DOC become TXT), the output extension is appended
+(report.pdf -> report.pdf.txt). If the source tree also holds a
+report.pdf.txt, which keeps that output name, a number is added instead
+(report.pdf.2.txt) so no two inputs share an output.
+
+Finished files are appended to OUTPUT_DIR/manifest.jsonl. Running the
+same command again skips files that were converted successfully and have
+not changed since, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .converters.document_converter import DocumentConverter
+from .converters.font_detector import FontDetector
+from .converters.font_mapper import FontMapper
+from .converters.font_tables import load_tables
+
+MANIFEST_NAME = 'manifest.jsonl'
+STAGING_NAME = '.staging'
+
+SOURCE_FONTS = ('auto',) + tuple(font['name'] for font in load_tables()['fonts'])
+
+# Formats handled by DocumentConverter
+EXTENSIONS = ('txt', 'docx', 'doc', 'pdf')
+
+# Per-process converter, built by _init_worker
+_converter = None
+
+
+def _init_worker(output_root):
+    """Build this process's converter, writing into its own staging directory"""
+    global _converter
+    staging_dir = os.path.join(output_root, STAGING_NAME, str(os.getpid()))
+    os.makedirs(staging_dir, exist_ok=True)
+    _converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=staging_dir)
+
+
+def appended_output_path(source_path, output_path, extension):
+    """
+    Append a changed output extension without taking a sibling source's output
+
+    Args:
+        source_path (str): Document being converted, e.g. sub/report.pdf
+        output_path (str): Mirrored output path, before the extension change
+        extension (str): Output extension with the dot, e.g. '.txt'
+
+    Returns:
+        str: output_path + extension, or output_path + '.2' + extension (and
+            so on) while a source file of that name exists next to source_path
+    """
+    suffix = extension
+    number = 1
+    while os.path.exists(source_path + suffix):
+        number += 1
+        suffix = f'.{number}{extension}'
+    return output_path + suffix
+
+
+def _convert_file(source_path, output_path, source_font):
+    """
+    Convert one file and move its output into the mirrored tree
+
+    Args:
+        source_path (str): Document to convert
+        output_path (str): Mirrored output path, before any extension change
+        source_font (str): Source font, or 'auto'
+
+    Returns:
+        dict: Outcome fields for the manifest entry
+    """
+    started = time.perf_counter()
+    try:
+        result = _converter.convert_document(source_path, source_font=source_font)
+    except Exception as e:
+        result = {'success': False, 'error': f'Error converting document: {str(e)}'}
+
+    entry = {'success': bool(result.get('success')), 'seconds': round(time.perf_counter() - started, 4)}
+    if not entry['success']:
+        entry['error'] = result.get('error')
+        return entry
+
+    output_extension = os.path.splitext(result['output_path'])[1]
+    if output_extension.lower() != os.path.splitext(source_path)[1].lower():
+        output_path = appended_output_path(source_path, output_path, output_extension)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    os.replace(result['output_path'], output_path)
+
+    stats = result['stats']
+    entry['output'] = output_path
+    entry['source_font'] = stats.get('source_font')
+    entry['original_fonts'] = stats.get('original_fonts')
+    return entry
+
+
+def find_documents(source_root, extensions, skip_dir=None):
+    """
+    Walk a directory tree for convertible documents
+
+    Args:
+        source_root (str): Directory to walk
+        extensions (set): Lower-case extensions without the dot
+        skip_dir (str): Directory to leave out, e.g. an output tree inside
+            the source tree
+
+    Yields:
+        str: Document paths relative to source_root, in a stable order
+    """
+    skip_dir = os.path.realpath(skip_dir) if skip_dir else None
+    for dirpath, dirnames, filenames in os.walk(source_root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if os.path.realpath(os.path.join(dirpath, d)) != skip_dir)
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower().lstrip('.') in extensions:
+                yield os.path.relpath(os.path.join(dirpath, filename), source_root)
+
+
+def load_manifest(manifest_path):
+    """
+    Read the entries of earlier runs
+
+    Later entries for the same file win; a line cut short by an
+    interrupted run is ignored.
+
+    Returns:
+        dict: Relative path -> latest manifest entry
+    """
+    entries = {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry['path']] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def end_last_line(manifest_path):
+    """End a line cut short by an interrupted run, so the next entry starts on its own line"""
+    try:
+        with open(manifest_path, 'rb+') as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    except FileNotFoundError:
+        pass
+
+
+def is_done(entry, stat, output_root):
+    """Check whether a manifest entry covers the current version of a file"""
+    return (entry is not None and entry['success']
+            and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+            and os.path.exists(os.path.join(output_root, entry['output'])))
+
+
+def check_roots(source_root, output_root):
+    """
+    Refuse an output tree that would write over the source tree
+
+    An output root inside the source root is fine, since find_documents
+    skips it. One that is the source root, or holds it, mirrors outputs
+    onto source paths.
+
+    Raises:
+        ValueError: If output_root equals or contains source_root
+    """
+    source_root = os.path.realpath(source_root)
+    output_root = os.path.realpath(output_root)
+    if os.path.commonpath([source_root, output_root]) == output_root:
+        raise ValueError(f'output directory must not be or contain the source directory: {output_root}')
+
+
+def format_throughput(files, size, elapsed):
+    """Format files/s and MB/s for progress and summary lines"""
+    elapsed = max(elapsed, 1e-9)
+    return f'{files / elapsed:.1f} files/s, {size / (1024 * 1024) / elapsed:.2f} MB/s'
+
+
+def run(source_root, output_root, workers, source_font='auto', extensions=EXTENSIONS,
+        progress_interval=5.0):
+    """
+    Convert a directory tree, resuming from the manifest of earlier runs
+
+    Args:
+        source_root (str): Directory holding the legacy documents
+        output_root (str): Directory receiving the mirrored converted tree
+        workers (int): Number of worker processes
+        source_font (str): Source font for every document, or 'auto'
+        extensions (iterable): Extensions to convert, without the dot
+        progress_interval (float): Seconds between progress lines
+
+    Returns:
+        dict: Counts of converted, failed and skipped files, bytes and elapsed time
+
+    Raises:
+        ValueError: If output_root equals or contains source_root
+    """
+    check_roots(source_root, output_root)
+    os.makedirs(output_root, exist_ok=True)
+    manifest_path = os.path.join(output_root, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    end_last_line(manifest_path)
+    extensions = {extension.lower().lstrip('.') for extension in extensions}
+
+    summary = {'converted': 0, 'failed': 0, 'skipped': 0, 'bytes': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    last_report = started
+
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(output_root,)) as executor:
+        pending = {}
+
+        def collect(done):
+            nonlocal last_report
+            for future in done:
+                entry = pending.pop(future)
+                try:
+                    entry.update(future.result())
+                except Exception as e:
+                    entry.update({'success': False, 'error': f'Worker failed: {str(e)}'})
+                if entry['success']:
+                    # Relative, so the output tree can be moved with its manifest
+                    entry['output'] = os.path.relpath(entry['output'], output_root)
+                manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                manifest.flush()
+
+                if entry['success']:
+                    summary['converted'] += 1
+                    summary['bytes'] += entry['size']
+                else:
+                    summary['failed'] += 1
+                    print(f"failed: {entry['path']}: {entry['error']}", file=sys.stderr)
+
+            now = time.perf_counter()
+            if now - last_report >= progress_interval:
+                last_report = now
+                finished = summary['converted'] + summary['failed']
+                print(f"{summary['converted']} converted, {summary['failed']} failed, "
+                      f"{summary['skipped']} skipped, "
+                      f"{format_throughput(finished, summary['bytes'], now - started)}", file=sys.stderr)
+
+        for relative_path in find_documents(source_root, extensions, skip_dir=output_root):
+            source_path = os.path.join(source_root, relative_path)
+            stat = os.stat(source_path)
+            if is_done(previous.get(relative_path), stat, output_root):
+                summary['skipped'] += 1
+                continue
+
+            entry = {'path': relative_path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+            future = executor.submit(_convert_file, source_path,
+                                     os.path.join(output_root, relative_path), source_font)
+            pending[future] = entry
+
+            # Keep the queue short so huge trees don't pile up futures
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    shutil.rmtree(os.path.join(output_root, STAGING_NAME), ignore_errors=True)
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a tree of legacy Marathi documents to Unicode')
+    parser.add_argument('source_dir', help='Directory holding the documents to convert')
+    parser.add_argument('output_dir', help='Directory receiving the mirrored converted tree')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--source-font', default='auto', choices=SOURCE_FONTS,
+                        help='Source font of the documents (default: detect per document)')
+    parser.add_argument('--extensions', default=','.join(EXTENSIONS),
+                        help=f"Comma-separated extensions to convert (default: {','.join(EXTENSIONS)})")
+    parser.add_argument('--progress-interval', type=float, default=5.0,
+                        help='Seconds between progress lines (default: 5)')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source_dir):
+        parser.error(f'not a directory: {args.source_dir}')
+    try:
+        check_roots(args.source_dir, args.output_dir)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = run(args.source_dir, args.output_dir, max(args.workers, 1),
+                  source_font=args.source_font, extensions=args.extensions.split(','),
+                  progress_interval=args.progress_interval)
+
+    processed = summary['converted'] + summary['failed']
+    print(f"{summary['converted']} converted, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped in {summary['seconds']:.1f}s "
+          f"({format_throughput(processed, summary['bytes'], summary['seconds'])})")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,61 +1,346 @@
 """
 Document converter module for processing various file formats
 """
+import codecs
+import contextlib
+import functools
+import importlib
+import io
+import itertools
+import json
 import os
+import queue
 import tempfile
+import threading
 import shutil
+import time
+import uuid
+import zipfile
 from pathlib import Path
-import chardet
+from chardet.universaldetector import UniversalDetector
 
-# Optional imports with fallbacks
-try:
-    import magic
-except ImportError:
-    magic = None
+from .docx_rewriter import DocxRewriter
+from .font_mapper import ConversionStats
+from .result_cache import link_or_copy
 
-# Document processing libraries
-try:
-    from docx import Document
-    from docx.shared import Inches
-except ImportError:
-    Document = None
+# Third-party document libraries are imported by the format handlers on
+# first use, so importing this module and converting TXT files stays cheap
+_optional_modules = {}
+_optional_modules_lock = threading.Lock()
 
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None
+def _import_optional(name):
+    """
+    Import an optional dependency on first use
+    
+    Args:
+        name (str): Module name, e.g. 'PyPDF2'
+        
+    Returns:
+        module: The imported module, or None if it is not installed
+    """
+    if name not in _optional_modules:
+        with _optional_modules_lock:
+            if name not in _optional_modules:
+                try:
+                    _optional_modules[name] = importlib.import_module(name)
+                except ImportError:
+                    _optional_modules[name] = None
+    return _optional_modules[name]
+
+class _ConversionAccumulator:
+    """Running preview and engine statistics for documents converted piece by piece"""
+    
+    def __init__(self, preview_length=500):
+        self.preview_length = preview_length
+        self.original_preview = ''
+        self.converted_preview = ''
+        
+        # Filled by the font mapper while it converts (pass it as stats=)
+        self.conversion_stats = ConversionStats()
+    
+    def add(self, original, converted):
+        """Account for one converted piece in the preview"""
+        limit = self.preview_length + 1
+        
+        if len(self.original_preview) < limit:
+            self.original_preview += original[:limit]
+        if len(self.converted_preview) < limit:
+            self.converted_preview += converted[:limit]
+    
+    def add_unchanged(self, text):
+        """Account for a piece that was passed through without conversion"""
+        self.conversion_stats.add_unchanged(text)
+        self.add(text, text)
+    
+    def preview(self):
+        """Preview dict in the shape returned by the converters"""
+        return {
+            'original': self._truncate(self.original_preview),
+            'converted': self._truncate(self.converted_preview)
+        }
+    
+    def _truncate(self, text):
+        if len(text) > self.preview_length:
+            return text[:self.preview_length] + '...'
+        return text
+    
+    def stats(self, font_mapper):
+        """Conversion statistics for everything added so far"""
+        return self.conversion_stats.report(font_mapper)
+
+class _StageTimer:
+    """Wall-clock time and byte counts per conversion stage"""
+    
+    def __init__(self):
+        self.durations = {}
+        self.byte_counts = {}
+        # Stages nest (reading inside conversion inside writing); time is
+        # charged to the innermost running stage only
+        self._stack = []
+        self._mark = None
+        self._started = time.perf_counter()
+    
+    def _charge(self, now):
+        if self._stack:
+            name = self._stack[-1]
+            self.durations[name] = self.durations.get(name, 0.0) + now - self._mark
+        self._mark = now
+    
+    @contextlib.contextmanager
+    def stage(self, name, byte_count=0):
+        """Time a block as one stage, optionally counting the bytes it handled"""
+        self._charge(time.perf_counter())
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._charge(time.perf_counter())
+            self._stack.pop()
+            self.add_bytes(name, byte_count)
+    
+    def iterate(self, name, iterable):
+        """Yield from an iterable, timing each step as the given stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    
+    def add_bytes(self, name, byte_count):
+        if byte_count:
+            self.byte_counts[name] = self.byte_counts.get(name, 0) + byte_count
+    
+    def report(self):
+        """Stage timings in the format stored under stats['timings']"""
+        return {
+            'total': time.perf_counter() - self._started,
+            'stages': {
+                name: {'seconds': seconds, 'bytes': self.byte_counts.get(name, 0)}
+                for name, seconds in self.durations.items()
+            }
+        }
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+class SeekableSpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    SpooledTemporaryFile that is a complete binary file object on every Python
+    
+    readable(), writable() and seekable() only exist from Python 3.11 on;
+    zipfile (and so every DOCX reader) and io.TextIOWrapper need them.
+    """
+    
+    def readable(self):
+        return self._file.readable()
+    
+    def writable(self):
+        return self._file.writable()
+    
+    def seekable(self):
+        return self._file.seekable()
+
+class _DocumentSource:
+    """A document given as a path, bytes or a binary file object"""
+    
+    def __init__(self, document, name=None, spool_threshold=4 * 1024 * 1024):
+        """
+        Args:
+            document (str, bytes or file): Path, document bytes, or binary file object
+            name (str): File name, required when document is not a path
+            spool_threshold (int): Non-seekable streams are spooled in memory up
+                to this many bytes and spilled to a temporary file beyond it
+        """
+        self.path = None
+        self._file = None
+        self._owned = []
+        
+        if isinstance(document, (str, os.PathLike)):
+            self.path = os.fspath(document)
+            self.name = name or os.path.basename(self.path)
+            self.size = os.path.getsize(self.path)
+            return
+        
+        seekable = getattr(document, 'seekable', None)
+        if isinstance(document, (bytes, bytearray, memoryview)):
+            self._file = io.BytesIO(document)
+        elif seekable is not None and seekable():
+            self._file = document
+        else:
+            if seekable is None and hasattr(document, 'seek'):
+                # SpooledTemporaryFile before Python 3.11 can seek but has no
+                # seekable(), which zipfile needs; copy it from its start
+                document.seek(0)
+            self._file = SeekableSpooledFile(max_size=spool_threshold)
+            shutil.copyfileobj(document, self._file)
+            self._owned.append(self._file)
+        
+        if not name:
+            raise ValueError('A file name is required for documents not given as a path')
+        self.name = name
+        self.size = self._file.seek(0, os.SEEK_END)
+        self._file.seek(0)
+    
+    def open(self):
+        """Open the document for binary reading, positioned at its start"""
+        if self.path is not None:
+            return open(self.path, 'rb')
+        self._file.seek(0)
+        return contextlib.nullcontext(self._file)
+    
+    def local_path(self):
+        """Path of the document on disk, spilling it to a temporary file if needed"""
+        if self.path is None:
+            with self.open() as src, tempfile.NamedTemporaryFile(
+                    suffix=Path(self.name).suffix, delete=False) as dst:
+                shutil.copyfileobj(src, dst)
+            self.path = dst.name
+            self._owned.append(dst.name)
+        return self.path
+    
+    def close(self):
+        """Release spooled copies and temporary files made for this document"""
+        for owned in self._owned:
+            if isinstance(owned, str):
+                os.remove(owned)
+            else:
+                owned.close()
+        self._owned = []
+
+def _unique_name(name, folder, used_names):
+    """Make an archive member path unique within a batch"""
+    candidate = f"{folder}/{name}" if folder else name
+    stem, ext = os.path.splitext(candidate)
+    counter = 1
+    while candidate in used_names:
+        candidate = f"{stem}_{counter}{ext}"
+        counter += 1
+    used_names.add(candidate)
+    return candidate
 
 class DocumentConverter:
-    def __init__(self, font_detector, font_mapper):
+    def __init__(self, font_detector, font_mapper, chunk_size=256 * 1024,
+                 max_file_size=16 * 1024 * 1024, parallel_converter=None, result_cache=None,
+                 output_dir='app/downloads', output_storage=None):
         self.font_detector = font_detector
         self.font_mapper = font_mapper
         
-        # Supported file formats
+        # Where converted files are written: an OutputStorage that shards
+        # and expires them, or else a plain directory
+        self.output_dir = output_dir
+        self.output_storage = output_storage
+        
+        # Optional ResultCache; documents converted before with the same
+        # tables and options are served from it without reconversion
+        self.result_cache = result_cache
+        
+        # Optional ParallelConverter; large documents are spread across its
+        # process pool, small ones are always converted in-process
+        self.parallel_converter = parallel_converter
+        
+        # Characters read per step when streaming text, and the upload cap
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        
+        # Bytes fed to chardet at most when a file is not ASCII/UTF-8
+        self.encoding_sample_size = 1024 * 1024
+        
+        # Non-seekable upload streams are kept in memory up to this size
+        self.spool_threshold = 4 * 1024 * 1024
+        
+        # DOCX engine: 'stream' rewrites the XML parts in place and falls
+        # back to 'python-docx' for documents it cannot handle
+        self.docx_engine = 'stream'
+        
+        # Format handler registry: extension -> handler, or a
+        # 'module:function' path imported the first time the format is used
         self.supported_formats = {
             'txt': self._convert_txt,
             'docx': self._convert_docx,
             'doc': self._convert_doc,
             'pdf': self._convert_pdf
         }
+        self._handlers_lock = threading.Lock()
+    
+    def register_format(self, extension, handler):
+        """
+        Register a converter for a file extension
+        
+        Args:
+            extension (str): File extension without the dot, e.g. 'rtf'
+            handler (callable or str): Called as handler(source, source_font,
+                section_fonts, progress_callback, timer) and returning a
+                conversion result; or a 'module:function' path to a function
+                taking this converter as its first argument, imported on first use
+        """
+        self.supported_formats[extension.lower().lstrip('.')] = handler
     
-    def convert_document(self, file_path):
+    def _format_handler(self, extension):
+        """Get the handler for a format, importing it if it is registered by path"""
+        handler = self.supported_formats[extension]
+        if isinstance(handler, str):
+            with self._handlers_lock:
+                handler = self.supported_formats[extension]
+                if isinstance(handler, str):
+                    module_name, function_name = handler.split(':')
+                    function = getattr(importlib.import_module(module_name), function_name)
+                    handler = functools.partial(function, self)
+                    self.supported_formats[extension] = handler
+        return handler
+    
+    def convert_document(self, document, source_font='auto', section_fonts=None,
+                         progress_callback=None, filename=None):
         """
         Convert a document from non-Unicode to Unicode fonts
         
+        The source font is decided once for the whole document and passed
+        down to every segment conversion.
+        
         Args:
-            file_path (str): Path to the input document
+            document (str, bytes or file): Path to the input document, its
+                bytes, or a binary file object (e.g. an upload stream), which
+                is read directly without saving it first
+            source_font (str): Source font for the document ('dvtt_yogesh',
+                'dtt_dhruv', or 'auto' to detect it once from the document text)
+            section_fonts (dict): Optional per-section font overrides keyed by
+                section index (paragraph index for DOCX, page index for PDF)
+            progress_callback (callable): Optional progress_callback(done, total, unit),
+                called as pages, paragraphs or bytes are converted
+            filename (str): Original file name; required when document is not
+                a path, as its extension selects the format
             
         Returns:
-            dict: Conversion result with success status, output file, and statistics
+            dict: Conversion result with success status, output file, and
+                statistics, including per-stage timings and byte counts
         """
+        source = None
+        timer = _StageTimer()
         try:
+            with timer.stage('read'):
+                source = _DocumentSource(document, filename, self.spool_threshold)
+            
             # Detect file format
-            file_extension = Path(file_path).suffix.lower().lstrip('.')
+            file_extension = Path(source.name).suffix.lower().lstrip('.')
             
             if file_extension not in self.supported_formats:
                 return {
@@ -64,14 +349,43 @@ class DocumentConverter:
                 }
             
             # Get file info
-            file_info = self._get_file_info(file_path)
+            file_info = self._get_file_info(source)
+            
+            # Serve repeated uploads from the result cache
+            cache_key = None
+            if self.result_cache is not None:
+                with timer.stage('cache_lookup', source.size), source.open() as f:
+                    cache_key = self.result_cache.key(f, self.font_mapper.table_version, {
+                        'format': file_extension,
+                        'source_font': source_font,
+                        'section_fonts': {str(k): v for k, v in (section_fonts or {}).items()},
+                        'docx_engine': self.docx_engine
+                    })
+                    cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    try:
+                        with timer.stage('write'):
+                            result = self._restore_cached(source, cached, file_info)
+                    except FileNotFoundError:
+                        # Evicted by another process since the lookup; convert
+                        # as on a miss
+                        pass
+                    else:
+                        self._add_timings(result, source, timer)
+                        return result
             
             # Convert based on file type
-            converter_func = self.supported_formats[file_extension]
-            result = converter_func(file_path)
+            converter_func = self._format_handler(file_extension)
+            result = converter_func(source, source_font, section_fonts or {}, progress_callback, timer)
             
             # Add file info to result
             result['file_info'] = file_info
+            if result.get('success'):
+                if cache_key is not None:
+                    with timer.stage('cache_store'):
+                        self.result_cache.put(cache_key, result)
+                    result['cache_hit'] = False
+                self._add_timings(result, source, timer)
             
             return result
             
@@ -80,112 +394,564 @@ class DocumentConverter:
                 'success': False,
                 'error': f'Error converting document: {str(e)}'
             }
+        
+        finally:
+            if source is not None:
+                source.close()
+    
+    def convert_batch(self, batch, source_font='auto', progress_callback=None, filename='batch.zip'):
+        """
+        Convert every document of a batch into one ZIP archive
+        
+        Documents are read from the batch one at a time as they are
+        converted: across the process pool when there is one, otherwise one
+        after another. The archive holds each converted file in its
+        member's folder, plus a manifest.json with per-file stats and
+        errors; a failing document never aborts the batch.
+        
+        Args:
+            batch (DocumentBatch): Documents to convert
+            source_font (str): Source font for every document, or 'auto'
+            progress_callback (callable): Optional progress_callback(done, total, unit),
+                called as documents finish
+            filename (str): Name of the batch; the archive is named after it
+            
+        Returns:
+            dict: Result in the convert_document shape for the archive, whose
+                stats count the files, plus 'documents': a list of
+                (file name, conversion result) for every document converted
+        """
+        manifest = list(batch.rejected)
+        members = {}
+        documents = []
+        total = len(batch)
+        
+        def read_members():
+            for key, member in enumerate(batch.members()):
+                try:
+                    data = member.read()
+                except Exception as e:
+                    # Corrupt, encrypted or unsupported members fail on their own
+                    manifest.append({'name': member.name, 'success': False,
+                                     'error': f'Could not read file: {str(e)}'})
+                    continue
+                members[key] = member
+                # Random prefixes keep the output names of equal file names apart
+                yield key, data, f"{uuid.uuid4().hex}_{member.filename}"
+        
+        if self.parallel_converter is not None:
+            results = self.parallel_converter.convert_documents(read_members(), source_font)
+        else:
+            results = ((key, self.convert_document(data, source_font=source_font, filename=name))
+                       for key, data, name in read_members())
+        
+        output_filename = f"converted_{Path(filename).stem}.zip"
+        output_path = self._output_path(output_filename)
+        
+        try:
+            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+                used_names = set()
+                for key, result in results:
+                    member = members.pop(key)
+                    documents.append((member.filename, result))
+                    entry = {'name': member.name, 'success': result.get('success', False)}
+                    if result.get('success'):
+                        # Output names are converted_<prefix>_<name>
+                        converted_name = result['output_filename'].split('_', 2)[-1]
+                        arcname = _unique_name(f"converted_{converted_name}", member.folder, used_names)
+                        zout.write(result['output_path'], arcname)
+                        os.remove(result['output_path'])
+                        entry['output'] = arcname
+                        entry['stats'] = result['stats']
+                    else:
+                        entry['error'] = result.get('error')
+                    manifest.append(entry)
+                    if progress_callback:
+                        progress_callback(len(manifest), total, 'files')
+            
+                converted = sum(1 for entry in manifest if entry['success'])
+                zout.writestr('manifest.json', json.dumps({
+                    'total': len(manifest),
+                    'converted': converted,
+                    'files': manifest
+                }, ensure_ascii=False, indent=2))
+        
+        except BaseException:
+            # Do not leave a partial archive behind for download
+            os.remove(output_path)
+            raise
+        
+        return {
+            'success': True,
+            'output_filename': output_filename,
+            'output_path': output_path,
+            'preview': None,
+            'stats': {'total': len(manifest), 'converted': converted, 'failed': len(manifest) - converted},
+            'documents': documents
+        }
     
-    def _get_file_info(self, file_path):
+    def _add_timings(self, result, source, timer):
+        """Record stage timings and input/output sizes in the result stats"""
+        output_size = os.path.getsize(result['output_path'])
+        timer.add_bytes('write', output_size)
+        result['stats']['timings'] = timer.report()
+        result['stats']['bytes'] = {'input': source.size, 'output': output_size}
+    
+    def _restore_cached(self, source, cached, file_info):
+        """Publish a cached output under this upload's download name"""
+        output_extension = Path(cached['output_filename']).suffix
+        output_filename = f"converted_{Path(source.name).stem}{output_extension}"
+        output_path = self._output_path(output_filename)
+        link_or_copy(cached['output_path'], output_path)
+        # Restart the download's time-to-live from now
+        os.utime(output_path)
+        
+        cached['output_filename'] = output_filename
+        cached['output_path'] = output_path
+        cached['file_info'] = file_info
+        cached['cache_hit'] = True
+        return cached
+    
+    def _output_path(self, output_filename):
+        """
+        Resolve where a converted file should be written
+        
+        Any existing file of that name is unlinked first, so outputs are
+        always new files and never write through a hard link shared with
+        the result cache.
+        """
+        if self.output_storage is not None:
+            output_path = self.output_storage.path_for(output_filename)
+        else:
+            output_path = os.path.join(self.output_dir, output_filename)
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+        return output_path
+    
+    def _get_file_info(self, source):
         """Get basic file information"""
-        stat = os.stat(file_path)
         return {
-            'name': os.path.basename(file_path),
-            'size': stat.st_size,
-            'extension': Path(file_path).suffix.lower()
+            'name': source.name,
+            'size': source.size,
+            'extension': Path(source.name).suffix.lower()
         }
     
-    def _convert_txt(self, file_path):
-        """Convert plain text file"""
+    def _detect_document_fonts(self, sections, source_font):
+        """
+        Detect fonts once for the whole document and make the source font decision
+        
+        Args:
+            sections (str or list): Document text, or its pages/paragraphs
+            source_font (str): Requested source font, or 'auto'
+            
+        Returns:
+            tuple: (detection result, resolved source font)
+        """
+        detection = self.font_detector.detect_fonts_sampled(sections, max_matches=10)
+        if source_font == 'auto':
+            source_font = self.font_detector.select_source_font(detection)
+        return detection, source_font
+    
+    def _detect_encoding(self, source):
+        """
+        Detect the text encoding of a document without loading it into memory
+        
+        Pure ASCII and valid UTF-8 files (the common case) are recognized by
+        a streaming validation pass and never reach chardet. Anything else is
+        fed to chardet's incremental detector chunk by chunk, stopping as soon
+        as it is confident or after encoding_sample_size bytes.
+        
+        Args:
+            source (_DocumentSource): Text document
+            
+        Returns:
+            dict: Encoding name, detection method, confidence and time spent
+        """
+        started = time.perf_counter()
+        chunk_size = 64 * 1024
+        
+        # Fast path: validate as UTF-8 (ASCII is a subset) in one streaming pass
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        is_ascii = True
+        has_bom = False
         try:
-            # Detect encoding
-            with open(file_path, 'rb') as f:
-                raw_data = f.read()
-                encoding_result = chardet.detect(raw_data)
-                encoding = encoding_result.get('encoding', 'utf-8')
+            with source.open() as f:
+                first = True
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    if first:
+                        has_bom = chunk.startswith(codecs.BOM_UTF8)
+                        first = False
+                    if is_ascii and not chunk.isascii():
+                        is_ascii = False
+                    decoder.decode(chunk)
+                decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            pass
+        else:
+            if is_ascii:
+                encoding, method = 'ascii', 'ascii'
+            else:
+                encoding, method = ('utf-8-sig' if has_bom else 'utf-8'), 'utf-8'
+            return {
+                'encoding': encoding,
+                'method': method,
+                'confidence': 1.0,
+                'time': time.perf_counter() - started
+            }
+        
+        # Slow path: incremental chardet on leading chunks
+        detector = UniversalDetector()
+        with source.open() as f:
+            read = 0
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                detector.feed(chunk)
+                read += len(chunk)
+                if detector.done or read >= self.encoding_sample_size:
+                    break
+        detector.close()
+        
+        return {
+            'encoding': detector.result.get('encoding') or 'utf-8',
+            'method': 'chardet',
+            'confidence': detector.result.get('confidence', 0.0),
+            'time': time.perf_counter() - started
+        }
+    
+    def _use_parallel(self, size):
+        """Check whether a document of the given size goes to the process pool"""
+        return (self.parallel_converter is not None and
+                self.parallel_converter.should_parallelize(size))
+    
+    def _convert_sections(self, texts, source_fonts, stats=None):
+        """
+        Convert independent sections (paragraphs, cells, pages) in order
+        
+        Args:
+            texts (list): Section texts
+            source_fonts (list): Resolved source font for each section
+            stats (ConversionStats): If given, accumulates conversion statistics
             
-            # Read text content
-            with open(file_path, 'r', encoding=encoding) as f:
-                original_text = f.read()
+        Returns:
+            list: Converted section texts
+        """
+        if self._use_parallel(sum(len(text) for text in texts)):
+            return self.parallel_converter.convert_many(texts, source_fonts, stats=stats)
+        
+        return [
+            self.font_mapper.convert_with_preservation(text, source_font=source_font, stats=stats)
+            for text, source_font in zip(texts, source_fonts)
+        ]
+    
+    def _convert_text_stream(self, chunks, source_font, size, stats=None):
+        """
+        Convert a stream of text chunks, yielding (original, converted) pieces in order
+        
+        Args:
+            chunks (iterable): Input text chunks
+            source_font (str): Resolved source font
+            size (int): Input size, used to decide whether to go parallel
+            stats (ConversionStats): If given, accumulates conversion statistics
+        """
+        if not self._use_parallel(size):
+            yield from self.font_mapper.convert_chunks(chunks, source_font, stats=stats)
+            return
+        
+        # Line-aligned pieces are converted by the pool and reassembled in order
+        pieces = self.font_mapper.split_chunks(chunks, source_font)
+        for batch in self.parallel_converter.imap_batches(((piece, source_font) for piece in pieces),
+                                                          stats=stats):
+            yield from batch
+    
+    def _read_text_windows(self, source, encoding):
+        """Read the detector's stratified sample windows straight from a text document"""
+        file_size = source.size
+        # Devanagari is three bytes per character in UTF-8
+        window_bytes = self.font_detector.sample_window_size * 3
+        last_offset = max(file_size - window_bytes, 0)
+        
+        windows = []
+        with source.open() as f:
+            for offset in sorted(set(int(last_offset * fraction) for fraction in self.font_detector.sample_fractions())):
+                f.seek(offset)
+                windows.append(f.read(window_bytes).decode(encoding or 'utf-8', errors='ignore'))
+        return windows
+    
+    def _read_text_lines(self, source, encoding, errors='strict'):
+        """Yield all of a text document in chunks ending at a line break where possible"""
+        with source.open() as raw:
+            src = io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+            try:
+                rest = ''
+                for chunk in iter(lambda: src.read(self.chunk_size), ''):
+                    chunk = rest + chunk
+                    end = chunk.rfind('\n') + 1 or len(chunk)
+                    rest = chunk[end:]
+                    yield chunk[:end]
+                if rest:
+                    yield rest
+            finally:
+                # Leave closing the underlying file to its owner
+                src.detach()
+    
+    def _convert_txt(self, source, source_font='auto', section_fonts=None,
+                     progress_callback=None, timer=None):
+        """Convert plain text file, streaming it chunk by chunk"""
+        output_path = None
+        try:
+            # Detect encoding
+            with timer.stage('encoding_detection'):
+                encoding_result = self._detect_encoding(source)
+            encoding = encoding_result['encoding']
             
-            # Detect fonts
-            detection_result = self.font_detector.detect_fonts(original_text)
+            # chardet only saw the leading bytes, so its guess may not fit
+            # the rest of the file; undecodable bytes become U+FFFD instead
+            # of failing the conversion halfway through
+            errors = 'replace' if encoding_result['method'] == 'chardet' else 'strict'
             
-            # Convert text
-            converted_text = self.font_mapper.convert_with_preservation(original_text)
+            # Decide the source font from sample windows of the file, reading
+            # all of it only when the windows leave the decision open
+            if source_font == 'auto':
+                with timer.stage('font_detection'):
+                    sample_detection = self.font_detector.detect_fonts_sampled(
+                        self._read_text_windows(source, encoding),
+                        full_scan=lambda: self._read_text_lines(source, encoding, errors)
+                    )
+                    source_font = self.font_detector.select_source_font(sample_detection)
             
             # Generate output filename
-            output_filename = f"converted_{os.path.basename(file_path)}"
-            output_path = os.path.join('app/downloads', output_filename)
+            output_filename = f"converted_{source.name}"
+            output_path = self._output_path(output_filename)
             
-            # Save converted text
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(converted_text)
+            accumulator = _ConversionAccumulator()
+            
+            # Convert chunk by chunk, writing output as it is produced
+            with source.open() as raw, open(output_path, 'w', encoding='utf-8') as dst:
+                src = io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+                try:
+                    chunks = timer.iterate('extraction', iter(lambda: src.read(self.chunk_size), ''))
+                    timer.add_bytes('extraction', source.size)
+                    pieces = self._convert_text_stream(chunks, source_font, source.size,
+                                                       accumulator.conversion_stats)
+                    for original_piece, converted_piece in timer.iterate('conversion', pieces):
+                        with timer.stage('write'):
+                            dst.write(converted_piece)
+                        accumulator.add(original_piece, converted_piece)
+                        if progress_callback:
+                            progress_callback(raw.tell(), source.size, 'bytes')
+                finally:
+                    # Leave closing the underlying file to its owner
+                    src.detach()
             
             # Generate statistics
-            stats = self.font_mapper.get_conversion_stats(original_text, converted_text)
-            stats['detected_fonts'] = detection_result
+            with timer.stage('stats'):
+                stats = accumulator.stats(self.font_mapper)
+            stats['source_font'] = source_font
+            stats['encoding'] = encoding
+            stats['encoding_detection'] = encoding_result
             
             return {
                 'success': True,
                 'output_filename': output_filename,
                 'output_path': output_path,
-                'preview': {
-                    'original': original_text[:500] + '...' if len(original_text) > 500 else original_text,
-                    'converted': converted_text[:500] + '...' if len(converted_text) > 500 else converted_text
-                },
+                'preview': accumulator.preview(),
                 'stats': stats
             }
             
         except Exception as e:
+            # Do not leave a partial output behind for download
+            if output_path is not None and os.path.exists(output_path):
+                os.remove(output_path)
             return {
                 'success': False,
                 'error': f'Error converting TXT file: {str(e)}'
             }
     
-    def _convert_docx(self, file_path):
+    def _convert_docx(self, source, source_font='auto', section_fonts=None,
+                      progress_callback=None, timer=None):
         """Convert DOCX file while preserving formatting"""
-        if not Document:
+        if self.docx_engine == 'stream':
+            try:
+                return self._convert_docx_stream(source, source_font, section_fonts, progress_callback, timer)
+            except Exception as e:
+                # Documents the streaming rewriter cannot handle go through
+                # the python-docx object model instead
+                if _import_optional('docx') is None:
+                    return {
+                        'success': False,
+                        'error': f'Error converting DOCX file: {str(e)}'
+                    }
+        
+        return self._convert_docx_object_model(source, source_font, section_fonts, progress_callback, timer)
+    
+    def _convert_docx_stream(self, source, source_font='auto', section_fonts=None,
+                             progress_callback=None, timer=None):
+        """
+        Convert DOCX file by rewriting w:t text nodes while streaming its XML parts
+        
+        Run-level formatting is preserved, and headers, footers and notes are
+        converted too. Raises on documents the rewriter cannot parse.
+        
+        Parsing the XML and writing the output zip are one streaming pass,
+        timed together as the 'extraction' stage. For large documents a
+        second reader of the same zip feeds the w:t texts to the process
+        pool a few batches ahead of the rewrite, which then takes the
+        converted texts in order.
+        """
+        section_fonts = section_fonts or {}
+        detector = self.font_detector
+        rewriter = DocxRewriter()
+        
+        # Decide the source font once, from the body paragraphs like the
+        # python-docx engine: the leading ones first, then all of them when
+        # a longer document leaves the decision open
+        def body_paragraphs():
+            with source.open() as f:
+                yield from rewriter.body_paragraphs(f)
+        
+        if source_font == 'auto':
+            with timer.stage('font_detection'):
+                sample_chars = detector.sample_window_size * detector.sample_windows
+                with source.open() as f:
+                    sample = rewriter.sample_text(f, sample_chars)
+                # A sample shorter than requested is the whole body
+                full_scan = body_paragraphs if sum(len(text) for text in sample) >= sample_chars else None
+                source_font = detector.select_source_font(
+                    detector.detect_fonts_sampled(sample, full_scan=full_scan)
+                )
+        
+        # Generate output filename
+        output_filename = f"converted_{source.name}"
+        output_path = self._output_path(output_filename)
+        
+        accumulator = _ConversionAccumulator()
+        
+        def font_for(paragraph_index):
+            return source_font if paragraph_index is None else section_fonts.get(paragraph_index, source_font)
+        
+        def convert(text, paragraph_index):
+            if not text.strip():
+                accumulator.add_unchanged(text)
+                return text
+            with timer.stage('conversion'):
+                if pooled is not None:
+                    _, converted = next(pooled)
+                else:
+                    converted = self.font_mapper.convert_with_preservation(
+                        text, source_font=font_for(paragraph_index), stats=accumulator.conversion_stats
+                    )
+            accumulator.add(text, converted)
+            return converted
+        
+        def paragraph_end(paragraph_index):
+            accumulator.add_unchanged("\n")
+        
+        def report(bytes_done, bytes_total):
+            if progress_callback:
+                progress_callback(bytes_done, bytes_total, 'bytes')
+        
+        with contextlib.ExitStack() as stack:
+            pooled = None
+            if self._use_parallel(source.size):
+                reader = stack.enter_context(source.open())
+                items = ((text, font_for(paragraph_index))
+                         for text, paragraph_index in rewriter.iter_text(reader) if text.strip())
+                batches = self.parallel_converter.imap_batches(items, stats=accumulator.conversion_stats)
+                pooled = itertools.chain.from_iterable(batches)
+            
+            with timer.stage('extraction', source.size), source.open() as f:
+                rewriter.rewrite(f, output_path, convert, paragraph_end, progress=report)
+        
+        # Generate statistics
+        with timer.stage('stats'):
+            stats = accumulator.stats(self.font_mapper)
+        stats['source_font'] = source_font
+        stats['docx_engine'] = 'stream'
+        
+        return {
+            'success': True,
+            'output_filename': output_filename,
+            'output_path': output_path,
+            'preview': accumulator.preview(),
+            'stats': stats
+        }
+    
+    def _convert_docx_object_model(self, source, source_font='auto', section_fonts=None,
+                                   progress_callback=None, timer=None):
+        """Convert DOCX file through the python-docx object model"""
+        docx = _import_optional('docx')
+        if docx is None:
             return {
                 'success': False,
                 'error': 'python-docx library not available for DOCX processing'
             }
         
         try:
+            section_fonts = section_fonts or {}
+            
             # Load document
-            doc = Document(file_path)
+            with timer.stage('extraction', source.size):
+                with source.open() as f:
+                    doc = docx.Document(f)
+                paragraphs = doc.paragraphs
+                
+                paragraph_texts = [paragraph.text for paragraph in paragraphs]
+                original_text = "".join(text + "\n" for text in paragraph_texts)
             
-            original_text = ""
-            converted_text = ""
+            # Decide the source font once for the whole document
+            with timer.stage('font_detection'):
+                detection_result, source_font = self._detect_document_fonts(paragraph_texts, source_font)
             
-            # Process paragraphs
-            for paragraph in doc.paragraphs:
-                original_para_text = paragraph.text
-                original_text += original_para_text + "\n"
+            # Collect non-empty paragraphs and table cells, then convert them
+            # in one go (in batches across the process pool for large documents)
+            targets = []
+            texts = []
+            fonts = []
+            with timer.stage('extraction'):
+                for index, paragraph in enumerate(paragraphs):
+                    if paragraph_texts[index].strip():
+                        targets.append(paragraph)
+                        texts.append(paragraph_texts[index])
+                        fonts.append(section_fonts.get(index, source_font))
                 
-                if original_para_text.strip():
-                    # Convert text while preserving formatting
-                    converted_para_text = self.font_mapper.convert_with_preservation(original_para_text)
-                    converted_text += converted_para_text + "\n"
-                    
-                    # Update paragraph text
-                    paragraph.text = converted_para_text
-            
-            # Process tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        original_cell_text = cell.text
-                        if original_cell_text.strip():
-                            converted_cell_text = self.font_mapper.convert_with_preservation(original_cell_text)
-                            cell.text = converted_cell_text
+                paragraph_count = len(targets)
+                for table in doc.tables:
+                    for row in table.rows:
+                        for cell in row.cells:
+                            cell_text = cell.text
+                            if cell_text.strip():
+                                targets.append(cell)
+                                texts.append(cell_text)
+                                fonts.append(source_font)
             
-            # Generate output filename
-            output_filename = f"converted_{os.path.basename(file_path)}"
-            output_path = os.path.join('app/downloads', output_filename)
+            if progress_callback:
+                progress_callback(0, len(texts), 'paragraphs')
+            conversion_stats = ConversionStats()
+            with timer.stage('conversion'):
+                converted_texts = self._convert_sections(texts, fonts, conversion_stats)
+            if progress_callback:
+                progress_callback(len(texts), len(texts), 'paragraphs')
             
-            # Save converted document
-            doc.save(output_path)
+            with timer.stage('write'):
+                # Update paragraph and cell text
+                for target, converted in zip(targets, converted_texts):
+                    target.text = converted
+                converted_text = "".join(text + "\n" for text in converted_texts[:paragraph_count])
+                
+                # Generate output filename
+                output_filename = f"converted_{source.name}"
+                output_path = self._output_path(output_filename)
+                
+                # Save converted document
+                doc.save(output_path)
             
-            # Detect fonts and generate statistics
-            detection_result = self.font_detector.detect_fonts(original_text)
-            stats = self.font_mapper.get_conversion_stats(original_text, converted_text)
+            # Generate statistics; they cover table cells too, and the
+            # paragraph breaks and blank paragraphs that were not converted
+            with timer.stage('stats'):
+                for text in paragraph_texts:
+                    conversion_stats.add_unchanged(text + "\n" if not text.strip() else "\n")
+                stats = conversion_stats.report(self.font_mapper)
             stats['detected_fonts'] = detection_result
+            stats['source_font'] = source_font
             
             return {
                 'success': True,
@@ -204,7 +970,8 @@ class DocumentConverter:
                 'error': f'Error converting DOCX file: {str(e)}'
             }
     
-    def _convert_doc(self, file_path):
+    def _convert_doc(self, source, source_font='auto', section_fonts=None,
+                     progress_callback=None, timer=None):
         """Convert DOC file (legacy Word format)"""
         # For DOC files, we'll need to use a different approach
         # This is a simplified implementation
@@ -213,49 +980,80 @@ class DocumentConverter:
             'error': 'DOC file conversion not fully implemented. Please convert to DOCX format first.'
         }
     
-    def _convert_pdf(self, file_path):
-        """Convert PDF file"""
-        if not PyPDF2:
+    def _convert_pdf(self, source, source_font='auto', section_fonts=None,
+                     progress_callback=None, timer=None):
+        """Convert PDF file page by page, writing each page as soon as it is ready"""
+        PyPDF2 = _import_optional('PyPDF2')
+        if PyPDF2 is None:
             return {
                 'success': False,
                 'error': 'PyPDF2 library not available for PDF processing'
             }
         
         try:
-            # Read PDF content
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                
-                original_text = ""
-                for page in pdf_reader.pages:
-                    original_text += page.extract_text() + "\n"
-            
-            # Convert text
-            converted_text = self.font_mapper.convert_with_preservation(original_text)
+            section_fonts = section_fonts or {}
             
-            # Generate output filename (as text file since PDF editing is complex)
-            base_name = Path(file_path).stem
-            output_filename = f"converted_{base_name}.txt"
-            output_path = os.path.join('app/downloads', output_filename)
-            
-            # Save converted text
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(converted_text)
+            with source.open() as f:
+                with timer.stage('extraction', source.size):
+                    pdf_reader = PyPDF2.PdfReader(f)
+                    page_count = len(pdf_reader.pages)
+                
+                # Decide the source font once, from a stratified sample of
+                # pages, extracting every page only when the sample leaves
+                # the decision open
+                if source_font == 'auto':
+                    with timer.stage('font_detection'):
+                        sample_indexes = sorted(set(
+                            int((page_count - 1) * fraction) for fraction in self.font_detector.sample_fractions()
+                        )) if page_count else []
+                        sample_pages = [pdf_reader.pages[index].extract_text() for index in sample_indexes]
+                        full_scan = None
+                        if len(sample_indexes) < page_count:
+                            full_scan = lambda: (page.extract_text() for page in pdf_reader.pages)
+                        source_font = self.font_detector.select_source_font(
+                            self.font_detector.detect_fonts_sampled(sample_pages, full_scan=full_scan)
+                        )
+                
+                page_fonts = [section_fonts.get(index, source_font) for index in range(page_count)]
+                
+                # Generate output filename (as text file since PDF editing is complex)
+                base_name = Path(source.name).stem
+                output_filename = f"converted_{base_name}.txt"
+                output_path = self._output_path(output_filename)
+                
+                accumulator = _ConversionAccumulator()
+                
+                # Large PDFs are extracted and converted by the process pool
+                # (workers open the file themselves, so in-memory uploads are
+                # spilled to disk; their time counts as conversion); otherwise
+                # a producer thread extracts while this thread converts
+                if self._use_parallel(source.size):
+                    pages = timer.iterate('conversion', self.parallel_converter.imap_pdf_pages(
+                        source.local_path(), page_fonts, stats=accumulator.conversion_stats
+                    ))
+                else:
+                    pages = self._pipeline_pdf_pages(pdf_reader, page_fonts, timer, accumulator.conversion_stats)
+                
+                with open(output_path, 'w', encoding='utf-8') as out:
+                    for index, (original_page, converted_page) in enumerate(pages, 1):
+                        with timer.stage('write'):
+                            out.write(converted_page)
+                        accumulator.add(original_page, converted_page)
+                        if progress_callback:
+                            progress_callback(index, page_count, 'pages')
             
             # Generate statistics
-            detection_result = self.font_detector.detect_fonts(original_text)
-            stats = self.font_mapper.get_conversion_stats(original_text, converted_text)
-            stats['detected_fonts'] = detection_result
+            with timer.stage('stats'):
+                stats = accumulator.stats(self.font_mapper)
+            stats['source_font'] = source_font
+            stats['pages'] = page_count
             stats['note'] = 'PDF converted to text format due to formatting complexity'
             
             return {
                 'success': True,
                 'output_filename': output_filename,
                 'output_path': output_path,
-                'preview': {
-                    'original': original_text[:500] + '...' if len(original_text) > 500 else original_text,
-                    'converted': converted_text[:500] + '...' if len(converted_text) > 500 else converted_text
-                },
+                'preview': accumulator.preview(),
                 'stats': stats
             }
             
@@ -265,6 +1063,73 @@ class DocumentConverter:
                 'error': f'Error converting PDF file: {str(e)}'
             }
     
+    def _pipeline_pdf_pages(self, pdf_reader, page_fonts, timer, stats=None, queue_size=8):
+        """
+        Extract PDF pages on a producer thread and convert them on this one
+        
+        Args:
+            pdf_reader (PyPDF2.PdfReader): Open PDF reader
+            page_fonts (list): Resolved source font for each page
+            timer (_StageTimer): Charged with time spent waiting for
+                extraction and converting
+            stats (ConversionStats): If given, accumulates conversion statistics
+            queue_size (int): Extracted pages buffered ahead of conversion
+            
+        Yields:
+            tuple: (original page text, converted page text)
+        """
+        pages = queue.Queue(maxsize=queue_size)
+        done = object()
+        # Set when the consumer stops early (an error, or the generator is
+        # closed), so the producer does not extract pages nobody reads
+        stop = threading.Event()
+        
+        def put(item):
+            """Queue an item, giving up once the consumer has stopped"""
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for page in pdf_reader.pages:
+                    if stop.is_set() or not put(page.extract_text() + "\n"):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        try:
+            for source_font in page_fonts:
+                with timer.stage('extraction'):
+                    page_text = pages.get()
+                if page_text is done:
+                    break
+                if isinstance(page_text, Exception):
+                    raise page_text
+                with timer.stage('conversion'):
+                    converted_page = self.font_mapper.convert_with_preservation(
+                        page_text, source_font=source_font, stats=stats
+                    )
+                yield page_text, converted_page
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue, then wait for it
+            while True:
+                try:
+                    pages.get_nowait()
+                except queue.Empty:
+                    break
+            producer.join()
+    
     def get_supported_formats(self):
         """Get list of supported file formats"""
         return list(self.supported_formats.keys())
@@ -278,9 +1143,9 @@ class DocumentConverter:
         if file_extension not in self.supported_formats:
             return False, f"Unsupported file format: {file_extension}"
         
-        # Check file size (max 16MB)
+        # Check file size
         file_size = os.path.getsize(file_path)
-        if file_size > 16 * 1024 * 1024:
-            return False, "File too large (max 16MB)"
+        if file_size > self.max_file_size:
+            return False, f"File too large (max {self.max_file_size // (1024 * 1024)}MB)"
         
         return True, "File is valid"
\ No newline at end of file
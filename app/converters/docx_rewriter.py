@@ -0,0 +1,272 @@
+"""
+Streaming DOCX rewriter that converts w:t text nodes in place
+
+Text-bearing parts (document body, headers, footers, footnotes, endnotes)
+are streamed out of the source zip through an incremental expat parser.
+Only the character data between <w:t> and </w:t> is replaced; every other
+byte of the part (markup, run properties, namespaces) is copied verbatim
+using the parser's byte offsets, so run-level formatting survives. All
+other zip members are copied through unchanged.
+"""
+import itertools
+import re
+import shutil
+import zipfile
+from operator import itemgetter
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+
+# WordprocessingML main namespaces (transitional and strict)
+WORD_NAMESPACES = (
+    'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+    'http://purl.oclc.org/ooxml/wordprocessingml/main',
+)
+
+# Zip members that carry document text
+TEXT_PART_PATTERN = re.compile(
+    r'^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$'
+)
+
+
+def _local_name(name):
+    """Split an expat 'namespace localname' pair into (is_word, localname)"""
+    namespace, _, local = name.rpartition(' ')
+    return namespace in WORD_NAMESPACES, local
+
+
+class _PartRewriter:
+    """Rewrite the w:t text of one XML part while copying all other bytes verbatim"""
+
+    def __init__(self, convert, out, track_body=False, paragraph_end=None):
+        """
+        Args:
+            convert (callable): convert(text, body_paragraph_index) -> str
+            out (file): Binary output stream for the rewritten part
+            track_body (bool): Number direct w:body paragraphs (document part only)
+            paragraph_end (callable): Optional paragraph_end(body_paragraph_index),
+                called when a w:p element closes
+        """
+        self.convert = convert
+        self.out = out
+        self.track_body = track_body
+        self.paragraph_end = paragraph_end
+
+        self.parser = expat.ParserCreate(namespace_separator=' ')
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.parser.CharacterDataHandler = self._data
+
+        # Input bytes not yet written out start at absolute offset self.base
+        self.pending = bytearray()
+        self.base = 0
+        # Start of the most recent tag; everything before it has been parsed
+        self.last_event = 0
+
+        self.stack = []
+        self.body_paragraph = -1
+        self.paragraph_index = None
+
+        self.in_text = False
+        self.text_start = None
+        self.text_parts = []
+
+    def feed(self, data, final=False):
+        """Parse a chunk of the part and write out everything that is settled"""
+        self.pending += data
+        self.parser.Parse(data, final)
+
+        safe = len(self.pending) + self.base if final else self.last_event
+        if self.in_text and self.text_start is not None:
+            safe = min(safe, self.text_start)
+        self._flush(safe)
+
+    def _flush(self, offset):
+        """Copy input bytes up to an absolute offset to the output"""
+        count = offset - self.base
+        if count > 0:
+            self.out.write(self.pending[:count])
+            del self.pending[:count]
+            self.base = offset
+
+    def _start(self, name, attributes):
+        self.last_event = self.parser.CurrentByteIndex
+        is_word, local = _local_name(name)
+
+        if is_word and local == 'p':
+            parent = self.stack[-1] if self.stack else None
+            if self.track_body and parent == 'body':
+                self.body_paragraph += 1
+                self.paragraph_index = self.body_paragraph
+            elif not self.in_paragraph():
+                self.paragraph_index = None
+
+        if is_word and local == 't':
+            tag_start = self.parser.CurrentByteIndex - self.base
+            tag_end = self.pending.index(b'>', tag_start)
+            # <w:t/> has no content to convert
+            if self.pending[tag_end - 1:tag_end] != b'/':
+                self.in_text = True
+                self.text_start = self.base + tag_end + 1
+                self.text_parts = []
+
+        self.stack.append(local if is_word else None)
+
+    def in_paragraph(self):
+        """Check whether the parser is inside a w:p element"""
+        return 'p' in self.stack
+
+    def _data(self, data):
+        if self.in_text:
+            self.text_parts.append(data)
+
+    def _end(self, name):
+        self.last_event = self.parser.CurrentByteIndex
+        self.stack.pop()
+        is_word, local = _local_name(name)
+
+        if is_word and local == 't' and self.in_text:
+            text = ''.join(self.text_parts)
+            converted = self.convert(text, self.paragraph_index)
+
+            # Copy up to the original content, write the converted content
+            # instead, and skip the original bytes
+            self._flush(self.text_start)
+            self.out.write(escape(converted).encode('utf-8'))
+            content_end = self.parser.CurrentByteIndex
+            del self.pending[:content_end - self.base]
+            self.base = content_end
+
+            self.in_text = False
+            self.text_start = None
+            self.text_parts = []
+
+        elif is_word and local == 'p' and self.paragraph_end is not None:
+            self.paragraph_end(self.paragraph_index)
+
+
+class DocxRewriter:
+    def __init__(self, chunk_size=64 * 1024):
+        """
+        Args:
+            chunk_size (int): Bytes read from the zip per parser feed
+        """
+        self.chunk_size = chunk_size
+
+    def sample_text(self, source, max_chars):
+        """
+        Read the leading body paragraphs of the document, for font detection
+
+        Args:
+            source (str or file): DOCX path or binary file object
+            max_chars (int): Stop after this many characters
+
+        Returns:
+            list: Paragraph texts, as body_paragraphs() yields them
+        """
+        paragraphs = []
+        total = 0
+        texts = self.body_paragraphs(source)
+        try:
+            for text in texts:
+                paragraphs.append(text)
+                total += len(text)
+                if total >= max_chars:
+                    break
+        finally:
+            texts.close()
+        return paragraphs
+
+    def body_paragraphs(self, source):
+        """
+        Read the text of every direct w:body paragraph that has any, the
+        paragraphs python-docx lists as Document.paragraphs
+
+        Args:
+            source (str or file): DOCX path or binary file object
+
+        Yields:
+            str: Paragraph text
+        """
+        body_texts = ((text, paragraph_index) for text, paragraph_index in self.iter_text(source)
+                      if paragraph_index is not None)
+        for _, texts in itertools.groupby(body_texts, key=itemgetter(1)):
+            yield ''.join(text for text, _ in texts)
+
+    def iter_text(self, source):
+        """
+        Read the text of every w:t node, in the order rewrite() converts them
+
+        Args:
+            source (str or file): DOCX path or binary file object
+
+        Yields:
+            tuple: (text, body_paragraph_index), as passed to rewrite's convert
+        """
+        found = []
+
+        def collect(text, paragraph_index):
+            found.append((text, paragraph_index))
+            return text
+
+        with zipfile.ZipFile(source) as zin:
+            for info in zin.infolist():
+                if not TEXT_PART_PATTERN.match(info.filename):
+                    continue
+                rewriter = _PartRewriter(collect, _NullWriter(), track_body=info.filename == 'word/document.xml')
+                with zin.open(info) as src:
+                    for chunk in iter(lambda: src.read(self.chunk_size), b''):
+                        rewriter.feed(chunk)
+                        yield from found
+                        found.clear()
+                    rewriter.feed(b'', final=True)
+                yield from found
+                found.clear()
+
+    def rewrite(self, source, output_path, convert, paragraph_end=None, progress=None):
+        """
+        Rewrite a DOCX file, converting every w:t text node
+
+        Args:
+            source (str or file): DOCX path or binary file object
+            output_path (str): Where to write the converted DOCX
+            convert (callable): convert(text, body_paragraph_index) -> str.
+                The index is None for paragraphs outside the document body
+                (tables, headers, footers, notes).
+            paragraph_end (callable): Optional paragraph_end(body_paragraph_index),
+                called whenever a paragraph closes
+            progress (callable): Optional progress(bytes_done, bytes_total) over
+                the uncompressed size of the text parts
+        """
+        with zipfile.ZipFile(source) as zin, \
+                zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            text_parts = [info for info in zin.infolist() if TEXT_PART_PATTERN.match(info.filename)]
+            bytes_total = sum(info.file_size for info in text_parts)
+            bytes_done = 0
+
+            for info in zin.infolist():
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.compress_type = info.compress_type
+                out_info.external_attr = info.external_attr
+
+                with zin.open(info) as src, zout.open(out_info, 'w') as dst:
+                    if TEXT_PART_PATTERN.match(info.filename):
+                        rewriter = _PartRewriter(
+                            convert, dst, track_body=info.filename == 'word/document.xml',
+                            paragraph_end=paragraph_end
+                        )
+                        for chunk in iter(lambda: src.read(self.chunk_size), b''):
+                            rewriter.feed(chunk)
+                            bytes_done += len(chunk)
+                            if progress:
+                                progress(bytes_done, bytes_total)
+                        rewriter.feed(b'', final=True)
+                    else:
+                        shutil.copyfileobj(src, dst, self.chunk_size)
+
+
+class _NullWriter:
+    """Output sink that discards everything"""
+
+    def write(self, data):
+        return len(data)
@@ -3,106 +3,68 @@ Font detection module for identifying non-Unicode Marathi fonts
 """
 import re
 import unicodedata
+from collections import Counter
+from itertools import islice, repeat, tee
+
+from .font_tables import load_tables
+
+# Classifications reported after the legacy fonts of the font tables
+NATIVE_CLASSES = ('unicode_marathi', 'english')
+
+# Characters at the start of a text that sample matches are taken from
+MATCH_SAMPLE_WINDOW = 65536
 
 class FontDetector:
-    def __init__(self):
-        # Character patterns for DVTT Yogesh font
-        self.dvtt_yogesh_patterns = {
-            # Common DVTT Yogesh character mappings
-            'क': ['d', 'D'],
-            'ख': ['[', 'k'],
-            'ग': ['x', 'g'],
-            'घ': ['?', 'G'],
-            'च': ['p', 'c'],
-            'छ': ['P', 'C'],
-            'ज': ['h', 'j'],
-            'झ': ['H', 'J'],
-            'ट': ['V', 'T'],
-            'ठ': ['B', 'Th'],
-            'ड': ['M', 'D'],
-            'ढ': ['<', 'Dh'],
-            'त': ['l', 't'],
-            'थ': ['L', 'th'],
-            'द': ['n', 'da'],
-            'ध': ['N', 'dh'],
-            'न': ['u', 'n'],
-            'प': ['i', 'p'],
-            'फ': ['I', 'f'],
-            'ब': ['c', 'b'],
-            'भ': ['C', 'bh'],
-            'म': ['e', 'm'],
-            'य': ['j', 'y'],
-            'र': ['j', 'r'],
-            'ल': ['v', 'l'],
-            'व': ['o', 'v'],
-            'श': [';', 'sh'],
-            'ष': ['\"', 'Sh'],
-            'स': ['l', 's'],
-            'ह': ['g', 'h'],
-            'अ': ['v', 'a'],
-            'आ': ['vk', 'aa'],
-            'इ': ['b', 'i'],
-            'ई': ['bZ', 'ii'],
-            'उ': ['w', 'u'],
-            'ऊ': ['wZ', 'uu'],
-            'ए': ['s', 'e'],
-            'ऐ': ['sZ', 'ai'],
-            'ओ': ['ks', 'o'],
-            'औ': ['kS', 'au']
-        }
+    def __init__(self, sample_threshold=1.0, sample_window_size=4096, sample_windows=8):
+        """
+        Args:
+            sample_threshold (float): Confidence at which sampled detection stops early
+            sample_window_size (int): Characters read per sampled window
+            sample_windows (int): Maximum number of windows read before falling
+                back to a full scan
+        """
+        self.sample_threshold = sample_threshold
+        self.sample_window_size = sample_window_size
+        self.sample_windows = sample_windows
         
-        # Character patterns for DTT Dhruv font
-        self.dtt_dhruv_patterns = {
-            'क': ['d', 'क़'],
-            'ख': ['[', 'ख़'], 
-            'ग': ['x', 'ग़'],
-            'घ': ['?', 'घ़'],
-            'च': ['p', 'च़'],
-            'छ': ['P', 'छ़'],
-            'ज': ['h', 'ज़'],
-            'झ': ['H', 'झ़'],
-            'ट': ['V', 'ट़'],
-            'ठ': ['B', 'ठ़'],
-            'ड': ['M', 'ड़'],
-            'ढ': ['<', 'ढ़'],
-            'त': ['l', 'त़'],
-            'थ': ['L', 'थ़'],
-            'द': ['n', 'द़'],
-            'ध': ['N', 'ध़'],
-            'न': ['u', 'ऩ'],
-            'प': ['i', 'प़'],
-            'फ': ['I', 'फ़'],
-            'ब': ['c', 'ब़'],
-            'भ': ['C', 'भ़'],
-            'म': ['e', 'म़'],
-            'य': ['j', 'य़'],
-            'र': ['j', 'ऱ'],
-            'ल': ['v', 'ल़'],
-            'व': ['o', 'व़'],
-            'श': [';', 'श़'],
-            'ष': ['\"', 'ष़'],
-            'स': ['l', 'स़'],
-            'ह': ['g', 'ह़']
-        }
+        # Legacy fonts in detection priority order, then native scripts
+        tables = load_tables()
+        self.legacy_fonts = tuple(font['name'] for font in tables['fonts'])
+        self.font_classes = self.legacy_fonts + NATIVE_CLASSES
+        self._detection_chars = {font['name']: font['detection_chars'] for font in tables['fonts']}
         
         # Compile regex patterns for efficient detection
         self._compile_patterns()
     
     def _compile_patterns(self):
         """Compile regex patterns for font detection"""
-        # DVTT Yogesh detection patterns
-        dvtt_chars = []
-        for unicode_char, non_unicode_list in self.dvtt_yogesh_patterns.items():
-            dvtt_chars.extend(non_unicode_list)
-        
-        # DTT Dhruv detection patterns  
-        dtt_chars = []
-        for unicode_char, non_unicode_list in self.dtt_dhruv_patterns.items():
-            dtt_chars.extend(non_unicode_list)
-        
-        # Create regex patterns
-        self.dvtt_pattern = re.compile(r'[' + re.escape(''.join(dvtt_chars)) + r']+')
-        self.dtt_pattern = re.compile(r'[' + re.escape(''.join(dtt_chars)) + r']+')
+        self.unicode_pattern = re.compile(r'[\u0900-\u097F]+')
+        self.english_pattern = re.compile(r'[a-zA-Z]+')
+        
+        self.class_patterns = {
+            font: re.compile(r'[' + re.escape(chars) + r']+')
+            for font, chars in self._detection_chars.items()
+        }
+        self.class_patterns['unicode_marathi'] = self.unicode_pattern
+        self.class_patterns['english'] = self.english_pattern
+        
+        # Per-character bitmask of the classes a character belongs to, used
+        # by the single-scan counting mode (bit i <-> font_classes[i])
+        class_chars = {
+            **self._detection_chars,
+            'unicode_marathi': ''.join(chr(c) for c in range(0x0900, 0x0980)),
+            'english': 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        }
+        self._char_masks = {}
+        for bit, font_type in enumerate(self.font_classes):
+            for char in class_chars[font_type]:
+                self._char_masks[char] = self._char_masks.get(char, 0) | (1 << bit)
+        
+        # Bits of each mask, precomputed so the scan does no bit twiddling
+        self._mask_bits = [
+            tuple(bit for bit in range(len(self.font_classes)) if mask & (1 << bit))
+            for mask in range(1 << len(self.font_classes))
+        ]
     
     def detect_fonts(self, text):
         """
@@ -115,61 +77,234 @@ class FontDetector:
             dict: Detection results with font types and confidence scores
         """
         results = {
-            'dvtt_yogesh': {
-                'detected': False,
-                'confidence': 0.0,
-                'matches': []
-            },
-            'dtt_dhruv': {
-                'detected': False,
-                'confidence': 0.0,
-                'matches': []
-            },
-            'unicode_marathi': {
-                'detected': False,
-                'confidence': 0.0,
-                'matches': []
-            },
-            'english': {
-                'detected': False,
-                'confidence': 0.0,
-                'matches': []
-            }
+            font_type: {'detected': False, 'confidence': 0.0, 'matches': []}
+            for font_type in self.font_classes
         }
         
         if not text:
             return results
         
-        # Check for DVTT Yogesh patterns
-        dvtt_matches = self.dvtt_pattern.findall(text)
-        if dvtt_matches:
-            results['dvtt_yogesh']['detected'] = True
-            results['dvtt_yogesh']['matches'] = dvtt_matches
-            results['dvtt_yogesh']['confidence'] = min(len(dvtt_matches) / 10.0, 1.0)
-        
-        # Check for DTT Dhruv patterns
-        dtt_matches = self.dtt_pattern.findall(text)
-        if dtt_matches:
-            results['dtt_dhruv']['detected'] = True
-            results['dtt_dhruv']['matches'] = dtt_matches
-            results['dtt_dhruv']['confidence'] = min(len(dtt_matches) / 10.0, 1.0)
-        
-        # Check for Unicode Marathi (Devanagari script)
-        unicode_marathi = re.findall(r'[\u0900-\u097F]+', text)
-        if unicode_marathi:
-            results['unicode_marathi']['detected'] = True
-            results['unicode_marathi']['matches'] = unicode_marathi
-            results['unicode_marathi']['confidence'] = min(len(unicode_marathi) / 10.0, 1.0)
-        
-        # Check for English text
-        english_text = re.findall(r'[a-zA-Z]+', text)
-        if english_text:
-            results['english']['detected'] = True
-            results['english']['matches'] = english_text
-            results['english']['confidence'] = min(len(english_text) / 10.0, 1.0)
+        # Legacy font patterns, Unicode Marathi (Devanagari script) and English
+        for font_type in self.font_classes:
+            matches = self.class_patterns[font_type].findall(text)
+            if matches:
+                results[font_type]['detected'] = True
+                results[font_type]['matches'] = matches
+                results[font_type]['confidence'] = min(len(matches) / 10.0, 1.0)
+        
+        return results
+    
+    def detect_font_counts(self, text, max_matches=0):
+        """
+        Detect fonts in a single scan, returning counts instead of match lists
+        
+        Produces the same 'detected' and 'confidence' values as detect_fonts,
+        but memory does not grow with the input: the text is walked once and
+        only the number of matches per classification is kept.
+        
+        Args:
+            text (str): Input text to analyze
+            max_matches (int): If positive, include up to this many sample
+                matches per classification, taken from the first
+                MATCH_SAMPLE_WINDOW characters so sampling never rescans
+                the whole text
+            
+        Returns:
+            dict: Detection results with counts and confidence scores
+        """
+        counts = [0] * len(self.font_classes)
+        
+        if text:
+            # Count (previous mask, mask) transitions in one C-level pass; a
+            # match of a class starts wherever the class bit switches on
+            masks = map(self._char_masks.get, text, repeat(0))
+            previous, current = tee(masks)
+            first = next(current)
+            transitions = Counter(zip(previous, current))
+            transitions[(0, first)] += 1
+            
+            for (previous_mask, mask), occurrences in transitions.items():
+                for bit in self._mask_bits[mask & ~previous_mask]:
+                    counts[bit] += occurrences
+        
+        results = {}
+        sample_end = min(len(text), MATCH_SAMPLE_WINDOW) if text else 0
+        for font_type, count in zip(self.font_classes, counts):
+            results[font_type] = {
+                'detected': count > 0,
+                'confidence': min(count / 10.0, 1.0),
+                'count': count
+            }
+            if max_matches > 0:
+                matches = []
+                if count:
+                    pattern = self.class_patterns[font_type]
+                    matches = islice(pattern.finditer(text, 0, sample_end), max_matches)
+                results[font_type]['matches'] = [match.group() for match in matches]
+        
+        return results
+    
+    def detect_char_counts(self, char_counts):
+        """
+        Detect fonts from character counts collected elsewhere, without scanning text
+        
+        'detected' matches detect_font_counts on the text the characters
+        came from; 'count' is the number of characters of each
+        classification rather than the number of matches.
+        
+        Args:
+            char_counts (dict): Character -> occurrences
+            
+        Returns:
+            dict: Detection results in the detect_font_counts format
+        """
+        counts = [0] * len(self.font_classes)
+        for char, occurrences in char_counts.items():
+            if occurrences > 0:
+                for bit in self._mask_bits[self._char_masks.get(char, 0)]:
+                    counts[bit] += occurrences
+        
+        return {
+            font_type: {'detected': count > 0, 'confidence': min(count / 10.0, 1.0), 'count': count}
+            for font_type, count in zip(self.font_classes, counts)
+        }
+    
+    def detect_fonts_sampled(self, source, max_matches=0, full_scan=None):
+        """
+        Detect fonts from stratified sample windows, stopping early when confident
+        
+        Windows are read from the start, end and middle of the input (then the
+        quarters, and so on). Detection stops early only when the legacy font
+        decision of select_source_font is settled: the selected font reaches
+        the sample threshold and no font that outranks it can still turn up
+        in the unread text. Otherwise the whole input is scanned, so sampling
+        never picks a different source font than a full scan would. Unicode
+        Marathi and English never end sampling early.
         
+        Args:
+            source (str or list): Text, or a list of sections (pages, paragraphs)
+            max_matches (int): If positive, include up to this many sample
+                matches per classification
+            full_scan (callable): For input read in pieces (a file, pages
+                extracted one by one): source then holds the sample windows,
+                already read by the caller, and full_scan() returns an
+                iterable over all of the input's text for the full scan
+            
+        Returns:
+            dict: Detection results in the detect_font_counts format, with a
+                'sampled' flag telling whether the result came from sampling
+        """
+        sections = [source] if isinstance(source, str) else source
+        
+        if full_scan is not None:
+            windows = sections
+        elif sum(len(section) for section in sections) > self.sample_window_size * self.sample_windows:
+            windows = self._sample_windows(sections)
+        else:
+            windows = ()
+        
+        results = self.empty_font_counts(max_matches)
+        for window in windows:
+            self.merge_font_counts(results, self.detect_font_counts(window, max_matches), max_matches)
+            if self._sampled_decision_settled(results):
+                for info in results.values():
+                    info['sampled'] = True
+                return results
+        
+        # Small or ambiguous input: scan everything
+        results = self._scan_sections(sections if full_scan is None else full_scan(), max_matches)
+        for info in results.values():
+            info['sampled'] = False
         return results
     
+    def _scan_sections(self, sections, max_matches=0):
+        """
+        Detect fonts over every section, joining short sections with a newline
+        (which belongs to no class) to keep per-call overhead low
+        """
+        results = self.empty_font_counts(max_matches)
+        batch = []
+        batch_length = 0
+        for section in sections:
+            batch.append(section)
+            batch_length += len(section)
+            if batch_length >= 65536:
+                self.merge_font_counts(results, self.detect_font_counts('\n'.join(batch), max_matches), max_matches)
+                batch = []
+                batch_length = 0
+        if batch:
+            self.merge_font_counts(results, self.detect_font_counts('\n'.join(batch), max_matches), max_matches)
+        return results
+    
+    def _sampled_decision_settled(self, results):
+        """
+        Whether unread text can no longer change the source font picked from results
+
+        select_source_font picks the highest-priority legacy font detected,
+        so a lower-priority font is only final once the text is fully
+        scanned; the highest-priority font is final once it is detected,
+        and must reach the sample threshold to rule out stray characters.
+        """
+        source_font = self.select_source_font(results)
+        return (source_font == self.legacy_fonts[0]
+                and results[source_font]['confidence'] >= self.sample_threshold)
+    
+    def _sample_windows(self, sections):
+        """Yield up to sample_windows windows in stratified order"""
+        size = self.sample_window_size
+        fractions = self.sample_fractions()
+        
+        seen = set()
+        if len(sections) == 1:
+            text = sections[0]
+            last_start = max(len(text) - size, 0)
+            for fraction in fractions:
+                start = int(last_start * fraction)
+                if start not in seen:
+                    seen.add(start)
+                    yield text[start:start + size]
+        else:
+            last_index = len(sections) - 1
+            for fraction in fractions:
+                index = int(last_index * fraction)
+                if index not in seen:
+                    seen.add(index)
+                    yield sections[index][:size]
+    
+    def sample_fractions(self):
+        """Relative positions of the sample windows, in start, end, middle, quarters... order"""
+        fractions = [0.0, 1.0]
+        denominator = 2
+        while len(fractions) < self.sample_windows:
+            fractions.extend(n / denominator for n in range(1, denominator, 2))
+            denominator *= 2
+        return fractions[:self.sample_windows]
+    
+    def empty_font_counts(self, max_matches=0):
+        """Zeroed result in the detect_font_counts format"""
+        results = {}
+        for font_type in self.font_classes:
+            results[font_type] = {'detected': False, 'confidence': 0.0, 'count': 0}
+            if max_matches > 0:
+                results[font_type]['matches'] = []
+        return results
+    
+    def merge_font_counts(self, results, partial, max_matches=0):
+        """
+        Add a partial detect_font_counts result into an accumulated one
+        
+        Counts add up exactly when the parts were split at characters that
+        belong to no classification (whitespace, for example).
+        """
+        for font_type, info in partial.items():
+            total = results[font_type]
+            total['count'] += info['count']
+            total['detected'] = total['count'] > 0
+            total['confidence'] = min(total['count'] / 10.0, 1.0)
+            if max_matches > 0:
+                room = max_matches - len(total['matches'])
+                total['matches'].extend(info['matches'][:room])
+    
     def is_non_unicode_marathi(self, text):
         """
         Check if text contains non-Unicode Marathi fonts
@@ -180,9 +315,38 @@ class FontDetector:
         Returns:
             bool: True if non-Unicode Marathi fonts are detected
         """
-        detection = self.detect_fonts(text)
-        return (detection['dvtt_yogesh']['detected'] or 
-                detection['dtt_dhruv']['detected'])
+        detection = self.detect_font_counts(text)
+        return any(detection[font]['detected'] for font in self.legacy_fonts)
+    
+    def detect_source_font(self, text):
+        """
+        Decide which legacy font mapping should be used for the text
+        
+        Args:
+            text (str or list): Input text, or a list of sections, to analyze
+            
+        Returns:
+            str: Name of the highest-priority legacy font detected, e.g.
+                'dvtt_yogesh', or None if no legacy font is present
+        """
+        return self.select_source_font(self.detect_fonts_sampled(text))
+    
+    def select_source_font(self, detection):
+        """
+        Pick the legacy font mapping from an existing detection result
+        
+        Args:
+            detection (dict): Result of detect_fonts, detect_font_counts or
+                detect_fonts_sampled
+            
+        Returns:
+            str: Name of the highest-priority legacy font detected, e.g.
+                'dvtt_yogesh', or None if no legacy font is present
+        """
+        for font in self.legacy_fonts:
+            if detection[font]['detected']:
+                return font
+        return None
     
     def get_dominant_font(self, text):
         """
@@ -194,7 +358,7 @@ class FontDetector:
         Returns:
             str: Name of the dominant font type
         """
-        detection = self.detect_fonts(text)
+        detection = self.detect_fonts_sampled(text)
         
         # Find font with highest confidence
         max_confidence = 0
@@ -2,170 +2,199 @@
 Font mapping module for converting non-Unicode Marathi fonts to Unicode
 """
 import re
+import threading
+from collections import Counter
+from functools import lru_cache
 
-class FontMapper:
+from .font_tables import load_tables
+from .transliterator import Transliterator
+
+# Runs preserved by convert_with_preservation(preserve_english=True)
+ENGLISH_RUNS = re.compile(r'([a-zA-Z\s]+)')
+ENGLISH_CHARS = re.compile(r'[a-zA-Z\s]')
+
+# ASCII digits converted by convert_with_preservation(preserve_numbers=False)
+DEVANAGARI_DIGITS = {str(digit): chr(0x0966 + digit) for digit in range(10)}
+
+class ConversionStats:
+    """
+    Statistics accumulated by the conversion engines while text is converted
+    
+    Each conversion adds the Counter its engine filled (characters and
+    multi-character keys, see Transliterator.convert) under the engine's
+    (source font, preserve_english, preserve_numbers) key; text left
+    unchanged is counted under None, and memo hits and misses are counted
+    per call. Stats collected in other threads or
+    worker processes are combined with merge(), and report() derives the
+    statistics from the counts without scanning any text again.
+    """
+    
     def __init__(self):
-        # DVTT Yogesh to Unicode mapping
-        self.dvtt_yogesh_to_unicode = {
-            # Consonants
-            'd': 'क',
-            'D': 'क',
-            '[': 'ख',
-            'k': 'ख',
-            'x': 'ग',
-            'g': 'ग',
-            '?': 'घ',
-            'G': 'घ',
-            'p': 'च',
-            'c': 'च',
-            'P': 'छ',
-            'C': 'छ',
-            'h': 'ज',
-            'j': 'ज',
-            'H': 'झ',
-            'J': 'झ',
-            'V': 'ट',
-            'T': 'ट',
-            'B': 'ठ',
-            '<': 'ढ',
-            'l': 'त',
-            't': 'त',
-            'L': 'थ',
-            'n': 'द',
-            'N': 'ध',
-            'u': 'न',
-            'i': 'प',
-            'I': 'फ',
-            'f': 'फ',
-            'c': 'ब',
-            'C': 'भ',
-            'e': 'म',
-            'm': 'म',
-            'j': 'य',
-            'y': 'य',
-            'r': 'र',
-            'v': 'ल',
-            'o': 'व',
-            ';': 'श',
-            '"': 'ष',
-            's': 'स',
-            'g': 'ह',
-            
-            # Vowels
-            'v': 'अ',
-            'vk': 'आ',
-            'b': 'इ',
-            'bZ': 'ई',
-            'w': 'उ',
-            'wZ': 'ऊ',
-            's': 'ए',
-            'sZ': 'ऐ',
-            'ks': 'ओ',
-            'kS': 'औ',
-            
-            # Vowel signs (matras)
-            'k': 'ा',
-            'h': 'ि',
-            'Z': 'ी',
-            'q': 'ु',
-            'Q': 'ू',
-            's': 'े',
-            'sZ': 'ै',
-            'ks': 'ो',
-            'kS': 'ौ',
+        self.original_length = 0
+        self.converted_length = 0
+        self.counts = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+    
+    def add(self, original, converted, counts, memo_hit=None):
+        """
+        Account for one converted piece
+        
+        Args:
+            original (str): Original text
+            converted (str): Converted text
+            counts (dict): Engine key -> Counter filled while converting; not modified
+            memo_hit (bool): Whether the piece was served from the conversion
+                memo, or None if it was not looked up there
+        """
+        self.original_length += len(original)
+        self.converted_length += len(converted)
+        self._add_counts(counts)
+        if memo_hit is not None:
+            if memo_hit:
+                self.memo_hits += 1
+            else:
+                self.memo_misses += 1
+    
+    def add_unchanged(self, text):
+        """Account for text that was passed through without conversion"""
+        self.original_length += len(text)
+        self.converted_length += len(text)
+        self.counts.setdefault(None, Counter()).update(text)
+    
+    def merge(self, other):
+        """Add the statistics of another ConversionStats"""
+        self.original_length += other.original_length
+        self.converted_length += other.converted_length
+        self._add_counts(other.counts)
+        self.memo_hits += other.memo_hits
+        self.memo_misses += other.memo_misses
+    
+    def _add_counts(self, counts):
+        for key, counter in counts.items():
+            total = self.counts.get(key)
+            if total is None:
+                # Copied, as memoized conversions share their counters
+                self.counts[key] = Counter(counter)
+            else:
+                total.update(counter)
+    
+    def report(self, font_mapper):
+        """
+        Build the conversion statistics
+        
+        Args:
+            font_mapper (FontMapper): Mapper whose engines did the counting
             
-            # Special characters
-            '`': '्',  # Halant (virama)
-            'a': 'ं',  # Anusvara
-            'W': 'ः',  # Visarga
-            '।': '।',  # Devanagari danda
-            '॥': '॥', # Double danda
-        }
+        Returns:
+            dict: build_conversion_stats fields, plus 'fonts_used' (fonts that
+                converted at least one character), 'mapped_characters' (legacy
+                sequence -> occurrences), 'unmapped_characters' (characters
+                left unconverted that no table maps, e.g. missing glyphs) and
+                'detected_fonts' (detection derived from the characters, with
+                character counts instead of match counts) and 'memo' (memo
+                hits and misses of the conversions counted here)
+        """
+        original_chars = Counter()
+        converted_chars = Counter()
+        mapped = Counter()
+        unmapped = Counter()
+        fonts_used = []
         
-        # DTT Dhruv to Unicode mapping
-        self.dtt_dhruv_to_unicode = {
-            # Consonants
-            'd': 'क',
-            '[': 'ख',
-            'x': 'ग',
-            '?': 'घ',
-            'p': 'च',
-            'P': 'छ',
-            'h': 'ज',
-            'H': 'झ',
-            'V': 'ट',
-            'B': 'ठ',
-            'M': 'ड',
-            '<': 'ढ',
-            'l': 'त',
-            'L': 'थ',
-            'n': 'द',
-            'N': 'ध',
-            'u': 'न',
-            'i': 'प',
-            'I': 'फ',
-            'c': 'ब',
-            'C': 'भ',
-            'e': 'म',
-            'j': 'य',
-            'r': 'र',
-            'v': 'ल',
-            'o': 'व',
-            ';': 'श',
-            '"': 'ष',
-            's': 'स',
-            'g': 'ह',
+        for key, counts in self.counts.items():
+            engine = font_mapper.preserving_engine(*key) if key is not None else None
+            mapping = engine.mapping if engine is not None else {}
+            known = font_mapper.mappings.get(key[0], {}) if key is not None else {}
+            
+            chars = Counter()
+            for sequence, occurrences in counts.items():
+                if len(sequence) == 1:
+                    chars[sequence] += occurrences
+            original_chars.update(chars)
             
-            # Vowels  
-            'v': 'अ',
-            'vk': 'आ',
-            'b': 'इ',
-            'bZ': 'ई',
-            'w': 'उ',
-            'wZ': 'ऊ',
-            's': 'ए',
-            'sZ': 'ऐ',
-            'ks': 'ओ',
-            'kS': 'औ',
+            # Characters of matched multi-character keys were counted on
+            # their own as well
+            key_mapped = 0
+            for sequence, occurrences in counts.items():
+                if len(sequence) > 1:
+                    mapped[sequence] += occurrences
+                    key_mapped += occurrences
+                    for char in sequence:
+                        chars[char] -= occurrences
+                    for char in mapping[sequence]:
+                        converted_chars[char] += occurrences
             
-            # Vowel signs
-            'k': 'ा',
-            'h': 'ि',
-            'Z': 'ी', 
-            'q': 'ु',
-            'Q': 'ू',
-            's': 'े',
-            'sZ': 'ै',
-            'ks': 'ो',
-            'kS': 'ौ',
+            for char, occurrences in chars.items():
+                if occurrences <= 0:
+                    continue
+                if char in mapping:
+                    mapped[char] += occurrences
+                    key_mapped += occurrences
+                    for converted_char in mapping[char]:
+                        converted_chars[converted_char] += occurrences
+                    continue
+                converted_chars[char] += occurrences
+                if (key is not None and char not in known and not char.isspace()
+                        and not '\u0900' <= char <= '\u097f' and not (char.isascii() and char.isalnum())):
+                    unmapped[char] += occurrences
             
-            # Special characters
-            '`': '्',
-            'a': 'ं',
-            'W': 'ः',
-            '।': '।',
-            '॥': '॥',
+            if key_mapped and key[0] not in fonts_used:
+                fonts_used.append(key[0])
+        
+        detector = font_mapper.font_detector
+        original_detection = detector.detect_char_counts(original_chars)
+        stats = font_mapper.build_conversion_stats(
+            self.original_length, self.converted_length,
+            original_detection, detector.detect_char_counts(converted_chars)
+        )
+        stats['fonts_used'] = fonts_used
+        stats['mapped_characters'] = dict(mapped.most_common())
+        stats['unmapped_characters'] = dict(unmapped.most_common())
+        stats['detected_fonts'] = original_detection
+        stats['memo'] = {'hits': self.memo_hits, 'misses': self.memo_misses}
+        return stats
+
+class FontMapper:
+    def __init__(self, memo_size=4096, memo_max_length=1024):
+        """
+        Args:
+            memo_size (int): Number of convert_with_preservation results kept
+                in the LRU memo (0 disables it)
+            memo_max_length (int): Longest text that is memoized; longer texts
+                rarely repeat and would only evict useful entries
+        """
+        # Mapping tables and engines for every legacy font, from the compiled
+        # data files in fonts/ (see font_tables)
+        tables = load_tables()
+        self.font_names = tuple(font['name'] for font in tables['fonts'])
+        self.display_names = {font['name']: font['display_name'] for font in tables['fonts']}
+        self.mappings = {font['name']: font['mapping'] for font in tables['fonts']}
+        self.engines = {
+            font['name']: Transliterator(font['mapping'], multi_pattern=font['multi_pattern'])
+            for font in tables['fonts']
         }
         
-        # Create reverse mappings for detection
-        self.unicode_to_dvtt_yogesh = {v: k for k, v in self.dvtt_yogesh_to_unicode.items()}
-        self.unicode_to_dtt_dhruv = {v: k for k, v in self.dtt_dhruv_to_unicode.items()}
+        # Names kept for callers written against the two original fonts
+        self.dvtt_yogesh_to_unicode = self.mappings.get('dvtt_yogesh', {})
+        self.dtt_dhruv_to_unicode = self.mappings.get('dtt_dhruv', {})
+        self.dvtt_engine = self.engines.get('dvtt_yogesh')
+        self.dtt_engine = self.engines.get('dtt_dhruv')
         
-        # Compile patterns for efficient replacement
-        self._compile_replacement_patterns()
-    
-    def _compile_replacement_patterns(self):
-        """Compile regex patterns for efficient text replacement"""
-        # Sort by length (longest first) to handle multi-character mappings properly
-        dvtt_keys = sorted(self.dvtt_yogesh_to_unicode.keys(), key=len, reverse=True)
-        dtt_keys = sorted(self.dtt_dhruv_to_unicode.keys(), key=len, reverse=True)
-        
-        # Escape special regex characters
-        dvtt_pattern = '|'.join(re.escape(key) for key in dvtt_keys)
-        dtt_pattern = '|'.join(re.escape(key) for key in dtt_keys)
-        
-        self.dvtt_pattern = re.compile(dvtt_pattern)
-        self.dtt_pattern = re.compile(dtt_pattern)
+        # Checksum of the font data files, so cached conversions made with
+        # other tables are never reused
+        self.table_version = tables['checksum'][:16]
+        
+        # Engines per (font, preserve_english, preserve_numbers), built on first use
+        self._preserving_engines = {}
+        
+        # Detector used for source_font='auto', created on first use
+        self._font_detector = None
+        
+        # Bounded memo for repeated paragraphs, labels and table cells; a
+        # miss is flagged per thread so each call knows whether it hit
+        self.memo_max_length = memo_max_length
+        self._memo = lru_cache(maxsize=memo_size)(self._convert_memo_miss) if memo_size else None
+        self._memo_state = threading.local()
     
     def convert_dvtt_yogesh_to_unicode(self, text):
         """
@@ -177,11 +206,7 @@ class FontMapper:
         Returns:
             str: Converted Unicode Marathi text
         """
-        def replace_match(match):
-            matched_text = match.group(0)
-            return self.dvtt_yogesh_to_unicode.get(matched_text, matched_text)
-        
-        return self.dvtt_pattern.sub(replace_match, text)
+        return self.dvtt_engine.convert(text)
     
     def convert_dtt_dhruv_to_unicode(self, text):
         """
@@ -193,11 +218,34 @@ class FontMapper:
         Returns:
             str: Converted Unicode Marathi text
         """
-        def replace_match(match):
-            matched_text = match.group(0)
-            return self.dtt_dhruv_to_unicode.get(matched_text, matched_text)
+        return self.dtt_engine.convert(text)
+    
+    @property
+    def font_detector(self):
+        """Shared FontDetector instance used for automatic font detection"""
+        if self._font_detector is None:
+            from .font_detector import FontDetector
+            self._font_detector = FontDetector()
+        return self._font_detector
+    
+    def resolve_source_font(self, text, source_font='auto'):
+        """
+        Resolve 'auto' to a concrete source font for the given text
         
-        return self.dtt_pattern.sub(replace_match, text)
+        Callers converting many segments of one document should resolve the
+        font once for the whole document and pass the result down, so that
+        segments are never re-detected.
+        
+        Args:
+            text (str): Text to detect the font from
+            source_font (str): Requested source font ('dvtt_yogesh', 'dtt_dhruv', 'auto')
+            
+        Returns:
+            str: 'dvtt_yogesh', 'dtt_dhruv', or None if nothing should be converted
+        """
+        if source_font != 'auto':
+            return source_font
+        return self.font_detector.detect_source_font(text)
     
     def convert_text(self, text, source_font='auto'):
         """
@@ -205,7 +253,8 @@ class FontMapper:
         
         Args:
             text (str): Input text to convert
-            source_font (str): Source font type ('dvtt_yogesh', 'dtt_dhruv', 'auto')
+            source_font (str): Source font type ('dvtt_yogesh', 'dtt_dhruv', 'auto'),
+                or None to leave the text unchanged
             
         Returns:
             str: Converted Unicode text
@@ -215,80 +264,229 @@ class FontMapper:
         
         # Auto-detect source font if not specified
         if source_font == 'auto':
-            from .font_detector import FontDetector
-            detector = FontDetector()
-            detection = detector.detect_fonts(text)
-            
-            if detection['dvtt_yogesh']['detected']:
-                source_font = 'dvtt_yogesh'
-            elif detection['dtt_dhruv']['detected']:
-                source_font = 'dtt_dhruv'
-            else:
-                # Return original text if no non-Unicode fonts detected
-                return text
+            source_font = self.resolve_source_font(text)
         
         # Convert based on detected/specified font
-        if source_font == 'dvtt_yogesh':
-            return self.convert_dvtt_yogesh_to_unicode(text)
-        elif source_font == 'dtt_dhruv':
-            return self.convert_dtt_dhruv_to_unicode(text)
-        else:
+        engine = self.engines.get(source_font)
+        if engine is None:
             return text
+        return engine.convert(text)
     
-    def convert_with_preservation(self, text, preserve_english=True, preserve_numbers=True):
+    def convert_with_preservation(self, text, preserve_english=True, preserve_numbers=True,
+                                  source_font='auto', stats=None):
         """
         Convert text while preserving English and numbers
         
+        Legacy-font text is converted; English words, whitespace and
+        already-Unicode Devanagari are kept; ASCII digits are kept, or
+        become Devanagari digits when preserve_numbers is False. The text is
+        converted in a single pass (see preserving_engine).
+        
         Args:
             text (str): Input text to convert
             preserve_english (bool): Whether to preserve English text
-            preserve_numbers (bool): Whether to preserve numbers
+            preserve_numbers (bool): Whether to keep ASCII digits; if False they
+                are converted to Devanagari digits
+            source_font (str): Source font for every segment; 'auto' detects
+                per segment, so document converters should pass a resolved font
+            stats (ConversionStats): If given, the counts made by the engine
+                while converting are added to it
             
         Returns:
             str: Converted text with preserved elements
         """
+        memo_hit = None
+        if self._memo is not None and len(text) <= self.memo_max_length:
+            self._memo_state.missed = False
+            converted, counts = self._memo(text, preserve_english, preserve_numbers, source_font)
+            memo_hit = not self._memo_state.missed
+        elif stats is None:
+            return self._convert_with_preservation(text, preserve_english, preserve_numbers, source_font)
+        else:
+            converted, counts = self._convert_counted(text, preserve_english, preserve_numbers, source_font)
+        
+        if stats is not None:
+            stats.add(text, converted, counts, memo_hit)
+        return converted
+    
+    def _convert_memo_miss(self, text, preserve_english, preserve_numbers, source_font):
+        """Convert text the memo has no entry for, flagging the miss for this thread"""
+        self._memo_state.missed = True
+        return self._convert_counted(text, preserve_english, preserve_numbers, source_font)
+    
+    def _convert_counted(self, text, preserve_english, preserve_numbers, source_font):
+        """Convert text, also returning the engine counts (memoized by convert_with_preservation)"""
+        counts = {}
+        converted = self._convert_with_preservation(text, preserve_english, preserve_numbers, source_font, counts)
+        return converted, counts
+    
+    def _convert_with_preservation(self, text, preserve_english, preserve_numbers, source_font, counts=None):
+        """Implementation of convert_with_preservation, filling counts if given"""
         if not text:
             return text
         
-        # Split text into segments
-        segments = []
-        current_pos = 0
-        
-        # Find English text segments if preservation is enabled
-        if preserve_english:
-            english_pattern = re.compile(r'[a-zA-Z\s]+')
-            for match in english_pattern.finditer(text):
-                # Add non-English text before this English segment
-                if match.start() > current_pos:
-                    marathi_segment = text[current_pos:match.start()]
-                    segments.append(('marathi', marathi_segment))
-                
-                # Add English segment
-                segments.append(('english', match.group()))
-                current_pos = match.end()
-        
-        # Add remaining text
-        if current_pos < len(text):
-            segments.append(('marathi', text[current_pos:]))
-        
-        # If no English text found, treat entire text as Marathi
-        if not segments:
-            segments = [('marathi', text)]
-        
-        # Convert each segment appropriately
-        converted_segments = []
-        for segment_type, segment_text in segments:
-            if segment_type == 'marathi':
-                converted_segments.append(self.convert_text(segment_text))
+        if source_font == 'auto':
+            if not preserve_english:
+                source_font = self.resolve_source_font(text)
             else:
-                converted_segments.append(segment_text)
+                # Each run between English words is detected on its own
+                parts = ENGLISH_RUNS.split(text)
+                for index in range(0, len(parts), 2):
+                    if parts[index]:
+                        parts[index] = self._convert_run(
+                            parts[index], self.resolve_source_font(parts[index]),
+                            preserve_english, preserve_numbers, counts
+                        )
+                    if counts is not None and index + 1 < len(parts):
+                        counts.setdefault(None, Counter()).update(parts[index + 1])
+                return ''.join(parts)
         
-        return ''.join(converted_segments)
+        return self._convert_run(text, source_font, preserve_english, preserve_numbers, counts)
+    
+    def _convert_run(self, text, source_font, preserve_english, preserve_numbers, counts):
+        """Convert text with one preserving engine, counting into counts if given"""
+        engine = self.preserving_engine(source_font, preserve_english, preserve_numbers)
+        if counts is None:
+            return text if engine is None else engine.convert(text)
+        
+        if engine is None:
+            counts.setdefault(None, Counter()).update(text)
+            return text
+        return engine.convert(text, counts.setdefault((source_font, preserve_english, preserve_numbers), Counter()))
+    
+    def preserving_engine(self, source_font, preserve_english=True, preserve_numbers=True):
+        """
+        Get an engine that converts text in one pass while honoring the preservation flags
+        
+        The text classes are folded into the engine's tables instead of being
+        tokenized per call: with preserve_english, keys containing English
+        letters or whitespace are dropped, so English words and whitespace
+        pass through unchanged; without preserve_numbers, ASCII digits map to
+        Devanagari digits; already-Unicode Devanagari text matches no key and
+        passes through. Because no remaining key can span an English run,
+        converting the whole text equals converting each run between English
+        words separately.
+        
+        Args:
+            source_font (str): Resolved source font, e.g. 'dvtt_yogesh'
+            preserve_english (bool): Whether to preserve English text
+            preserve_numbers (bool): Whether to preserve numbers
+            
+        Returns:
+            Transliterator: Engine for the font and flags, or None for unknown fonts
+        """
+        key = (source_font, preserve_english, preserve_numbers)
+        engine = self._preserving_engines.get(key)
+        if engine is None:
+            mapping = self.mappings.get(source_font)
+            if mapping is None:
+                return None
+            if preserve_english:
+                mapping = {k: v for k, v in mapping.items() if not ENGLISH_CHARS.search(k)}
+            if not preserve_numbers:
+                mapping = {**DEVANAGARI_DIGITS, **mapping}
+            engine = self._preserving_engines[key] = Transliterator(mapping)
+        return engine
+    
+    def convert_chunks(self, chunks, source_font, preserve_english=True, preserve_numbers=True,
+                       stats=None):
+        """
+        Convert a stream of text chunks, yielding converted pieces in order
+        
+        Chunks can be split anywhere, including inside multi-character keys
+        such as 'vk' or 'kS' (see split_chunks), so the joined output equals
+        converting the joined input in one call.
+        
+        Args:
+            chunks (iterable): Input text chunks
+            source_font (str): Resolved source font ('dvtt_yogesh', 'dtt_dhruv')
+                or None to pass text through unchanged
+            preserve_english (bool): Whether to preserve English text
+            preserve_numbers (bool): Whether to preserve numbers
+            stats (ConversionStats): If given, accumulates statistics of every piece
+            
+        Yields:
+            tuple: (original piece, converted piece)
+        """
+        for piece in self.split_chunks(chunks, source_font):
+            yield piece, self.convert_with_preservation(
+                piece, preserve_english, preserve_numbers, source_font=source_font, stats=stats
+            )
+    
+    def split_chunks(self, chunks, source_font):
+        """
+        Re-split a stream of text chunks at positions that are safe to convert independently
+        
+        Text near each chunk boundary is carried over until it can be split
+        without changing the conversion result. Pieces can therefore be
+        converted separately, in any process, and simply concatenated.
+        
+        Args:
+            chunks (iterable): Input text chunks
+            source_font (str): Resolved source font, or None
+            
+        Yields:
+            str: Pieces whose concatenation equals the input
+        """
+        engine = self.get_engine(source_font)
+        carry = ''
+        
+        for chunk in chunks:
+            buffer = carry + chunk
+            
+            # Prefer splitting after whitespace so that words (and detection
+            # matches) stay whole, then back off past any key prefix
+            split = max(buffer.rfind('\n'), buffer.rfind(' ')) + 1
+            if split == 0:
+                split = len(buffer)
+            if engine:
+                split = engine.safe_split_index(buffer[:split])
+            
+            piece, carry = buffer[:split], buffer[split:]
+            if piece:
+                yield piece
+        
+        if carry:
+            yield carry
+    
+    def memo_info(self):
+        """
+        Get hit/miss counters of the conversion memo
+        
+        Returns:
+            dict: Hits, misses, current size and capacity of the memo
+        """
+        if self._memo is None:
+            return {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 0}
+        
+        info = self._memo.cache_info()
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize
+        }
+    
+    def get_engine(self, source_font):
+        """
+        Get the transliteration engine for a source font
+        
+        Args:
+            source_font (str): Font name, e.g. 'dvtt_yogesh'
+            
+        Returns:
+            Transliterator: Engine for the font, or None for unknown fonts
+        """
+        return self.engines.get(source_font)
     
     def get_conversion_stats(self, original_text, converted_text):
         """
         Generate statistics about the conversion
         
+        Scans both texts with the font detector. Conversions that pass a
+        ConversionStats get the same fields from the engine's own counts
+        instead (see ConversionStats.report).
+        
         Args:
             original_text (str): Original text
             converted_text (str): Converted text
@@ -296,15 +494,35 @@ class FontMapper:
         Returns:
             dict: Conversion statistics
         """
-        from .font_detector import FontDetector
-        detector = FontDetector()
+        detector = self.font_detector
+        
+        original_detection = detector.detect_font_counts(original_text)
+        converted_detection = detector.detect_font_counts(converted_text)
+        
+        return self.build_conversion_stats(
+            len(original_text), len(converted_text), original_detection, converted_detection
+        )
+    
+    def build_conversion_stats(self, original_length, converted_length,
+                               original_detection, converted_detection):
+        """
+        Build conversion statistics from lengths and detection results
         
-        original_detection = detector.detect_fonts(original_text)
-        converted_detection = detector.detect_fonts(converted_text)
+        Used directly by streaming conversions, which accumulate detection
+        counts chunk by chunk instead of holding the whole text.
         
+        Args:
+            original_length (int): Length of the original text
+            converted_length (int): Length of the converted text
+            original_detection (dict): Font detection result for the original text
+            converted_detection (dict): Font detection result for the converted text
+            
+        Returns:
+            dict: Conversion statistics
+        """
         stats = {
-            'original_length': len(original_text),
-            'converted_length': len(converted_text),
+            'original_length': original_length,
+            'converted_length': converted_length,
             'original_fonts': [],
             'converted_fonts': [],
             'conversion_ratio': 0.0
@@ -0,0 +1,170 @@
+"""
+Versioned font tables compiled from data files
+
+Every legacy font is described by one JSON file in ``fonts/``:
+
+    {
+      "name": "dvtt_yogesh",          identifier used as source_font
+      "display_name": "DVTT Yogesh",
+      "version": 1,                   bumped whenever the table changes
+      "detection_priority": 0,        lower wins when several fonts are detected
+      "mapping": {"d": "क", ...},     legacy sequence -> Unicode
+      "detection": {"क": ["d", "D"], ...}
+                                      characters that indicate the font
+    }
+
+Adding a font is a data change: drop a new file into ``fonts/``.
+
+The files are compiled into a single artifact holding each font's
+mapping, the factored regex for its multi-character keys and its
+detection characters, plus a checksum of the sources. The checksum is
+the table version used in cache keys. Loading reads the artifact once
+per process; the artifact is rebuilt (and rewritten when the directory
+is writable) whenever a data file was added, removed or modified.
+
+    python -m app.converters.font_tables    # compile ahead of time
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from .transliterator import Transliterator
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'font_tables.compiled.json')
+
+# Bump when the compiled layout changes, so older artifacts are rebuilt
+ARTIFACT_FORMAT = 1
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def _source_files(fonts_dir):
+    return sorted(name for name in os.listdir(fonts_dir) if name.endswith('.json'))
+
+
+def _source_stamps(fonts_dir):
+    """Size and modification time of every data file, to detect edits"""
+    stamps = {}
+    for name in _source_files(fonts_dir):
+        stat = os.stat(os.path.join(fonts_dir, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def compile_tables(fonts_dir=FONTS_DIR):
+    """
+    Compile the font data files
+
+    Args:
+        fonts_dir (str): Directory holding one JSON file per font
+
+    Returns:
+        dict: Compiled tables, ready to be serialized with json
+
+    Raises:
+        ValueError: If a data file is invalid or two files share a font name
+    """
+    stamps = _source_stamps(fonts_dir)
+    digest = hashlib.sha256()
+    fonts = []
+    for filename in stamps:
+        with open(os.path.join(fonts_dir, filename), 'rb') as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw.decode('utf-8'))
+        except ValueError as e:
+            raise ValueError(f'Invalid font data file {filename}: {e}') from e
+        for field in ('name', 'version', 'mapping'):
+            if field not in data:
+                raise ValueError(f'Font data file {filename} has no "{field}"')
+        if any(font['name'] == data['name'] for font in fonts):
+            raise ValueError(f"Font {data['name']} is defined more than once")
+
+        digest.update(filename.encode('utf-8') + b'\0' + raw + b'\0')
+        fonts.append({
+            'name': data['name'],
+            'display_name': data.get('display_name', data['name']),
+            'version': data['version'],
+            'detection_priority': data.get('detection_priority', 0),
+            'mapping': data['mapping'],
+            'multi_pattern': Transliterator.compile_pattern(data['mapping']),
+            'detection_chars': ''.join(
+                sequence for sequences in data.get('detection', {}).values() for sequence in sequences
+            )
+        })
+
+    fonts.sort(key=lambda font: (font['detection_priority'], font['name']))
+    return {
+        'format': ARTIFACT_FORMAT,
+        'checksum': digest.hexdigest(),
+        'sources': stamps,
+        'fonts': fonts
+    }
+
+
+def write_artifact(tables, artifact_path=ARTIFACT_PATH):
+    """Atomically write compiled tables"""
+    tmp_path = f'{artifact_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tables, f, ensure_ascii=False)
+        os.replace(tmp_path, artifact_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_artifact(artifact_path, fonts_dir):
+    """Read compiled tables, or None if missing, unreadable or stale"""
+    try:
+        with open(artifact_path, 'r', encoding='utf-8') as f:
+            tables = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if tables.get('format') != ARTIFACT_FORMAT or tables.get('sources') != _source_stamps(fonts_dir):
+        return None
+    return tables
+
+
+def load_tables(fonts_dir=FONTS_DIR, artifact_path=ARTIFACT_PATH):
+    """
+    Get the compiled font tables, loading them once per process
+
+    Args:
+        fonts_dir (str): Directory holding the font data files
+        artifact_path (str): Compiled artifact to read, or rebuild
+
+    Returns:
+        dict: Compiled tables (see compile_tables); shared, do not modify
+    """
+    key = (fonts_dir, artifact_path)
+    if key not in _loaded:
+        with _load_lock:
+            if key not in _loaded:
+                tables = _read_artifact(artifact_path, fonts_dir)
+                if tables is None:
+                    tables = compile_tables(fonts_dir)
+                    try:
+                        write_artifact(tables, artifact_path)
+                    except OSError:
+                        # Read-only deployments compile in memory on every start
+                        pass
+                _loaded[key] = tables
+    return _loaded[key]
+
+
+def main():
+    tables = compile_tables()
+    write_artifact(tables)
+    fonts = ', '.join(f"{font['name']} v{font['version']}" for font in tables['fonts'])
+    print(f"Compiled {fonts} into {ARTIFACT_PATH} (checksum {tables['checksum'][:16]})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Process-pool parallel conversion for large documents
+"""
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .font_mapper import ConversionStats, FontMapper
+
+# Per-worker FontMapper, compiled once by the pool initializer
+_worker_mapper = None
+
+# Per-worker DocumentConverter for whole-document tasks, built on first use
+_worker_document_converter = None
+
+
+def _init_worker():
+    """Build the worker's FontMapper so its tables are compiled before any job"""
+    global _worker_mapper
+    _worker_mapper = FontMapper()
+
+
+def _warm_up():
+    """No-op task used to start worker processes ahead of the first job"""
+    return os.getpid()
+
+
+def _convert_batch(items, preserve_english, preserve_numbers):
+    """Convert a batch of (text, source_font) pairs inside a worker, returning (texts, stats)"""
+    stats = ConversionStats()
+    converted = [
+        _worker_mapper.convert_with_preservation(
+            text, preserve_english, preserve_numbers, source_font=source_font, stats=stats
+        )
+        for text, source_font in items
+    ]
+    return converted, stats
+
+
+def _convert_pdf_pages(file_path, start, page_fonts, preserve_english, preserve_numbers):
+    """Extract and convert a range of PDF pages inside a worker, returning (pages, stats)"""
+    import PyPDF2
+
+    stats = ConversionStats()
+    results = []
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        for offset, source_font in enumerate(page_fonts):
+            text = pdf_reader.pages[start + offset].extract_text() + "\n"
+            results.append((text, _worker_mapper.convert_with_preservation(
+                text, preserve_english, preserve_numbers, source_font=source_font, stats=stats
+            )))
+    return results, stats
+
+
+def _convert_document(document, filename, source_font):
+    """Convert a whole document (a path or its bytes) inside a worker"""
+    global _worker_document_converter
+    if _worker_document_converter is None:
+        from .document_converter import DocumentConverter
+        from .font_detector import FontDetector
+        _worker_document_converter = DocumentConverter(FontDetector(), _worker_mapper)
+    return _worker_document_converter.convert_document(document, source_font=source_font, filename=filename)
+
+
+class ParallelConverter:
+    def __init__(self, workers=None, threshold=1024 * 1024, batch_chars=256 * 1024,
+                 start_method=None):
+        """
+        Args:
+            workers (int): Number of worker processes (defaults to the CPU count)
+            threshold (int): Input size in characters below which conversion
+                stays in-process, so small jobs don't pay IPC overhead
+            batch_chars (int): Approximate number of characters sent per task
+            start_method (str): multiprocessing start method of the pool;
+                defaults to 'forkserver' ('spawn' where it is unavailable),
+                as the pool is started from multi-threaded server processes,
+                which must not fork
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.batch_chars = batch_chars
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+        self._executor = None
+
+    @property
+    def executor(self):
+        """Process pool, started on first use"""
+        if self._executor is None:
+            context = multiprocessing.get_context(self.start_method)
+            if self.start_method == 'forkserver':
+                # Workers fork from a server that already imported the converters
+                context.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context, initializer=_init_worker
+            )
+        return self._executor
+
+    def warm_up(self):
+        """Start every worker process and compile its tables ahead of time"""
+        futures = [self.executor.submit(_warm_up) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def should_parallelize(self, size):
+        """
+        Check whether an input is large enough to be worth distributing
+
+        Args:
+            size (int): Input size in characters (or bytes)
+
+        Returns:
+            bool: True if the input should go to the process pool
+        """
+        return size >= self.threshold
+
+    def convert_many(self, texts, source_fonts, preserve_english=True, preserve_numbers=True,
+                     stats=None):
+        """
+        Convert many independent texts (paragraphs, pages) across the pool
+
+        Args:
+            texts (list): Texts to convert
+            source_fonts (list): Resolved source font for each text
+            preserve_english (bool): Whether to preserve English text
+            preserve_numbers (bool): Whether to preserve numbers
+            stats (ConversionStats): If given, receives the workers' statistics
+
+        Returns:
+            list: Converted texts, in input order
+        """
+        converted = []
+        for batch in self.imap_batches(zip(texts, source_fonts), preserve_english, preserve_numbers, stats):
+            converted.extend(converted_text for _, converted_text in batch)
+        return converted
+
+    def imap_batches(self, items, preserve_english=True, preserve_numbers=True, stats=None):
+        """
+        Convert a stream of (text, source_font) pairs, yielding batches in order
+
+        At most two batches per worker are in flight at a time, so memory
+        stays bounded when the input is a lazy stream.
+
+        Args:
+            items (iterable): (text, source_font) pairs
+            preserve_english (bool): Whether to preserve English text
+            preserve_numbers (bool): Whether to preserve numbers
+            stats (ConversionStats): If given, receives the statistics each
+                worker collected for its batches
+
+        Yields:
+            list: (original text, converted text) pairs of one batch
+        """
+        executor = self.executor
+        pending = deque()
+        max_in_flight = self.workers * 2
+
+        for batch in self._batches(items):
+            future = executor.submit(_convert_batch, batch, preserve_english, preserve_numbers)
+            pending.append((batch, future))
+            if len(pending) >= max_in_flight:
+                yield self._collect(*pending.popleft(), stats)
+
+        while pending:
+            yield self._collect(*pending.popleft(), stats)
+
+    def imap_pdf_pages(self, file_path, page_fonts, pages_per_task=8,
+                       preserve_english=True, preserve_numbers=True, stats=None):
+        """
+        Extract and convert PDF pages across the pool, yielding pages in order
+
+        Each task opens the PDF itself and handles a contiguous page range, so
+        both text extraction and conversion run in the workers while the
+        caller writes finished pages out.
+
+        Args:
+            file_path (str): Path to the PDF file
+            page_fonts (list): Resolved source font for each page
+            pages_per_task (int): Pages handled by one task
+            preserve_english (bool): Whether to preserve English text
+            preserve_numbers (bool): Whether to preserve numbers
+            stats (ConversionStats): If given, receives the workers' statistics
+
+        Yields:
+            tuple: (original page text, converted page text)
+        """
+        executor = self.executor
+        pending = deque()
+        max_in_flight = self.workers * 2
+
+        for start in range(0, len(page_fonts), pages_per_task):
+            pending.append(executor.submit(
+                _convert_pdf_pages, file_path, start, page_fonts[start:start + pages_per_task],
+                preserve_english, preserve_numbers
+            ))
+            if len(pending) >= max_in_flight:
+                yield from self._collect_pages(pending.popleft(), stats)
+
+        while pending:
+            yield from self._collect_pages(pending.popleft(), stats)
+
+    def convert_documents(self, documents, source_font='auto'):
+        """
+        Convert whole documents concurrently, one document per task
+
+        At most two documents per worker are in flight at a time, so the
+        documents are only read as workers become free.
+
+        Args:
+            documents (iterable): (key, document, filename) tuples, where
+                document is a path or the document's bytes and filename
+                its file name
+            source_font (str): Source font for every document, or 'auto'
+
+        Yields:
+            tuple: (key, conversion result) as each document finishes
+        """
+        executor = self.executor
+        max_in_flight = self.workers * 2
+        documents = iter(documents)
+        pending = {}
+        while True:
+            for key, document, filename in itertools.islice(documents, max_in_flight - len(pending)):
+                pending[executor.submit(_convert_document, document, filename, source_font)] = key
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': f'Error converting document: {str(e)}'}
+                yield pending.pop(future), result
+
+    def _collect(self, batch, future, stats):
+        """Pair a finished batch's converted texts with their originals"""
+        converted_texts, batch_stats = future.result()
+        if stats is not None:
+            stats.merge(batch_stats)
+        return [(text, converted) for (text, _), converted in zip(batch, converted_texts)]
+
+    def _collect_pages(self, future, stats):
+        """Get a finished page range, merging its statistics"""
+        pages, pages_stats = future.result()
+        if stats is not None:
+            stats.merge(pages_stats)
+        return pages
+
+    def _batches(self, items):
+        """Group (text, source_font) pairs into batches of about batch_chars characters"""
+        batch = []
+        batch_length = 0
+        for text, source_font in items:
+            batch.append((text, source_font))
+            batch_length += len(text)
+            if batch_length >= self.batch_chars:
+                yield batch
+                batch = []
+                batch_length = 0
+        if batch:
+            yield batch
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,160 @@
+"""
+Content-addressed cache of document conversion results
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+def link_or_copy(source, destination):
+    """Hard-link a file, copying it when linking is not possible"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached entries
+            max_bytes (int): Total size of cached outputs above which the
+                least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def key(self, document, table_version, options):
+        """
+        Build the cache key for a document
+
+        Args:
+            document (file): Binary file object positioned at the document start
+            table_version (str): FontMapper.table_version of the mapper in use
+            options (dict): Conversion options that affect the output
+
+        Returns:
+            str: Hex sha256 of the document bytes, table version and options
+        """
+        digest = hashlib.sha256()
+        for block in iter(lambda: document.read(1024 * 1024), b''):
+            digest.update(block)
+        digest.update(b'\0' + table_version.encode('utf-8'))
+        digest.update(b'\0' + json.dumps(options, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached conversion
+
+        Args:
+            key (str): Cache key from key()
+
+        Returns:
+            dict: Cached conversion result whose 'output_path' points at the
+                cached output file, or None on a miss
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, 'result.json'), 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # Mark the entry as recently used
+            os.utime(entry_dir)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        result['output_path'] = os.path.join(entry_dir, 'output')
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """
+        Store a successful conversion result and its output file
+
+        Args:
+            key (str): Cache key from key()
+            result (dict): Conversion result with 'output_path'
+        """
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+
+        # Build the entry next to its final place, then move it in atomically
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir), prefix='.tmp-')
+        try:
+            link_or_copy(result['output_path'], os.path.join(tmp_dir, 'output'))
+            cached = {k: v for k, v in result.items() if k not in ('output_path', 'file_info')}
+            with open(os.path.join(tmp_dir, 'result.json'), 'w', encoding='utf-8') as f:
+                json.dump(cached, f, ensure_ascii=False)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        with self._lock:
+            self._size += os.path.getsize(os.path.join(entry_dir, 'output'))
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+        for _, entry_dir, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            self._size -= size
+            self.evictions += 1
+
+    def _entries(self):
+        """Yield (last used time, entry dir, output size) for every entry"""
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.tmp-'):
+                    continue
+                try:
+                    size = os.path.getsize(os.path.join(entry.path, 'output'))
+                    yield entry.stat().st_mtime, entry.path, size
+                except FileNotFoundError:
+                    continue
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def stats(self):
+        """
+        Get cache counters for monitoring
+
+        Returns:
+            dict: Hits, misses, hit rate, evictions and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,223 @@
+"""
+Background conversion jobs with file-backed status for polling
+
+A job runs in the thread pool of the server process that accepted it,
+which is recorded as the job's owner. When the owner is gone (a recycled
+or restarted worker) before finishing the job, status requests report
+the job as failed instead of queued or running forever.
+"""
+import json
+import os
+import re
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobManager:
+    def __init__(self, document_converter, jobs_dir='app/jobs', workers=2,
+                 progress_interval=0.25, on_result=None, ttl=24 * 60 * 60, sweep_interval=60):
+        """
+        Args:
+            document_converter (DocumentConverter): Converter used to run jobs
+            jobs_dir (str): Directory holding one JSON status file per job, so
+                any server process can answer status requests
+            workers (int): Number of jobs converted at the same time
+            progress_interval (float): Minimum seconds between progress writes
+            on_result (callable): Called as on_result(result, filename) with
+                every finished conversion result, e.g. to record metrics
+            ttl (int): Seconds after its last update before a job's status
+                file is removed
+            sweep_interval (int): Minimum seconds between removals of
+                expired status files, which run when jobs are submitted
+        """
+        self.document_converter = document_converter
+        self.jobs_dir = jobs_dir
+        self.progress_interval = progress_interval
+        self.on_result = on_result
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.last_sweep = None
+        self._host = socket.gethostname()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='conversion-job')
+
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def submit(self, document, filename, source_font='auto', convert=None):
+        """
+        Queue a document for conversion
+
+        The job owns document from now on: a path is removed and any other
+        document (a file object, a DocumentBatch) is closed when the job
+        finishes.
+
+        Args:
+            document (str or file): Path to the uploaded document, or a
+                seekable binary file object holding it
+            filename (str): Original file name
+            source_font (str): Source font for the document, or 'auto'
+            convert (callable): Runs the job, called like
+                DocumentConverter.convert_document and returning a result
+                of the same shape (e.g. DocumentConverter.convert_batch);
+                defaults to the document converter's convert_document
+
+        Returns:
+            str: Job id
+        """
+        now = time.time()
+        if self.last_sweep is None or now - self.last_sweep >= self.sweep_interval:
+            self.sweep()
+
+        job_id = uuid.uuid4().hex
+        self._write(job_id, {
+            'id': job_id,
+            'status': 'queued',
+            'owner': {'host': self._host, 'pid': os.getpid()},
+            'filename': filename,
+            'progress': {'done': 0, 'total': None, 'unit': None, 'percent': 0},
+            'created': now,
+            'updated': now,
+            'result': None,
+            'error': None
+        })
+        self._executor.submit(self._run, job_id, convert or self.document_converter.convert_document,
+                              document, filename, source_font)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get the current state of a job
+
+        Args:
+            job_id (str): Job id returned by submit
+
+        Returns:
+            dict: Job state, or None if the job does not exist
+        """
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        job = self._read(job_id)
+        if job is not None and job['status'] in ('queued', 'running') and self._orphaned(job):
+            job['status'] = 'failed'
+            job['error'] = 'The server restarted before the conversion finished. Please upload the file again.'
+            self._write(job_id, job)
+        return job
+
+    def sweep(self):
+        """
+        Remove status files not updated for ttl seconds
+
+        Returns:
+            int: Number of status files removed
+        """
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(('.json', '.tmp')):
+                continue
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                # Removed by another process's sweep
+                continue
+        self.last_sweep = now
+        return removed
+
+    def _read(self, job_id):
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _orphaned(self, job):
+        """Whether the process that owns an unfinished job has exited"""
+        owner = job.get('owner')
+        if owner is None or owner['host'] != self._host:
+            # Only processes on this host can be checked
+            return False
+        if owner['pid'] == os.getpid():
+            return False
+        try:
+            os.kill(owner['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _run(self, job_id, convert, document, filename, source_font):
+        """Convert one document, recording progress and the outcome"""
+        job = self._read(job_id)
+        job['status'] = 'running'
+        self._write(job_id, job)
+
+        last_write = [0.0]
+
+        def progress(done, total, unit):
+            now = time.time()
+            if now - last_write[0] < self.progress_interval and done != total:
+                return
+            last_write[0] = now
+            job['progress'] = {
+                'done': done,
+                'total': total,
+                'unit': unit,
+                'percent': round(100.0 * done / total, 1) if total else None
+            }
+            self._write(job_id, job)
+
+        result = None
+        try:
+            # The job id keeps output names unique across uploads
+            result = convert(
+                document, source_font=source_font, progress_callback=progress,
+                filename=f'{job_id}_{filename}'
+            )
+            if result.get('success'):
+                job['status'] = 'done'
+                job['progress']['percent'] = 100
+                job['result'] = {
+                    'output_filename': result['output_filename'],
+                    'preview': result['preview'],
+                    'stats': result['stats'],
+                    'cache_hit': result.get('cache_hit', False)
+                }
+            else:
+                job['status'] = 'failed'
+                job['error'] = result.get('error')
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = f'Error processing document: {str(e)}'
+            result = {'success': False, 'error': job['error']}
+        finally:
+            if isinstance(document, str):
+                if os.path.exists(document):
+                    os.remove(document)
+            else:
+                document.close()
+
+        self._write(job_id, job)
+        if self.on_result is not None:
+            self.on_result(result, filename)
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def _write(self, job_id, job):
+        """Atomically replace a job's status file"""
+        job['updated'] = time.time()
+        tmp_path = self._path(job_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(job_id))
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
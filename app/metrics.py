@@ -0,0 +1,368 @@
+"""
+Prometheus-style metrics for the conversion service
+
+A small in-process registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format.
+
+Under a multi-process server, give every process the same multiprocess
+directory. Each process then writes its values to its own file there
+about once a second, and a scrape answered by any process merges the
+files of all processes:
+- Counters and histograms are summed, including processes that have
+  exited, so they never go backwards.
+- Gauges are summed over live processes only.
+Call retire_process() when a worker exits to fold its file into the
+retired totals (Unix only, as it locks the directory with fcntl).
+"""
+import json
+import os
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds, from quick text previews to large documents
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Document size buckets in bytes, up to the 16MB upload limit
+SIZE_BUCKETS = tuple(1024 * 2 ** power for power in range(0, 15, 2))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _DirectoryLock:
+    """fcntl lock on a multiprocess directory: shared for readers, exclusive for retiring"""
+
+    def __init__(self, directory, exclusive=False):
+        self.path = os.path.join(directory, '.lock')
+        self.exclusive = exclusive
+        self._file = None
+
+    def __enter__(self):
+        import fcntl
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc_info):
+        # Closing the file releases the lock
+        self._file.close()
+
+
+def clear_multiprocess_dir(directory):
+    """Remove the values left in a multiprocess directory by an earlier server run"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labels)
+
+    def render(self, values=None):
+        """Render this process's values, or the given {label values: value} dict"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        if values is not None:
+            for key, value in sorted(values.items()):
+                lines.extend(self._render_value(key, value))
+            return lines
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_value(key, value))
+        return lines
+
+    def snapshot(self):
+        """This process's values as JSON-serializable [label values, value] pairs"""
+        with self._lock:
+            return [[list(key), self._copy_value(value)] for key, value in self._values.items()]
+
+    def combine(self, values, snapshot):
+        """
+        Add snapshot values into a {label values: value} dict
+
+        Returns:
+            dict: values, updated in place
+        """
+        for key, value in snapshot:
+            key = tuple(key)
+            values[key] = value if key not in values else self._add_values(values[key], value)
+        return values
+
+    def _copy_value(self, value):
+        return value
+
+    def _add_values(self, value, other):
+        return value + other
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _copy_value(self, value):
+        counts, total = value
+        return [list(counts), total]
+
+    def _add_values(self, value, other):
+        return [[a + b for a, b in zip(value[0], other[0])], value[1] + other[1]]
+
+    def _render_value(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            le = bound if bound == '+Inf' else _format_value(float(bound))
+            lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, [("le", le)])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, multiprocess_dir=None):
+        """
+        Args:
+            multiprocess_dir (str): Directory shared by every server process,
+                or None to serve this process's values only
+        """
+        self._metrics = []
+        self.multiprocess_dir = multiprocess_dir
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stop_flushing = threading.Event()
+
+        self.http_requests_in_flight = self._add(Gauge(
+            'converter_http_requests_in_flight', 'HTTP requests currently being served'
+        ))
+        self.http_request_duration = self._add(Histogram(
+            'converter_http_request_duration_seconds', 'HTTP request latency',
+            labels=('endpoint', 'status')
+        ))
+        self.jobs_in_flight = self._add(Gauge(
+            'converter_jobs_in_flight', 'Conversion jobs queued or running'
+        ))
+        self.conversions = self._add(Counter(
+            'converter_conversions_total', 'Finished document conversions',
+            labels=('format', 'outcome')
+        ))
+        self.conversion_duration = self._add(Histogram(
+            'converter_conversion_duration_seconds', 'Document conversion latency',
+            labels=('format',)
+        ))
+        self.stage_duration = self._add(Histogram(
+            'converter_stage_duration_seconds', 'Time spent per conversion stage',
+            labels=('stage',)
+        ))
+        self.input_size = self._add(Histogram(
+            'converter_input_bytes', 'Size of converted documents',
+            labels=('format',), buckets=SIZE_BUCKETS
+        ))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def observe_conversion(self, result, file_format):
+        """
+        Record a finished DocumentConverter.convert_document result
+
+        Args:
+            result (dict): Conversion result
+            file_format (str): Document format, e.g. 'pdf'
+        """
+        if not result.get('success'):
+            self.conversions.inc(format=file_format, outcome='error')
+            return
+
+        stats = result['stats']
+        self.conversions.inc(format=file_format, outcome='cache_hit' if result.get('cache_hit') else 'converted')
+
+        timings = stats.get('timings')
+        if timings:
+            self.conversion_duration.observe(timings['total'], format=file_format)
+            for stage, info in timings['stages'].items():
+                self.stage_duration.observe(info['seconds'], stage=stage)
+
+        sizes = stats.get('bytes')
+        if sizes:
+            self.input_size.observe(sizes['input'], format=file_format)
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        lines = []
+        if not self.multiprocess_dir:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
+
+        self.flush()
+        merged = self._collect()
+        for metric in self._metrics:
+            lines.extend(metric.render(merged[metric.name]))
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Write this process's values to the multiprocess directory"""
+        if not self.multiprocess_dir:
+            return
+        pid = os.getpid()
+        data = {'pid': pid, 'metrics': {metric.name: metric.snapshot() for metric in self._metrics}}
+        path = os.path.join(self.multiprocess_dir, f'{pid}.json')
+        with self._flush_lock:
+            self._write(path, data)
+
+    def _write(self, path, data):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_files(self):
+        """Yield the value files of the multiprocess directory"""
+        for name in sorted(os.listdir(self.multiprocess_dir)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.multiprocess_dir, name), 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def _collect(self):
+        """Merge the values of every process: metric name -> {label values: value}"""
+        merged = {metric.name: {} for metric in self._metrics}
+        with _DirectoryLock(self.multiprocess_dir):
+            for data in self._read_files():
+                pid = data.get('pid')
+                live = pid is not None and (pid == os.getpid() or _pid_alive(pid))
+                for metric in self._metrics:
+                    if metric.kind == 'gauge' and not live:
+                        continue
+                    metric.combine(merged[metric.name], data['metrics'].get(metric.name, []))
+        return merged
+
+    def retire_process(self, pid):
+        """
+        Fold the counters and histograms of an exited process into the retired totals
+
+        Keeps the directory from growing with every recycled worker; the
+        process's gauges are dropped.
+
+        Args:
+            pid (int): Process id of the exited process
+        """
+        if not self.multiprocess_dir:
+            return
+        path = os.path.join(self.multiprocess_dir, f'{pid}.json')
+        retired_path = os.path.join(self.multiprocess_dir, 'retired.json')
+        with _DirectoryLock(self.multiprocess_dir, exclusive=True):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            try:
+                with open(retired_path, 'r', encoding='utf-8') as f:
+                    retired = json.load(f)
+            except (OSError, ValueError):
+                retired = {'pid': None, 'metrics': {}}
+
+            for metric in self._metrics:
+                if metric.kind == 'gauge':
+                    continue
+                values = metric.combine({}, retired['metrics'].get(metric.name, []))
+                metric.combine(values, data['metrics'].get(metric.name, []))
+                retired['metrics'][metric.name] = [[list(key), value] for key, value in values.items()]
+
+            self._write(retired_path, retired)
+            os.remove(path)
+
+    def start_flusher(self, interval=1.0):
+        """Flush this process's values every interval seconds in a daemon thread"""
+        if not self.multiprocess_dir or self._flusher is not None:
+            return
+        self._stop_flushing.clear()
+
+        def run():
+            while not self._stop_flushing.wait(interval):
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        """Stop the flusher thread and write the final values"""
+        if self._flusher is not None:
+            self._stop_flushing.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
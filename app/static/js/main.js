@@ -12,6 +12,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const previewInput = document.getElementById('previewInput');
     const previewOutput = document.getElementById('previewOutput');
 
+    // How long to wait for a background conversion before giving up
+    const JOB_POLL_TIMEOUT_MS = 15 * 60 * 1000;
+
     // File upload and conversion
     uploadForm.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -50,11 +53,16 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: formData
             });
 
-            updateProgress(50, 'Processing document...');
+            const queued = await response.json();
+            if (!queued.success) {
+                hideProgress();
+                showAlert(queued.message || 'Conversion failed. Please try again.', 'danger');
+                return;
+            }
 
-            const result = await response.json();
+            updateProgress(20, 'Processing document...');
 
-            updateProgress(90, 'Finalizing conversion...');
+            const result = await pollJob(queued.status_url);
 
             if (result.success) {
                 updateProgress(100, 'Conversion complete!');
@@ -136,6 +144,33 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     // Helper functions
+    async function pollJob(statusUrl) {
+        // Poll the job until it finishes, mapping its progress onto 20-95%,
+        // and give up if it has not finished by the deadline
+        const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+        while (Date.now() < deadline) {
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+
+            if (!response.ok || job.status === 'done' || job.status === 'failed') {
+                return job;
+            }
+
+            const percent = job.progress && job.progress.percent;
+            if (percent !== null && percent !== undefined) {
+                updateProgress(20 + Math.round(percent * 0.75), `Processing document... ${Math.round(percent)}%`);
+            }
+
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+
+        return {
+            success: false,
+            status: 'failed',
+            message: 'The conversion is taking too long. Please try again later.'
+        };
+    }
+
     function showProgress() {
         progressContainer.style.display = 'block';
         resultsContainer.style.display = 'none';
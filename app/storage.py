@@ -0,0 +1,160 @@
+"""
+Managed storage for converted files with TTL and quota eviction
+"""
+import hashlib
+import os
+import threading
+import time
+
+
+class OutputStorage:
+    def __init__(self, root, ttl=24 * 60 * 60, max_bytes=1024 * 1024 * 1024,
+                 sweep_interval=60):
+        """
+        Args:
+            root (str): Directory holding the converted files
+            ttl (int): Seconds a file is kept after it was written
+            max_bytes (int): Total size above which the oldest files are
+                evicted, even before they expire
+            sweep_interval (int): Seconds between background sweeps
+        """
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+
+        self.expired = 0
+        self.evicted = 0
+        self.usage = {'files': 0, 'bytes': 0}
+        self.last_sweep = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper = None
+
+        os.makedirs(root, exist_ok=True)
+
+    def _shard(self, filename):
+        """Two-level shard directory for a file name, e.g. root/3f/a2"""
+        digest = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4])
+
+    def path_for(self, filename):
+        """
+        Get the path a new output file should be written to
+
+        Args:
+            filename (str): Output file name
+
+        Returns:
+            str: Path inside the file's shard directory
+        """
+        shard = self._shard(filename)
+        os.makedirs(shard, exist_ok=True)
+        return os.path.join(shard, filename)
+
+    def resolve(self, filename):
+        """
+        Find a stored output file by name
+
+        Args:
+            filename (str): Output file name as returned to the client
+
+        Returns:
+            str: Path of the file, or None if it does not exist (or expired)
+        """
+        if not filename or os.path.basename(filename) != filename:
+            return None
+
+        # Files written before sharding live directly in the root
+        for path in (os.path.join(self._shard(filename), filename),
+                     os.path.join(self.root, filename)):
+            try:
+                if time.time() - os.path.getmtime(path) <= self.ttl:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    def sweep(self):
+        """
+        Remove expired files, then the oldest files until under the quota
+
+        Returns:
+            dict: Current usage after the sweep
+        """
+        now = time.time()
+        files = []
+        expired = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime > self.ttl:
+                        os.remove(path)
+                        expired += 1
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, path))
+                except FileNotFoundError:
+                    # Removed by a download cleanup or another sweeper
+                    continue
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        if total > self.max_bytes:
+            files.sort()
+            while files and total > self.max_bytes:
+                _, size, path = files.pop(0)
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+        with self._lock:
+            self.expired += expired
+            self.evicted += evicted
+            self.usage = {'files': len(files), 'bytes': total}
+            self.last_sweep = now
+            return dict(self.usage)
+
+    def start_sweeper(self):
+        """Start the background sweeper thread if it is not running"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='output-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        while True:
+            self.sweep()
+            if self._stop.wait(self.sweep_interval):
+                return
+
+    def stats(self):
+        """
+        Get storage usage and eviction counters
+
+        Returns:
+            dict: Usage as of the last sweep, limits and eviction counts
+        """
+        with self._lock:
+            return {
+                'files': self.usage['files'],
+                'bytes': self.usage['bytes'],
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'last_sweep': self.last_sweep
+            }
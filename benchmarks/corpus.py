@@ -0,0 +1,153 @@
+"""
+Deterministic synthetic corpora and document fixtures for benchmarks
+
+Legacy-font text is built from the keys of FontMapper's own mapping
+tables, so every corpus exercises both single-character and
+multi-character keys. The same seed and size always give the same text.
+"""
+import os
+import random
+
+from app.converters.font_mapper import FontMapper
+
+# Corpus kinds: pure legacy-font text, or legacy text mixed with English,
+# numbers and Unicode Marathi as found in real circulars
+CORPUS_KINDS = ('dvtt_yogesh', 'dtt_dhruv', 'mixed')
+
+ENGLISH_WORDS = ('the', 'office', 'circular', 'date', 'section', 'page', 'copy', 'to')
+UNICODE_WORDS = ('नमस्ते', 'महाराष्ट्र', 'शासन', 'परिपत्रक', 'दिनांक')
+
+
+def _legacy_words(mapping, rng, count=2000):
+    """Vocabulary of pseudo-words made of 2-6 mapping keys"""
+    keys = sorted(key for key in mapping if key.strip())
+    return [''.join(rng.choice(keys) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+
+def generate_text(kind, size, seed=0):
+    """
+    Generate a synthetic corpus
+
+    Args:
+        kind (str): One of CORPUS_KINDS
+        size (int): Approximate size in UTF-8 bytes
+        seed (int): Random seed
+
+    Returns:
+        str: Text of lines of about 12 words
+    """
+    mapper = FontMapper(memo_size=0)
+    rng = random.Random(f'{kind}-{seed}')
+
+    words = _legacy_words(mapper.mappings['dtt_dhruv' if kind == 'dtt_dhruv' else 'dvtt_yogesh'], rng)
+
+    lines = []
+    total = 0
+    while total < size:
+        line = []
+        for _ in range(12):
+            roll = rng.random()
+            if kind == 'mixed' and roll < 0.15:
+                line.append(rng.choice(ENGLISH_WORDS))
+            elif kind == 'mixed' and roll < 0.25:
+                line.append(str(rng.randint(1, 9999)))
+            elif kind == 'mixed' and roll < 0.30:
+                line.append(rng.choice(UNICODE_WORDS))
+            else:
+                line.append(rng.choice(words))
+        text = ' '.join(line)
+        lines.append(text)
+        total += len(text.encode('utf-8')) + 1
+    return '\n'.join(lines)
+
+
+def write_txt(path, text):
+    """Write a UTF-8 text fixture"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def write_docx(path, text):
+    """Write a DOCX fixture with one paragraph per line and a small table"""
+    from docx import Document
+
+    doc = Document()
+    lines = text.split('\n')
+    for line in lines:
+        doc.add_paragraph(line)
+
+    table = doc.add_table(rows=4, cols=3)
+    for index, cell in enumerate(cell for row in table.rows for cell in row.cells):
+        cell.text = lines[index % len(lines)][:40]
+
+    doc.save(path)
+    return path
+
+
+def write_pdf(path, text, lines_per_page=40):
+    """
+    Write a minimal PDF fixture with one text line per content line
+
+    The PDF is assembled by hand (Helvetica, no compression), so no PDF
+    writer is needed. Characters outside Latin-1 are dropped, which leaves
+    legacy-font text intact.
+    """
+    lines = text.split('\n')
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for page in pages:
+        content = bytearray(b'BT /F1 10 Tf 14 TL 40 800 Td')
+        for line in page:
+            escaped = (line.encode('latin-1', errors='ignore')
+                       .replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)'))
+            content += b' (' + escaped + b") '"
+        content += b' ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + bytes(content) + b'\nendstream')
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R '
+            b'/Resources << /Font << /F1 3 0 R >> >> >>' % len(objects)
+        )
+        kids.append(len(objects))
+
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = (b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % kid for kid in kids) +
+                  b'] /Count %d >>' % len(kids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+def build_fixtures(directory, text, name):
+    """
+    Write TXT, DOCX and PDF fixtures of the same text
+
+    Args:
+        directory (str): Output directory
+        text (str): Corpus text
+        name (str): Base file name
+
+    Returns:
+        dict: Format -> fixture path
+    """
+    os.makedirs(directory, exist_ok=True)
+    return {
+        'txt': write_txt(os.path.join(directory, f'{name}.txt'), text),
+        'docx': write_docx(os.path.join(directory, f'{name}.docx'), text),
+        'pdf': write_pdf(os.path.join(directory, f'{name}.pdf'), text),
+    }
@@ -0,0 +1,132 @@
+"""
+Cold-start import budget for the Flask entry points
+
+Usage:
+    python -m benchmarks.imports [--budget-ms 500] [--top 10] [--output imports.json]
+
+Each entry point is imported in a fresh interpreter with -X importtime.
+The report lists the startup time (imports plus module-level setup such
+as compiling the font tables) and the slowest imports. With --budget-ms,
+the run exits with status 1 if any entry point starts slower than that.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Entry point name -> module imported to start it
+ENTRY_POINTS = {
+    'app': 'wsgi',
+    'vercel': 'api.index',
+}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+STARTUP_SCRIPT = (
+    'import time, sys\n'
+    'started = time.perf_counter()\n'
+    'import {module}\n'
+    'sys.stdout.write(repr(time.perf_counter() - started))\n'
+)
+
+
+def measure(module, repo_root, env):
+    """
+    Import a module in a fresh interpreter
+
+    Returns:
+        tuple: (startup seconds, list of (module, self us, cumulative us, depth))
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(module=module)],
+        cwd=repo_root, env=env, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return float(completed.stdout), imports
+
+
+def report_entry_point(module, repo_root, env, repeat, top):
+    """
+    Measure one entry point
+
+    Args:
+        module (str): Module imported to start the entry point
+        repo_root (str): Repository root, used as the working directory
+        env (dict): Environment for the child interpreters
+        repeat (int): Fresh interpreters started; the fastest counts
+        top (int): Number of slowest imports to list
+
+    Returns:
+        dict: Startup time and the slowest imports
+    """
+    runs = [measure(module, repo_root, env) for _ in range(repeat)]
+    startup, imports = min(runs, key=lambda run: run[0])
+
+    # -X importtime lists children before their parent, so the entry point's
+    # imports are the lines between the previous top-level import and its own
+    end = max(index for index, entry in enumerate(imports) if entry[0] == module and entry[3] == 0)
+    start = max((index for index in range(end) if imports[index][3] == 0), default=-1) + 1
+
+    # Imports made by the entry point and its direct dependencies
+    packages = {}
+    for name, _, cumulative_us, depth in imports[start:end]:
+        if depth <= 2:
+            packages[name] = max(packages.get(name, 0), cumulative_us)
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+    return {
+        'startup_ms': round(startup * 1000, 1),
+        'startup_ms_median': round(statistics.median(run[0] for run in runs) * 1000, 1),
+        'modules_imported': len(imports),
+        'slowest_imports_ms': {name: round(us / 1000, 1) for name, us in slowest}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report the cold-start import cost of the Flask entry points')
+    parser.add_argument('--entry-points', default=','.join(ENTRY_POINTS),
+                        help=f"Comma-separated entry points (default: {','.join(ENTRY_POINTS)})")
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per entry point; the fastest counts')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list')
+    parser.add_argument('--budget-ms', type=float, help='Fail if an entry point starts slower than this')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=repo_root, PYTHONDONTWRITEBYTECODE='1')
+    # Keep the measurement to imports and setup, without starting worker processes
+    env.setdefault('CONVERTER_PROCESSES', '0')
+
+    results = {}
+    for name in args.entry_points.split(','):
+        results[name] = report_entry_point(ENTRY_POINTS[name], repo_root, env, args.repeat, args.top)
+        print(f"{name:<8} {results[name]['startup_ms']:8.1f} ms startup, "
+              f"{results[name]['modules_imported']} modules", file=sys.stderr)
+        for module, ms in results[name]['slowest_imports_ms'].items():
+            print(f"    {module:<48} {ms:8.1f} ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.budget_ms is not None:
+        over = [name for name, result in results.items() if result['startup_ms'] > args.budget_ms]
+        if over:
+            print(f"Over the {args.budget_ms:.0f} ms startup budget: {', '.join(over)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Benchmark font detection, conversion and document conversion paths
+
+Usage:
+    python -m benchmarks.run [--sizes 64K,1M] [--repeat 5] [--output results.json]
+    python -m benchmarks.run --compare baseline.json [--threshold 0.15]
+
+Results are written as JSON. With --compare, every benchmark is checked
+against the baseline and the run exits with status 1 if any is slower
+than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import ConversionStats, FontMapper
+
+from .corpus import CORPUS_KINDS, build_fixtures, generate_text
+
+
+def parse_size(value):
+    """Parse sizes like '64K', '1M' or '1048576' into bytes"""
+    value = value.strip().upper()
+    units = {'K': 1024, 'M': 1024 * 1024}
+    if value[-1:] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def time_call(func, repeat):
+    """Run func repeat times and return the wall-clock durations"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def record(results, name, size, durations):
+    """Store the timings of one benchmark"""
+    best = min(durations)
+    results[name] = {
+        'bytes': size,
+        'seconds_min': best,
+        'seconds_median': statistics.median(durations),
+        'mb_per_s': size / (1024 * 1024) / best if best else None
+    }
+    print(f"{name:<48} {best * 1000:10.1f} ms {results[name]['mb_per_s'] or 0:8.2f} MB/s",
+          file=sys.stderr)
+
+
+def run_benchmarks(sizes, repeat, seed, fixtures_dir):
+    """
+    Run every benchmark on every corpus kind and size
+
+    Returns:
+        dict: Benchmark name -> timings
+    """
+    detector = FontDetector()
+    # Memoization would turn repeated runs into cache lookups
+    mapper = FontMapper(memo_size=0)
+    converter = DocumentConverter(detector, mapper, output_dir=os.path.join(fixtures_dir, 'out'))
+    os.makedirs(converter.output_dir, exist_ok=True)
+
+    results = {}
+    for size in sizes:
+        for kind in CORPUS_KINDS:
+            text = generate_text(kind, size, seed)
+            text_size = len(text.encode('utf-8'))
+            prefix = f'{kind}/{size}'
+            source_font = detector.detect_source_font(text)
+
+            record(results, f'{prefix}/detect_fonts', text_size,
+                   time_call(lambda: detector.detect_fonts(text), repeat))
+
+            converted = mapper.convert_with_preservation(text, source_font=source_font)
+            record(results, f'{prefix}/convert_with_preservation', text_size,
+                   time_call(lambda: mapper.convert_with_preservation(text, source_font=source_font), repeat))
+
+            record(results, f'{prefix}/get_conversion_stats', text_size,
+                   time_call(lambda: mapper.get_conversion_stats(text, converted), repeat))
+
+            def convert_with_stats():
+                stats = ConversionStats()
+                mapper.convert_with_preservation(text, source_font=source_font, stats=stats)
+                stats.report(mapper)
+            record(results, f'{prefix}/convert_with_stats', text_size, time_call(convert_with_stats, repeat))
+
+            fixtures = build_fixtures(fixtures_dir, text, f'{kind}-{size}')
+            for file_format, path in fixtures.items():
+                def convert(path=path):
+                    result = converter.convert_document(path)
+                    if not result['success']:
+                        raise RuntimeError(result['error'])
+                record(results, f'{prefix}/convert_{file_format}', os.path.getsize(path),
+                       time_call(convert, repeat))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run
+
+    Args:
+        results (dict): Current benchmark results
+        baseline (dict): Baseline benchmark results
+        threshold (float): Allowed slowdown, e.g. 0.15 for 15%
+
+    Returns:
+        list: Names of benchmarks that regressed
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = current['seconds_min'] / previous['seconds_min'] - 1
+        status = 'REGRESSION' if change > threshold else 'ok'
+        if status == 'REGRESSION':
+            regressions.append(name)
+        print(f'{name:<48} {change * 100:+7.1f}% {status}', file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Marathi font converter')
+    parser.add_argument('--sizes', default='64K,1M', help='Comma-separated corpus sizes (default: 64K,1M)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark; the fastest counts')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    parser.add_argument('--fixtures-dir', help='Keep generated fixtures in this directory')
+    parser.add_argument('--compare', help='Baseline JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Allowed slowdown against the baseline (default: 0.15)')
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    if args.fixtures_dir:
+        results = run_benchmarks(sizes, args.repeat, args.seed, args.fixtures_dir)
+    else:
+        with tempfile.TemporaryDirectory() as fixtures_dir:
+            results = run_benchmarks(sizes, args.repeat, args.seed, fixtures_dir)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}',
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Gunicorn settings for production
+
+    gunicorn wsgi:app
+
+Gunicorn reads this file from the working directory automatically. The
+application is preloaded in the master: font tables and regexes are
+compiled once, a tiny warmup conversion runs, and every object that
+exists at that point is frozen out of garbage collection so forked
+workers share those pages copy-on-write instead of each dirtying its
+own copy.
+
+Each worker writes its metrics to a directory shared by all workers, so
+/metrics reports the whole server whichever worker answers it.
+
+Environment variables:
+    PORT                   Listening port (default: 5000)
+    WEB_CONCURRENCY        Worker processes (default: CPU count)
+    WEB_THREADS            Threads per worker (default: 4)
+    WEB_TIMEOUT            Seconds before a silent worker is restarted (default: 120)
+    WEB_GRACEFUL_TIMEOUT   Seconds workers get to finish requests on restart (default: 30)
+    WEB_MAX_REQUESTS       Requests after which a worker is recycled, 0 to disable (default: 0)
+    CONVERTER_PROCESSES    Conversion processes per worker (default: CPU count divided
+                           by the workers, 0 when that leaves fewer than 2)
+    METRICS_DIR            Directory for the workers' shared metrics (default: a new
+                           temporary directory)
+"""
+import gc
+import multiprocessing
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Every worker owns a conversion pool, so split the CPUs between them
+# rather than starting CPU count x CPU count processes
+converter_processes = multiprocessing.cpu_count() // max(workers, 1)
+os.environ.setdefault('CONVERTER_PROCESSES', str(converter_processes if converter_processes >= 2 else 0))
+
+# Read by app.py when the application is preloaded below
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='font-converter-metrics-'))
+
+preload_app = True
+
+# Graceful restarts: SIGHUP reloads workers one by one, and recycled or
+# restarted workers get graceful_timeout seconds to finish their requests
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+# Off by default: conversion jobs run on threads inside the workers, and
+# every /jobs/<id> progress poll counts as a request, so a recycled worker
+# would be killed after timeout with its queued and running jobs lost
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def on_starting(server):
+    """Drop metrics left in the directory by an earlier run"""
+    from app.metrics import clear_multiprocess_dir
+
+    clear_multiprocess_dir(os.environ['METRICS_DIR'])
+
+
+def when_ready(server):
+    """Warm up the preloaded application and freeze it before workers fork"""
+    import wsgi
+
+    if not wsgi.flask_app.warm_up():
+        server.log.warning('Warmup conversion failed')
+
+    # Threads do not survive fork; each worker starts its own sweeper
+    wsgi.flask_app.output_storage.stop_sweeper()
+
+    gc.collect()
+    gc.freeze()
+    server.log.info('Application preloaded and warmed up')
+
+
+def post_fork(server, worker):
+    """Restart per-process background threads in a new worker"""
+    import wsgi
+
+    wsgi.flask_app.output_storage.start_sweeper()
+    wsgi.flask_app.metrics.start_flusher()
+
+
+def worker_exit(server, worker):
+    """Write the final metrics of an exiting worker"""
+    import wsgi
+
+    wsgi.flask_app.metrics.stop_flusher()
+
+
+def child_exit(server, worker):
+    """Fold the metrics of an exited worker into the totals of retired workers"""
+    import wsgi
+
+    wsgi.flask_app.metrics.retire_process(worker.pid)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for batch conversion of ZIP archives and multi-file uploads
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.batch import BatchLimitError, DocumentBatch
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+from app.converters.parallel import ParallelConverter
+from app.jobs import JobManager
+
+DVTT_TEXT = 'DkT ZkkG rsO\n'
+
+
+def allowed_file(filename):
+    return filename.rsplit('.', 1)[-1].lower() in {'txt', 'pdf', 'doc', 'docx'}
+
+
+def build_archive(members):
+    """ZIP archive (stored, not compressed) with the given name -> bytes members"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def corrupt(archive_bytes, data):
+    """Flip a byte inside a stored member's data, breaking its CRC"""
+    position = archive_bytes.index(data)
+    return archive_bytes[:position] + b'#' + archive_bytes[position + 1:]
+
+
+def make_batch(**limits):
+    return DocumentBatch(allowed_file, **limits)
+
+
+def read_output(result):
+    with zipfile.ZipFile(result['output_path']) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        outputs = {name: archive.read(name).decode('utf-8') for name in archive.namelist()
+                   if name != 'manifest.json'}
+    return manifest, outputs
+
+
+def convert_sample_batch(converter):
+    archive = build_archive({
+        'x/a.txt': DVTT_TEXT.encode('utf-8'),
+        'y/a.txt': DVTT_TEXT.encode('utf-8'),
+        'y/sub/../b.txt': b'rsO\n',
+        'broken.txt': b'corrupted member',
+        'tool.exe': b'MZ',
+        'docs/': b''
+    })
+    batch = make_batch()
+    batch.add_archive(io.BytesIO(corrupt(archive, b'corrupted member')))
+    batch.add_file('c.txt', io.BytesIO(DVTT_TEXT.encode('utf-8')))
+    try:
+        result = converter.convert_batch(batch, source_font='dvtt_yogesh', filename='upload.zip')
+    finally:
+        batch.close()
+    return result
+
+
+def check_sample_batch(converter, result):
+    assert result['success'], result
+    assert result['output_filename'] == 'converted_upload.zip'
+    assert result['stats'] == {'total': 6, 'converted': 4, 'failed': 2}
+    assert sorted(name for name, _ in result['documents']) == ['a.txt', 'a.txt', 'b.txt', 'c.txt']
+
+    manifest, outputs = read_output(result)
+    expected = converter.font_mapper.convert_with_preservation(DVTT_TEXT, source_font='dvtt_yogesh')
+    assert sorted(outputs) == ['converted_c.txt', 'x/converted_a.txt', 'y/converted_a.txt',
+                               'y/sub/converted_b.txt']
+    assert outputs['x/converted_a.txt'] == outputs['y/converted_a.txt'] == expected
+
+    entries = {entry['name']: entry for entry in manifest['files']}
+    assert (manifest['total'], manifest['converted']) == (6, 4)
+    assert entries['tool.exe']['error'] == 'Unsupported file type'
+    assert entries['broken.txt']['error'].startswith('Could not read file')
+    assert entries['y/a.txt']['output'] == 'y/converted_a.txt'
+    assert entries['c.txt']['stats']['source_font'] == 'dvtt_yogesh'
+
+
+def test_batch_keeps_folders_and_reports_failures():
+    """Members keep their folders, and unreadable or unsupported ones fail on their own"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=output_dir)
+        result = convert_sample_batch(converter)
+        check_sample_batch(converter, result)
+
+        # Only the archive is left in the output directory
+        assert os.listdir(output_dir) == ['converted_upload.zip']
+
+
+def test_batch_in_process_pool():
+    """The pool converts the members of a batch like the in-process path does"""
+    parallel_converter = ParallelConverter(workers=2)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=output_dir,
+                                          parallel_converter=parallel_converter)
+            check_sample_batch(converter, convert_sample_batch(converter))
+    finally:
+        parallel_converter.shutdown()
+
+
+def test_batch_limits():
+    """Batches with too many files or too many uncompressed bytes are refused"""
+    archive = build_archive({f'{index}.txt': b'x' * 1000 for index in range(5)})
+
+    batch = make_batch(max_files=4)
+    try:
+        batch.add_archive(io.BytesIO(archive))
+        assert False, 'file count limit not enforced'
+    except BatchLimitError:
+        pass
+    finally:
+        batch.close()
+
+    batch = make_batch(max_bytes=4500)
+    try:
+        batch.add_archive(io.BytesIO(archive))
+        assert False, 'size limit not enforced'
+    except BatchLimitError:
+        pass
+    finally:
+        batch.close()
+
+    batch = make_batch(max_files=5, max_bytes=5000, max_file_size=999)
+    batch.add_archive(io.BytesIO(archive))
+    assert len(batch) == 5 and batch.members() == []
+    assert {entry['error'] for entry in batch.rejected} == {'File too large'}
+    batch.close()
+
+
+def test_batch_runs_as_a_job():
+    """A batch job ends with the archive as its download and every document reported"""
+    with tempfile.TemporaryDirectory() as root:
+        converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=root)
+        finished = []
+        jobs = JobManager(converter, jobs_dir=os.path.join(root, 'jobs'),
+                          on_result=lambda result, filename: finished.append((result, filename)))
+        batch = make_batch()
+        batch.add_archive(io.BytesIO(build_archive({'a.txt': DVTT_TEXT.encode('utf-8')})))
+
+        job_id = jobs.submit(batch, 'docs.zip', convert=converter.convert_batch)
+        jobs.shutdown()
+
+        job = jobs.get(job_id)
+        assert job['status'] == 'done', job
+        assert job['result']['output_filename'] == f'converted_{job_id}_docs.zip'
+        assert job['progress']['percent'] == 100
+        assert os.path.exists(os.path.join(root, job['result']['output_filename']))
+        assert [filename for filename, _ in finished[0][0]['documents']] == ['a.txt']
+
+
+if __name__ == "__main__":
+    test_batch_keeps_folders_and_reports_failures()
+    test_batch_in_process_pool()
+    test_batch_limits()
+    test_batch_runs_as_a_job()
+    print("All batch conversion tests passed")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked conversion and streamed TXT conversion
+
+Inputs are random but seeded, so every run checks the same texts.
+"""
+import os
+import random
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+from test_conversion_engine import random_text
+
+UNICODE_WORDS = ['नमस्ते', 'महाराष्ट्र', 'मराठी', 'भाषा', 'शाळा', 'पुस्तक']
+
+
+def random_chunks(text, rng, max_chunk=12):
+    """Split text at random positions, sometimes into empty chunks"""
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(0, max_chunk)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def test_chunked_conversion_matches_one_shot():
+    """convert_chunks gives the one-shot result wherever the input is split"""
+    mapper = FontMapper(memo_size=0)
+    rng = random.Random('chunks')
+
+    # Without English preservation, multi-character keys such as 'vk' can
+    # be split across chunks
+    flags = [(True, True), (False, True), (False, False)]
+    for font in mapper.font_names:
+        for preserve_english, preserve_numbers in flags:
+            for _ in range(30):
+                text = random_text(mapper.mappings[font], rng)
+                chunks = random_chunks(text, rng)
+                pieces = list(mapper.convert_chunks(chunks, font, preserve_english, preserve_numbers))
+
+                assert ''.join(original for original, _ in pieces) == text
+                expected = mapper.convert_with_preservation(text, preserve_english, preserve_numbers,
+                                                            source_font=font)
+                assert ''.join(converted for _, converted in pieces) == expected, (font, chunks)
+
+
+def test_txt_detection_reads_past_the_sample_windows():
+    """A legacy line outside every sample window still decides the TXT source font"""
+    detector = FontDetector()
+    rng = random.Random('txt')
+    lines = [' '.join(rng.choice(UNICODE_WORDS) for _ in range(12)) for _ in range(4000)]
+    lines[1200] = 'DkT ZkkG'
+    text = '\n'.join(lines)
+    data = text.encode('utf-8')
+
+    # The line is in none of the windows read from the file
+    offset = data.index(b'DkT ZkkG')
+    window_bytes = detector.sample_window_size * 3
+    last_offset = len(data) - window_bytes
+    for fraction in detector.sample_fractions():
+        start = int(last_offset * fraction)
+        assert not start <= offset < start + window_bytes
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = DocumentConverter(detector, FontMapper(), output_dir=output_dir)
+        result = converter.convert_document(data, filename='sample.txt')
+
+        assert result['success'], result
+        assert result['stats']['source_font'] == detector.detect_source_font(text) == 'dvtt_yogesh'
+        with open(result['output_path'], encoding='utf-8') as f:
+            assert f.read() == converter.font_mapper.convert_with_preservation(text, source_font='dvtt_yogesh')
+
+
+if __name__ == "__main__":
+    test_chunked_conversion_matches_one_shot()
+    test_txt_detection_reads_past_the_sample_windows()
+    print("All chunked conversion tests passed")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk conversion command line: resuming and output roots
+"""
+import json
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import cli
+
+DVTT_TEXT = 'DkT ZkkG rsO\n'
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def manifest_paths(output_root):
+    """Paths of the complete manifest entries, in the order they were written"""
+    with open(os.path.join(output_root, cli.MANIFEST_NAME), encoding='utf-8') as f:
+        return [json.loads(line)['path'] for line in f if line.endswith('}\n')]
+
+
+def test_run_resumes_from_the_manifest():
+    """A second run converts only new, changed or failed files"""
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, 'source')
+        output = os.path.join(source, 'converted')
+        write(os.path.join(source, 'a.txt'), DVTT_TEXT)
+        write(os.path.join(source, 'sub', 'b.txt'), DVTT_TEXT)
+        write(os.path.join(source, 'c.doc'), 'not a DOC file')
+
+        summary = cli.run(source, output, workers=1)
+        assert (summary['converted'], summary['failed'], summary['skipped']) == (2, 1, 0)
+        assert os.path.exists(os.path.join(output, 'sub', 'b.txt'))
+        assert not os.path.exists(os.path.join(output, cli.STAGING_NAME))
+
+        # An interrupted run leaves a cut-short last line behind
+        with open(os.path.join(output, cli.MANIFEST_NAME), 'a', encoding='utf-8') as f:
+            f.write('{"path": "a.t')
+        write(os.path.join(source, 'sub', 'b.txt'), DVTT_TEXT * 2)
+        write(os.path.join(source, 'd.txt'), DVTT_TEXT)
+
+        summary = cli.run(source, output, workers=1)
+        assert (summary['converted'], summary['failed'], summary['skipped']) == (2, 1, 1)
+        assert manifest_paths(output)[3:] == sorted(['c.doc', 'd.txt', os.path.join('sub', 'b.txt')])
+
+        # A converted file whose output went missing is converted again
+        os.remove(os.path.join(output, 'a.txt'))
+        summary = cli.run(source, output, workers=1)
+        assert (summary['converted'], summary['failed'], summary['skipped']) == (1, 1, 2)
+        assert os.path.exists(os.path.join(output, 'a.txt'))
+
+
+def test_output_root_must_not_hold_the_source_root():
+    """The source tree itself, or a directory above it, is refused as the output tree"""
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, 'source')
+        write(os.path.join(source, 'a.txt'), DVTT_TEXT)
+
+        for output in (source, os.path.join(source, '.'), root):
+            try:
+                cli.run(source, output, workers=1)
+                assert False, f'output root {output} accepted'
+            except ValueError:
+                pass
+            try:
+                cli.main([source, output])
+                assert False, f'output root {output} accepted'
+            except SystemExit as e:
+                assert e.code == 2
+
+        with open(os.path.join(source, 'a.txt'), encoding='utf-8') as f:
+            assert f.read() == DVTT_TEXT
+        assert not os.path.exists(os.path.join(root, cli.MANIFEST_NAME))
+
+
+if __name__ == "__main__":
+    test_run_resumes_from_the_manifest()
+    test_output_root_must_not_hold_the_source_root()
+    print("All CLI tests passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Differential tests of the compiled conversion engine against a reference regex
+
+Inputs are random but seeded, so every run checks the same texts.
+"""
+import os
+import random
+import re
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.font_mapper import FontMapper
+
+# Text mixed into the random inputs besides the legacy keys
+EXTRA_PIECES = [' ', ' ', '\n', '\t', 'Office', 'PDF', '2024', '12', '.', ',', '(', ')',
+                'नमस्ते', 'महाराष्ट्र', '‍', '&', '<']
+
+
+def reference_convert(mapping, text):
+    """Longest-match conversion with one alternation regex, longest keys first"""
+    keys = sorted(mapping, key=len, reverse=True)
+    pattern = re.compile('|'.join(re.escape(key) for key in keys), re.DOTALL)
+    return pattern.sub(lambda match: mapping[match.group()], text)
+
+
+def random_text(mapping, rng, pieces=400):
+    """Random mix of mapping keys, their characters and other text"""
+    keys = sorted(mapping)
+    chars = sorted({char for key in keys for char in key})
+    parts = []
+    for _ in range(pieces):
+        roll = rng.random()
+        if roll < 0.5:
+            parts.append(rng.choice(keys))
+        elif roll < 0.8:
+            parts.append(rng.choice(chars))
+        else:
+            parts.append(rng.choice(EXTRA_PIECES))
+    return ''.join(parts)
+
+
+def test_engine_matches_reference_regex():
+    """Every engine converts like a plain longest-match regex over its whole table"""
+    mapper = FontMapper(memo_size=0)
+    rng = random.Random('engine')
+
+    for font in mapper.font_names:
+        mapping = mapper.mappings[font]
+        engine = mapper.get_engine(font)
+        for _ in range(200):
+            text = random_text(mapping, rng, pieces=rng.randint(0, 60))
+            assert engine.convert(text) == reference_convert(mapping, text), (font, text)
+
+
+if __name__ == "__main__":
+    test_engine_matches_reference_regex()
+    print("All conversion engine tests passed")
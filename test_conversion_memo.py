@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-document memo hit and miss counters
+"""
+import os
+import sys
+import threading
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.font_mapper import ConversionStats, FontMapper
+from app.converters.parallel import ParallelConverter
+
+TEXTS = ['DkT ZkkG', 'rsO', 'yksd gs', 'DkT ZkkG', 'rsO', 'DkT ZkkG']
+
+
+def convert_all(mapper, texts, stats):
+    for text in texts:
+        mapper.convert_with_preservation(text, source_font='dvtt_yogesh', stats=stats)
+
+
+def test_memo_counted_per_call():
+    """Each stats object counts the hits and misses of its own calls"""
+    mapper = FontMapper()
+    first = ConversionStats()
+    convert_all(mapper, TEXTS, first)
+    assert (first.memo_hits, first.memo_misses) == (3, 3)
+
+    # Another document sees the entries the first one left behind
+    second = ConversionStats()
+    convert_all(mapper, TEXTS[:2] + ['gs'], second)
+    assert second.report(mapper)['memo'] == {'hits': 2, 'misses': 1}
+
+    # Long texts are not memoized and count as neither
+    uncached = ConversionStats()
+    convert_all(mapper, ['DkT ' * 1000], uncached)
+    assert (uncached.memo_hits, uncached.memo_misses) == (0, 0)
+
+
+def test_memo_counts_are_not_shared_between_threads():
+    """Concurrent conversions do not see each other's hits and misses"""
+    mapper = FontMapper()
+    results = []
+    barrier = threading.Barrier(4)
+
+    def convert(index):
+        stats = ConversionStats()
+        texts = [f'DkT {index} {n % 50}' for n in range(500)]
+        barrier.wait()
+        convert_all(mapper, texts, stats)
+        results.append(stats)
+
+    threads = [threading.Thread(target=convert, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for stats in results:
+        assert (stats.memo_hits, stats.memo_misses) == (450, 50)
+
+
+def test_memo_counts_merged_from_workers():
+    """Hits and misses made in pool workers come back with the batch statistics"""
+    converter = ParallelConverter(workers=2, batch_chars=16)
+    try:
+        stats = ConversionStats()
+        texts = TEXTS * 20
+        converter.convert_many(texts, ['dvtt_yogesh'] * len(texts), stats=stats)
+        assert stats.memo_hits + stats.memo_misses == len(texts)
+        assert stats.memo_hits >= len(texts) - 2 * len(set(texts))
+    finally:
+        converter.shutdown()
+
+
+if __name__ == "__main__":
+    test_memo_counted_per_call()
+    test_memo_counts_are_not_shared_between_threads()
+    test_memo_counts_merged_from_workers()
+    print("All conversion memo tests passed")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming DOCX rewriter and DOCX font detection
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+import docx
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.docx_rewriter import DocxRewriter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+
+WORD_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+UNICODE_WORDS = ['नमस्ते', 'महाराष्ट्र', 'मराठी', 'भाषा', 'शाळा', 'पुस्तक']
+
+
+def build_docx(body_xml, header_xml):
+    """Minimal DOCX with a document part, a header part and a non-text member"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', '<?xml version="1.0"?><Types/>')
+        docx.writestr('word/document.xml', body_xml)
+        docx.writestr('word/header1.xml', header_xml)
+    return buffer.getvalue()
+
+
+def part_texts(xml):
+    """Text of every w:t element of an XML part, in document order"""
+    return [element.text or '' for element in ElementTree.fromstring(xml).iter(f'{{{WORD_NAMESPACE}}}t')]
+
+
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document xmlns:w="{WORD_NAMESPACE}"><w:body>'
+    '<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>dk;Zky; &amp; Office</w:t></w:r>'
+    '<w:r><w:t xml:space="preserve"> &lt;2024&gt; </w:t></w:r></w:p>'
+    '<w:p><w:r><w:t/></w:r><w:r><w:t>xzke iapk;r</w:t></w:r></w:p>'
+    '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>ftYgk &amp;&amp; rkyqdk</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    '<w:p><w:r><w:t>नमस्ते &gt; vkgs</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:hdr xmlns:w="{WORD_NAMESPACE}"><w:p><w:r><w:t>egkjk"Vª &lt;ifji=d&gt;</w:t></w:r></w:p></w:hdr>'
+)
+
+
+def rewrite_docx(source, chunk_size, convert, paragraph_end=None):
+    """Rewrite a DOCX held in memory, returning its members"""
+    output = io.BytesIO()
+    DocxRewriter(chunk_size=chunk_size).rewrite(io.BytesIO(source), output, convert, paragraph_end)
+    with zipfile.ZipFile(output) as docx:
+        return {name: docx.read(name) for name in docx.namelist()}
+
+
+def test_docx_rewriter_round_trip():
+    """Rewriting in 7-byte chunks keeps every byte outside w:t and converts every w:t exactly once"""
+    source = build_docx(DOCUMENT_XML, HEADER_XML)
+
+    # Identity conversion reproduces the parts byte for byte, entities included
+    calls = []
+    paragraph_ends = []
+
+    def identity(text, paragraph_index):
+        calls.append((text, paragraph_index))
+        return text
+
+    members = rewrite_docx(source, 7, identity, paragraph_ends.append)
+    assert members['word/document.xml'] == DOCUMENT_XML.encode('utf-8')
+    assert members['word/header1.xml'] == HEADER_XML.encode('utf-8')
+    assert members['[Content_Types].xml'] == b'<?xml version="1.0"?><Types/>'
+
+    expected_texts = part_texts(DOCUMENT_XML.encode('utf-8')) + part_texts(HEADER_XML.encode('utf-8'))
+    assert [text for text, _ in calls] == [text for text in expected_texts if text]
+    assert [index for _, index in calls] == [0, 0, 1, None, 2, None]
+    assert paragraph_ends == [0, 1, None, 2, None]
+    assert list(DocxRewriter(chunk_size=7).iter_text(io.BytesIO(source))) == calls
+
+    # A real conversion gives the same output for any chunk size
+    mapper = FontMapper(memo_size=0)
+
+    def convert(text, paragraph_index):
+        return mapper.convert_with_preservation(text, source_font='dvtt_yogesh')
+
+    converted = rewrite_docx(source, 7, convert)
+    assert converted == rewrite_docx(source, 64 * 1024, convert)
+    for name, xml in (('word/document.xml', DOCUMENT_XML), ('word/header1.xml', HEADER_XML)):
+        assert part_texts(converted[name]) == [convert(text, None) for text in part_texts(xml.encode('utf-8'))]
+
+
+def test_body_paragraphs_match_python_docx():
+    """body_paragraphs reads the paragraphs python-docx lists, leaving out tables and headers"""
+    source = build_docx(DOCUMENT_XML, HEADER_XML)
+
+    paragraphs = list(DocxRewriter(chunk_size=7).body_paragraphs(io.BytesIO(source)))
+
+    assert paragraphs == ['dk;Zky; & Office <2024> ', 'xzke iapk;r', 'नमस्ते > vkgs']
+    assert DocxRewriter().sample_text(io.BytesIO(source), 5) == paragraphs[:1]
+
+
+def convert_both_engines(build):
+    """Convert a python-docx document with the streaming and python-docx engines"""
+    document = docx.Document()
+    build(document)
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=output_dir)
+        for engine in ('stream', 'python-docx'):
+            converter.docx_engine = engine
+            result = converter.convert_document(buffer.getvalue(), filename='sample.docx')
+            assert result['success'], result
+            results[engine] = result['stats']
+    assert results['stream']['docx_engine'] == 'stream'
+    return results
+
+
+def test_stream_detection_matches_python_docx():
+    """Both DOCX engines pick the same source font, wherever the legacy text is"""
+    rng = random.Random('docx')
+
+    def late_legacy_paragraph(document):
+        for index in range(600):
+            text = 'DkT ZkkG' if index == 450 else ' '.join(rng.choice(UNICODE_WORDS) for _ in range(12))
+            document.add_paragraph(text)
+
+    def legacy_table_cell(document):
+        document.add_paragraph(' '.join(rng.choice(UNICODE_WORDS) for _ in range(12)))
+        document.add_table(rows=1, cols=1).cell(0, 0).text = 'DkT ZkkG'
+
+    for build, expected in ((late_legacy_paragraph, 'dvtt_yogesh'), (legacy_table_cell, 'dtt_dhruv')):
+        results = convert_both_engines(build)
+        assert results['stream']['source_font'] == results['python-docx']['source_font'] == expected
+
+
+if __name__ == "__main__":
+    test_docx_rewriter_round_trip()
+    test_body_paragraphs_match_python_docx()
+    test_stream_detection_matches_python_docx()
+    print("All DOCX rewriter tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for TXT encoding detection and decoding
+"""
+import codecs
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter, _DocumentSource
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+
+
+def make_converter(output_dir):
+    return DocumentConverter(FontDetector(), FontMapper(), output_dir=output_dir)
+
+
+def detect(converter, data):
+    return converter._detect_encoding(_DocumentSource(data, 'sample.txt'))
+
+
+def test_ascii_and_utf8_skip_chardet():
+    """ASCII and valid UTF-8 are recognized without chardet"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = make_converter(output_dir)
+
+        ascii_result = detect(converter, b'Office PDF 2024\n' * 10000)
+        assert (ascii_result['encoding'], ascii_result['method']) == ('ascii', 'ascii')
+
+        # A character split across the 64 KB read boundary is still valid
+        data = b'a' * (64 * 1024 - 1) + 'नमस्ते'.encode('utf-8')
+        utf8_result = detect(converter, data)
+        assert (utf8_result['encoding'], utf8_result['method']) == ('utf-8', 'utf-8')
+
+        bom_result = detect(converter, codecs.BOM_UTF8 + 'नमस्ते'.encode('utf-8'))
+        assert (bom_result['encoding'], bom_result['method']) == ('utf-8-sig', 'utf-8')
+
+
+def test_other_encodings_go_to_chardet():
+    """Text that is not UTF-8 is detected by chardet and converted"""
+    text = 'Привет, как дела. Это обычный русский текст.\n' * 200
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = make_converter(output_dir)
+        data = text.encode('windows-1251')
+
+        result = detect(converter, data)
+        assert result['method'] == 'chardet'
+        assert codecs.lookup(result['encoding']).name == 'cp1251'
+
+        converted = converter.convert_document(data, filename='sample.txt')
+        assert converted['success'], converted
+        with open(converted['output_path'], encoding='utf-8') as f:
+            assert f.read() == text
+
+
+def test_wrong_chardet_guess_does_not_fail_the_conversion():
+    """Bytes past the chardet sample that do not fit its guess are replaced"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = make_converter(output_dir)
+        converter.encoding_sample_size = 64 * 1024
+        data = b'Office PDF 2024\n' * 20000 + b'caf\xe9 \xff\n'
+
+        assert detect(converter, data)['method'] == 'chardet'
+        result = converter.convert_document(data, filename='sample.txt')
+
+        assert result['success'], result
+        with open(result['output_path'], encoding='utf-8') as f:
+            assert f.read().endswith('�\n')
+
+
+def test_failed_conversion_leaves_no_output():
+    """A TXT conversion that fails removes its partial output"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        converter = make_converter(output_dir)
+        converter.chunk_size = 1024
+        converter._detect_encoding = lambda source: {
+            'encoding': 'ascii', 'method': 'ascii', 'confidence': 1.0, 'time': 0.0
+        }
+        data = b'Office PDF 2024\n' * 20000 + 'नमस्ते'.encode('utf-8')
+
+        result = converter.convert_document(data, filename='sample.txt', source_font='dvtt_yogesh')
+
+        assert not result['success']
+        assert os.listdir(output_dir) == []
+
+
+if __name__ == "__main__":
+    test_ascii_and_utf8_skip_chardet()
+    test_other_encodings_go_to_chardet()
+    test_wrong_chardet_guess_does_not_fail_the_conversion()
+    test_failed_conversion_leaves_no_output()
+    print("All encoding detection tests passed")
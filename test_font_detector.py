@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for single-scan font detection
+
+Inputs are random but seeded, so every run checks the same texts.
+"""
+import os
+import random
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.font_detector import MATCH_SAMPLE_WINDOW, FontDetector
+
+# Pieces covering every classification, their overlaps and unclassified text
+PIECES = ['नमस्ते', 'महाराष्ट्र', 'Office', 'PDF', 'd', 'x', 'Ö', 'ä', 'ß',
+          '2024', ' ', '\n', '.', ',', 'ँ', '्']
+
+
+def random_text(rng, pieces):
+    return ''.join(rng.choice(PIECES) for _ in range(pieces))
+
+
+def test_counts_match_full_detection():
+    """Single-scan counts and samples agree with the match lists of detect_fonts"""
+    detector = FontDetector()
+    rng = random.Random('counts')
+
+    for _ in range(300):
+        text = random_text(rng, rng.randint(0, 80))
+        full = detector.detect_fonts(text)
+        counted = detector.detect_font_counts(text, max_matches=3)
+        for font_type in detector.font_classes:
+            assert counted[font_type]['count'] == len(full[font_type]['matches']), (font_type, text)
+            assert counted[font_type]['detected'] == full[font_type]['detected']
+            assert counted[font_type]['confidence'] == full[font_type]['confidence']
+            assert counted[font_type]['matches'] == full[font_type]['matches'][:3]
+
+
+def test_samples_come_from_leading_window():
+    """Matches past the sample window are counted but never sampled"""
+    detector = FontDetector()
+    text = 'नमस्ते ' + ' ' * MATCH_SAMPLE_WINDOW + 'Office PDF'
+
+    counted = detector.detect_font_counts(text, max_matches=5)
+
+    assert counted['english']['count'] == 2
+    assert counted['english']['detected']
+    assert counted['english']['matches'] == []
+    assert counted['unicode_marathi']['matches'] == ['नमस्ते']
+
+
+if __name__ == "__main__":
+    test_counts_match_full_detection()
+    test_samples_come_from_leading_window()
+    print("All font detector tests passed")
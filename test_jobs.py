@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for background conversion jobs: outcomes, orphaned jobs and expiry
+"""
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+from app.jobs import JobManager
+
+
+def make_jobs(root, **options):
+    converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=root)
+    return JobManager(converter, jobs_dir=os.path.join(root, 'jobs'), **options)
+
+
+def exited_pid():
+    """Pid of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_job_outcomes():
+    """Jobs end done or failed, close their document and report every result"""
+    with tempfile.TemporaryDirectory() as root:
+        results = []
+        jobs = make_jobs(root, on_result=lambda result, filename: results.append((result['success'], filename)))
+        upload = io.BytesIO(b'DkT ZkkG\n')
+
+        done_id = jobs.submit(upload, 'a.txt')
+        failed_id = jobs.submit(io.BytesIO(b'x'), 'a.doc')
+        jobs.shutdown()
+
+        done = jobs.get(done_id)
+        assert done['status'] == 'done'
+        assert done['progress']['percent'] == 100
+        assert done['result']['output_filename'] == f'converted_{done_id}_a.txt'
+        assert done['result']['stats']['source_font'] == 'dvtt_yogesh'
+        assert upload.closed
+
+        failed = jobs.get(failed_id)
+        assert failed['status'] == 'failed' and 'DOC' in failed['error']
+        assert sorted(results) == [(False, 'a.doc'), (True, 'a.txt')]
+        assert jobs.get('not-a-job-id') is None
+        assert jobs.get('0' * 32) is None
+
+
+def test_orphaned_jobs_fail():
+    """An unfinished job whose owner exited is reported as failed; others are left alone"""
+    with tempfile.TemporaryDirectory() as root:
+        jobs = make_jobs(root)
+        owners = {
+            'exited': {'host': jobs._host, 'pid': exited_pid()},
+            'alive': {'host': jobs._host, 'pid': os.getppid()},
+            'self': {'host': jobs._host, 'pid': os.getpid()},
+            'remote': {'host': jobs._host + '-elsewhere', 'pid': exited_pid()}
+        }
+        job_ids = {}
+        for name, owner in owners.items():
+            job_id = f'{len(job_ids):032x}'
+            jobs._write(job_id, {'id': job_id, 'status': 'running', 'owner': owner, 'filename': 'a.txt',
+                                 'progress': {}, 'result': None, 'error': None})
+            job_ids[name] = job_id
+
+        statuses = {name: jobs.get(job_id)['status'] for name, job_id in job_ids.items()}
+        assert statuses == {'exited': 'failed', 'alive': 'running', 'self': 'running', 'remote': 'running'}
+
+        # The failure is written back for every server process to see
+        assert jobs._read(job_ids['exited'])['status'] == 'failed'
+        assert 'restarted' in jobs._read(job_ids['exited'])['error']
+
+
+def test_expired_status_files_are_swept():
+    """Status files older than the ttl are removed, at most once per sweep interval"""
+    with tempfile.TemporaryDirectory() as root:
+        jobs = make_jobs(root, ttl=60, sweep_interval=3600)
+        old = time.time() - 120
+        for name in ('old.json', 'old.json.tmp', 'fresh.json', 'notes.txt'):
+            path = os.path.join(jobs.jobs_dir, name)
+            with open(path, 'w') as f:
+                f.write('{}')
+            if name != 'fresh.json':
+                os.utime(path, (old, old))
+
+        job_id = jobs.submit(io.BytesIO(b'gs\n'), 'a.txt')
+        jobs.shutdown()
+        assert sorted(os.listdir(jobs.jobs_dir)) == sorted(['fresh.json', 'notes.txt', f'{job_id}.json'])
+
+        # Within the sweep interval, submitting does not sweep again
+        path = os.path.join(jobs.jobs_dir, 'fresh.json')
+        os.utime(path, (old, old))
+        jobs = make_jobs(root, ttl=60, sweep_interval=3600)
+        jobs.last_sweep = time.time()
+        jobs.submit(io.BytesIO(b'gs\n'), 'b.txt')
+        jobs.shutdown()
+        assert os.path.exists(path)
+        assert jobs.sweep() == 1
+        assert not os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_job_outcomes()
+    test_orphaned_jobs_fail()
+    test_expired_status_files_are_swept()
+    print("All job tests passed")
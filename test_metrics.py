@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for merging metrics across the processes of a multi-process server
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.metrics import MetricsRegistry, clear_multiprocess_dir
+
+
+def record_in_worker(directory):
+    """Record a conversion and a job in flight, then exit like a recycled worker"""
+    metrics = MetricsRegistry(directory)
+    metrics.conversions.inc(format='txt', outcome='converted')
+    metrics.conversion_duration.observe(0.2, format='txt')
+    metrics.jobs_in_flight.inc()
+    metrics.flush()
+
+
+def run_worker(directory):
+    process = multiprocessing.Process(target=record_in_worker, args=(directory,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    return process.pid
+
+
+def sample(text, line_start):
+    """Value of the one exposition line starting with line_start"""
+    values = [line.rsplit(' ', 1)[1] for line in text.splitlines() if line.startswith(line_start + ' ')]
+    assert len(values) == 1, (line_start, values)
+    return float(values[0])
+
+
+def check_totals(metrics, converted, jobs):
+    text = metrics.render()
+    assert sample(text, 'converter_conversions_total{format="txt",outcome="converted"}') == converted
+    assert sample(text, 'converter_conversion_duration_seconds_count{format="txt"}') == converted
+    assert sample(text, 'converter_jobs_in_flight') == jobs
+
+
+def test_processes_are_merged():
+    """Counters and histograms add up over every process, gauges over live ones only"""
+    with tempfile.TemporaryDirectory() as directory:
+        metrics = MetricsRegistry(directory)
+        metrics.conversions.inc(format='txt', outcome='converted')
+        metrics.conversion_duration.observe(0.1, format='txt')
+        metrics.jobs_in_flight.inc()
+
+        first = run_worker(directory)
+        second = run_worker(directory)
+        check_totals(metrics, converted=3, jobs=1)
+
+        # Retiring folds an exited worker into the retired totals
+        metrics.retire_process(first)
+        assert not os.path.exists(os.path.join(directory, f'{first}.json'))
+        check_totals(metrics, converted=3, jobs=1)
+        metrics.retire_process(second)
+        metrics.retire_process(second)
+        assert sorted(name for name in os.listdir(directory) if name.endswith('.json')) == \
+            sorted(['retired.json', f'{os.getpid()}.json'])
+        check_totals(metrics, converted=3, jobs=1)
+
+        # A new server run starts from zero
+        clear_multiprocess_dir(directory)
+        assert [name for name in os.listdir(directory) if name.endswith('.json')] == []
+
+
+def test_single_process_registry():
+    """Without a multiprocess directory only this process's values are rendered"""
+    metrics = MetricsRegistry()
+    metrics.conversions.inc(format='pdf', outcome='error')
+    metrics.input_size.observe(3000, format='pdf')
+    metrics.flush()
+
+    text = metrics.render()
+    assert sample(text, 'converter_conversions_total{format="pdf",outcome="error"}') == 1
+    assert sample(text, 'converter_input_bytes_bucket{format="pdf",le="4096.0"}') == 1
+    assert sample(text, 'converter_input_bytes_bucket{format="pdf",le="1024.0"}') == 0
+
+
+if __name__ == "__main__":
+    test_processes_are_merged()
+    test_single_process_registry()
+    print("All metrics tests passed")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for converted file storage: lookups, expiry and the size quota
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.storage import OutputStorage
+
+
+def write(path, size, age=0):
+    """Write a file of the given size, last modified age seconds ago"""
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+def test_resolve_finds_live_files_only():
+    """Stored files resolve by name until they expire; other names never resolve"""
+    with tempfile.TemporaryDirectory() as root:
+        storage = OutputStorage(root, ttl=60)
+        sharded = write(storage.path_for('converted_a.txt'), 10)
+        legacy = write(os.path.join(root, 'converted_b.txt'), 10)
+        write(storage.path_for('converted_c.txt'), 10, age=120)
+
+        assert os.path.dirname(sharded) != root
+        assert storage.resolve('converted_a.txt') == sharded
+        assert storage.resolve('converted_b.txt') == legacy
+        assert storage.resolve('converted_c.txt') is None
+        assert storage.resolve('missing.txt') is None
+        assert storage.resolve('../converted_a.txt') is None
+        assert storage.resolve('') is None
+
+
+def test_sweep_expires_then_evicts_oldest():
+    """Expired files go first, then the oldest files until the total fits the quota"""
+    with tempfile.TemporaryDirectory() as root:
+        storage = OutputStorage(root, ttl=600, max_bytes=250)
+        write(storage.path_for('expired.txt'), 100, age=1200)
+        write(storage.path_for('oldest.txt'), 100, age=300)
+        write(storage.path_for('older.txt'), 100, age=200)
+        write(storage.path_for('newest.txt'), 100, age=100)
+
+        usage = storage.sweep()
+
+        assert usage == {'files': 2, 'bytes': 200}
+        assert [name for name in ('expired.txt', 'oldest.txt', 'older.txt', 'newest.txt')
+                if storage.resolve(name)] == ['older.txt', 'newest.txt']
+        stats = storage.stats()
+        assert (stats['expired'], stats['evicted']) == (1, 1)
+        assert stats['last_sweep'] is not None
+
+        # Nothing more to do on the next sweep
+        assert storage.sweep() == usage
+        assert (storage.stats()['expired'], storage.stats()['evicted']) == (1, 1)
+
+
+def test_background_sweeper():
+    """The sweeper thread sweeps on start and stops when asked"""
+    with tempfile.TemporaryDirectory() as root:
+        storage = OutputStorage(root, ttl=60, sweep_interval=3600)
+        expired = write(storage.path_for('expired.txt'), 10, age=120)
+
+        storage.start_sweeper()
+        storage.start_sweeper()
+        deadline = time.time() + 5
+        while os.path.exists(expired) and time.time() < deadline:
+            time.sleep(0.01)
+        storage.stop_sweeper()
+
+        assert not os.path.exists(expired)
+        assert storage._sweeper is None
+
+
+if __name__ == "__main__":
+    test_resolve_finds_live_files_only()
+    test_sweep_expires_then_evicts_oldest()
+    test_background_sweeper()
+    print("All output storage tests passed")
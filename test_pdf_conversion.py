@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for page-by-page PDF conversion
+"""
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+from benchmarks.corpus import write_pdf
+
+
+def test_pdf_detection_reads_every_page_when_the_sample_is_open():
+    """A legacy-font page outside the sampled pages still decides the PDF source font"""
+    detector = FontDetector()
+    pages = ['2024 12 31 (100) 200.50'] * 40
+    pages[12] = 'DkT ZkkG'
+    sampled = {int(39 * fraction) for fraction in detector.sample_fractions()}
+    assert 12 not in sampled
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        path = os.path.join(output_dir, 'sample.pdf')
+        write_pdf(path, '\n'.join(pages), lines_per_page=1)
+        converter = DocumentConverter(detector, FontMapper(), output_dir=output_dir)
+
+        result = converter.convert_document(path)
+
+        assert result['success'], result
+        assert result['stats']['pages'] == 40
+        assert result['stats']['source_font'] == 'dvtt_yogesh'
+
+
+if __name__ == "__main__":
+    test_pdf_detection_reads_every_page_when_the_sample_is_open()
+    print("All PDF conversion tests passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the conversion result cache: hits, eviction and eviction races
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.document_converter import DocumentConverter
+from app.converters.font_detector import FontDetector
+from app.converters.font_mapper import FontMapper
+from app.converters.result_cache import ResultCache
+
+
+def store(cache, root, name, size, used):
+    """Put an entry with an output of the given size, last used at the given time"""
+    output_path = os.path.join(root, name)
+    with open(output_path, 'wb') as f:
+        f.write(b'x' * size)
+    key = cache.key(io.BytesIO(name.encode('utf-8')), 'tables', {})
+    cache.put(key, {'success': True, 'output_path': output_path, 'output_filename': name})
+    os.utime(cache._entry_dir(key), (used, used))
+    return key
+
+
+def test_least_recently_used_entries_are_evicted():
+    """Going over max_bytes evicts the entries used longest ago"""
+    with tempfile.TemporaryDirectory() as root:
+        cache = ResultCache(os.path.join(root, 'cache'), max_bytes=300)
+        now = time.time()
+        first = store(cache, root, 'first', 100, now - 30)
+        second = store(cache, root, 'second', 100, now - 20)
+        third = store(cache, root, 'third', 100, now - 10)
+
+        # Looking an entry up makes it the most recently used
+        assert cache.get(first)['output_filename'] == 'first'
+        store(cache, root, 'fourth', 100, now)
+
+        assert cache.get(second) is None
+        assert cache.get(first) is not None and cache.get(third) is not None
+        stats = cache.stats()
+        assert (stats['evictions'], stats['size_bytes']) == (1, 300)
+        assert (stats['hits'], stats['misses']) == (3, 1)
+
+        # A new cache over the same directory picks up the stored size
+        assert ResultCache(os.path.join(root, 'cache'), max_bytes=300).stats()['size_bytes'] == 300
+
+
+def test_repeated_upload_is_served_from_the_cache():
+    """The same document converted twice is restored from the cache the second time"""
+    with tempfile.TemporaryDirectory() as root:
+        converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=root,
+                                      result_cache=ResultCache(os.path.join(root, 'cache')))
+        first = converter.convert_document(b'DkT ZkkG\n', filename='a.txt')
+        second = converter.convert_document(b'DkT ZkkG\n', filename='b.txt')
+
+        assert (first['cache_hit'], second['cache_hit']) == (False, True)
+        assert second['output_filename'] == 'converted_b.txt'
+        with open(first['output_path'], 'rb') as a, open(second['output_path'], 'rb') as b:
+            assert a.read() == b.read()
+
+
+def test_entry_evicted_after_lookup_is_a_miss():
+    """An entry removed between lookup and restore is converted again instead of failing"""
+    with tempfile.TemporaryDirectory() as root:
+        cache = ResultCache(os.path.join(root, 'cache'))
+        converter = DocumentConverter(FontDetector(), FontMapper(), output_dir=root, result_cache=cache)
+        assert converter.convert_document(b'DkT ZkkG\n', filename='a.txt')['success']
+
+        lookup = cache.get
+
+        def get_then_evict(key):
+            result = lookup(key)
+            shutil.rmtree(cache._entry_dir(key))
+            return result
+
+        cache.get = get_then_evict
+        result = converter.convert_document(b'DkT ZkkG\n', filename='b.txt')
+
+        assert result['success'], result
+        assert result['cache_hit'] is False
+        assert os.path.exists(result['output_path'])
+
+
+if __name__ == "__main__":
+    test_least_recently_used_entries_are_evicted()
+    test_repeated_upload_is_served_from_the_cache()
+    test_entry_evicted_after_lookup_is_a_miss()
+    print("All result cache tests passed")
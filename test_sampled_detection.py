@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for sampled font detection: the early exit and the full-scan fallback
+
+Inputs are random but seeded, so every run checks the same texts.
+"""
+import os
+import random
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.converters.font_detector import FontDetector
+
+UNICODE_WORDS = ['नमस्ते', 'महाराष्ट्र', 'मराठी', 'भाषा', 'शाळा', '२०२४']
+DVTT_WORDS = ['DkT', 'ZkkG', 'rsO', 'yksd', 'gs']
+
+
+def small_detector():
+    """Detector with tiny windows so short texts already take the sampled path"""
+    return FontDetector(sample_window_size=64, sample_windows=8)
+
+
+def words(rng, vocabulary, count):
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+
+def test_settled_decision_ends_early():
+    """DVTT text settles on the highest-priority font from the first window"""
+    detector = small_detector()
+    text = words(random.Random('dvtt'), DVTT_WORDS, 2000)
+
+    results = detector.detect_fonts_sampled(text)
+
+    assert all(info['sampled'] for info in results.values())
+    assert detector.select_source_font(results) == 'dvtt_yogesh'
+    assert results['dvtt_yogesh']['count'] < detector.detect_font_counts(text)['dvtt_yogesh']['count']
+
+
+def test_unsettled_decision_scans_everything():
+    """A legacy line between the sample windows still decides the font"""
+    detector = small_detector()
+    rng = random.Random('unicode')
+    lines = [words(rng, UNICODE_WORDS, 10) for _ in range(500)]
+    lines[150] = 'DkT ZkkG'
+    text = '\n'.join(lines)
+
+    sample_only = detector.empty_font_counts()
+    for window in detector._sample_windows([text]):
+        detector.merge_font_counts(sample_only, detector.detect_font_counts(window))
+    assert detector.select_source_font(sample_only) == 'dtt_dhruv'
+
+    for source in (text, lines):
+        results = detector.detect_fonts_sampled(source)
+        assert not any(info['sampled'] for info in results.values())
+        assert detector.select_source_font(results) == 'dvtt_yogesh'
+        assert results['dvtt_yogesh']['count'] == detector.detect_font_counts(text)['dvtt_yogesh']['count']
+
+
+def test_small_input_is_scanned_in_full():
+    """Input no longer than the sample windows is never sampled"""
+    detector = small_detector()
+
+    results = detector.detect_fonts_sampled('DkT ' * 100)
+
+    assert not results['dvtt_yogesh']['sampled']
+    assert results['dvtt_yogesh']['count'] == 100
+
+
+def test_sampling_picks_the_full_scan_font():
+    """Sampled and full detection select the same source font"""
+    detector = small_detector()
+    rng = random.Random('mixed')
+
+    for _ in range(100):
+        vocabulary = rng.choice([UNICODE_WORDS, DVTT_WORDS, UNICODE_WORDS + DVTT_WORDS, ['Office', 'PDF']])
+        lines = [words(rng, vocabulary, rng.randint(1, 12)) for _ in range(rng.randint(1, 200))]
+        if rng.random() < 0.5:
+            lines[rng.randrange(len(lines))] = words(rng, DVTT_WORDS, 2)
+        text = '\n'.join(lines)
+
+        expected = detector.select_source_font(detector.detect_font_counts(text))
+        assert detector.select_source_font(detector.detect_fonts_sampled(text)) == expected
+        assert detector.select_source_font(detector.detect_fonts_sampled(lines)) == expected
+
+
+if __name__ == "__main__":
+    test_settled_decision_ends_early()
+    test_unsettled_decision_scans_everything()
+    test_small_input_is_scanned_in_full()
+    test_sampling_picks_the_full_scan_font()
+    print("All sampled detection tests passed")
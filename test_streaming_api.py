@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the NDJSON streaming responses of the serverless API
+
+Inputs are random but seeded, so every run checks the same texts.
+"""
+import io
+import json
+import os
+import random
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import index as api
+
+UNICODE_WORDS = ['नमस्ते', 'महाराष्ट्र', 'मराठी', 'भाषा', 'शाळा', 'पुस्तक']
+
+
+def sample_text():
+    """Unicode text over several stream chunks with a DVTT line near the end"""
+    rng = random.Random('stream')
+    lines = [' '.join(rng.choice(UNICODE_WORDS) for _ in range(12)) for _ in range(3000)]
+    lines[2500] = 'DkT ZkkG rsO'
+    return '\n'.join(lines)
+
+
+def read_lines(response):
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def comparable(stats):
+    """Statistics without the fields that depend on earlier requests"""
+    return {key: value for key, value in stats.items() if key not in ('memo', 'detected_fonts')}
+
+
+def check_stream(lines, expected):
+    """A header, chunks joining to the one-shot conversion, then the same statistics"""
+    assert [line['type'] for line in lines[:1] + lines[-1:]] == ['header', 'stats']
+    chunks = lines[1:-1]
+    assert len(chunks) > 1 and {line['type'] for line in chunks} == {'chunk'}
+
+    assert lines[0]['source_font'] == 'dvtt_yogesh'
+    for font_type, info in lines[0]['detected_fonts'].items():
+        assert info['count'] == expected['detected_fonts'][font_type]['count'], font_type
+    assert ''.join(line['converted'] for line in chunks) == expected['converted']
+    assert lines[-1]['success']
+    assert comparable(lines[-1]['stats']) == comparable(expected['stats'])
+
+
+def test_text_stream_matches_one_shot():
+    """Streaming /api/convert converts with the same font and statistics as the JSON response"""
+    client = api.app.test_client()
+    text = sample_text()
+    assert len(text) > 2 * api.STREAM_CHUNK_SIZE
+
+    expected = client.post('/api/convert', json={'text': text}).get_json()
+    assert expected['success']
+
+    check_stream(read_lines(client.post('/api/convert?stream=1', json={'text': text})), expected)
+    check_stream(read_lines(client.post('/api/convert', json={'text': text},
+                                        headers={'Accept': 'application/x-ndjson'})), expected)
+
+
+def test_file_stream_decodes_across_chunks():
+    """Streaming /api/convert-file decodes characters split between read chunks"""
+    client = api.app.test_client()
+    text = sample_text()
+    data = text.encode('utf-8')
+    # A three-byte Devanagari character straddles the first read boundary
+    assert data[api.STREAM_CHUNK_SIZE - 1:api.STREAM_CHUNK_SIZE + 2].decode('utf-8', errors='replace') != \
+        data[api.STREAM_CHUNK_SIZE - 1:api.STREAM_CHUNK_SIZE + 2].decode('utf-8', errors='ignore')
+
+    def upload(path):
+        return client.post(path, data={'file': (io.BytesIO(data), 'sample.txt')},
+                           content_type='multipart/form-data')
+
+    expected = upload('/api/convert-file').get_json()
+    lines = read_lines(upload('/api/convert-file?stream=1'))
+
+    assert lines[0]['filename'] == 'converted_sample.txt'
+    check_stream(lines, expected)
+
+
+def test_file_stream_rejects_invalid_utf8():
+    """Undecodable uploads get a JSON error before any stream starts"""
+    client = api.app.test_client()
+    response = client.post('/api/convert-file?stream=1',
+                           data={'file': (io.BytesIO(b'caf\xe9\n'), 'sample.txt')},
+                           content_type='multipart/form-data')
+
+    assert response.mimetype == 'application/json'
+    assert not response.get_json()['success']
+
+
+if __name__ == "__main__":
+    test_text_stream_matches_one_shot()
+    test_file_stream_decodes_across_chunks()
+    test_file_stream_rejects_invalid_utf8()
+    print("All streaming API tests passed")
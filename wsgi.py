@@ -0,0 +1,20 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn wsgi:app
+
+app.py shares its name with the app/ package, which wins the import of
+"app", so the Flask application module is loaded from its path here.
+"""
+import importlib.util
+import os
+import sys
+
+_spec = importlib.util.spec_from_file_location(
+    'flask_app', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+)
+flask_app = importlib.util.module_from_spec(_spec)
+sys.modules['flask_app'] = flask_app
+_spec.loader.exec_module(flask_app)
+
+app = flask_app.app